@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from redis.commands.search.field import TagField, TextField, NumericField, VectorField
+from redis.commands.search.indexDefinition import IndexDefinition
+from redis.commands.search.query import Query
+
+from embedding_cache import normalize_text
+from inspection import parse_attribute
+
+logger = logging.getLogger(__name__)
+
+
+def answer_scope(filters: Optional[Dict] = None) -> str:
+    """Empreinte des paramètres de recherche ayant produit une réponse
+
+    Deux questions proches ne partagent une réponse que si elles ont été
+    posées avec les mêmes filtres (catégorie, nombre de passages...).
+    """
+    canonical = json.dumps(filters or {}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+class SemanticAnswerCache:
+    """Cache sémantique des réponses, indexé par l'embedding des questions
+
+    Chaque réponse est stockée dans un hash ``<index_name>:<empreinte>`` avec
+    la question, son embedding, la portée (empreinte des filtres de
+    recherche), la réponse et ses sources (chemin et empreinte du contenu au
+    moment de la réponse). Une question proche (distance cosinus inférieure
+    au seuil) d'une question en cache, posée avec les mêmes filtres,
+    réutilise la réponse tant que ses documents sources n'ont pas changé
+    dans le manifeste.
+
+    Les entrées expirent après ``ttl`` secondes ; au-delà de ``max_entries``,
+    les moins récemment utilisées sont évincées.
+    """
+
+    def __init__(self, redis_client, manifest,
+                 index_name: str = 'answers',
+                 distance_threshold: float = 0.05,
+                 ttl: Optional[int] = 7 * 86400,
+                 max_entries: int = 10000):
+        self.redis_client = redis_client
+        self.manifest = manifest
+        self.index_name = index_name
+        self.distance_threshold = distance_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Sorted set des dernières utilisations, hors du préfixe de l'index
+        self.lru_key = f"lru:{index_name}"
+        self._index_ready = False
+
+    def _ensure_index(self, dim: int) -> None:
+        """Crée l'index vectoriel des questions s'il n'existe pas"""
+        if self._index_ready:
+            return
+        search = self.redis_client.ft(self.index_name)
+        try:
+            info = search.info()
+        except Exception:
+            info = None
+        if info is not None and 'scope' not in {
+                parse_attribute(raw).get('attribute') for raw in info.get('attributes', [])}:
+            # Index antérieur aux portées : ses réponses ne peuvent pas être
+            # filtrées, le cache est vidé
+            search.dropindex(delete_documents=True)
+            self.redis_client.delete(self.lru_key)
+            logger.info("🔄 Cache de réponses vidé (index sans portée de recherche)")
+            info = None
+        if info is None:
+            schema = (
+                TextField("question"),
+                TagField("scope"),
+                NumericField("created_at"),
+                VectorField("embedding",
+                    "FLAT",
+                    {
+                        "TYPE": "FLOAT32",
+                        "DIM": dim,
+                        "DISTANCE_METRIC": "COSINE"
+                    }
+                )
+            )
+            self.redis_client.ft(self.index_name).create_index(
+                schema,
+                definition=IndexDefinition(prefix=[f"{self.index_name}:"])
+            )
+            logger.info("✅ Index du cache de réponses créé")
+        self._index_ready = True
+
+    def _sources_fresh(self, sources: List[Dict]) -> bool:
+        """Vérifie que les documents sources n'ont pas changé depuis la réponse"""
+        paths = [source['full_path'] for source in sources]
+        current = self.manifest.get_many(paths)
+        return all(
+            current.get(source['full_path']) is not None
+            and current[source['full_path']].get('digest') == source.get('digest')
+            for source in sources
+        )
+
+    def lookup(self, query_vector, filters: Optional[Dict] = None) -> Optional[Dict]:
+        """Cherche une réponse en cache pour une question proche
+
+        Args:
+            query_vector: Embedding de la question
+            filters: Paramètres de recherche de la question (catégorie,
+                top_k...) ; seules les réponses produites avec les mêmes
+                paramètres sont candidates
+
+        Returns:
+            ``{'question', 'answer', 'sources', 'distance'}`` ou None
+        """
+        vector = np.asarray(query_vector, dtype=np.float32)
+        try:
+            self._ensure_index(len(vector))
+            query = Query(f"@scope:{{{answer_scope(filters)}}}"
+                          "=>[KNN 1 @embedding $query_vector AS distance]")\
+                .return_fields("question", "answer", "sources", "distance")\
+                .sort_by("distance")\
+                .paging(0, 1)\
+                .dialect(2)
+            results = self.redis_client.ft(self.index_name).search(
+                query, {"query_vector": vector.tobytes()}
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Cache de réponses indisponible: {e}")
+            return None
+
+        if not results.docs:
+            return None
+        doc = results.docs[0]
+        distance = float(doc.distance)
+        if distance > self.distance_threshold:
+            return None
+
+        sources = json.loads(doc.sources)
+        if not self._sources_fresh(sources):
+            # Documents modifiés depuis : la réponse n'est plus valable
+            self.redis_client.delete(doc.id)
+            self.redis_client.zrem(self.lru_key, doc.id)
+            return None
+
+        self.redis_client.zadd(self.lru_key, {doc.id: time.time()})
+        return {
+            'question': doc.question,
+            'answer': doc.answer,
+            'sources': sources,
+            'distance': distance
+        }
+
+    def store(self, question: str, query_vector, answer: str, sources: List[Dict],
+              filters: Optional[Dict] = None) -> None:
+        """Enregistre une réponse et applique l'éviction par taille
+
+        Args:
+            question: Question posée
+            query_vector: Embedding de la question
+            answer: Réponse générée
+            sources: Résultats de recherche utilisés (avec ``full_path``)
+            filters: Paramètres de recherche ayant produit la réponse
+        """
+        vector = np.asarray(query_vector, dtype=np.float32)
+        scope = answer_scope(filters)
+        digest = hashlib.sha256(f"{scope}:{normalize_text(question)}".encode('utf-8')).hexdigest()
+        key = f"{self.index_name}:{digest}"
+
+        # Empreinte actuelle des sources, pour invalider la réponse s'ils changent
+        paths = list(dict.fromkeys(source['full_path'] for source in sources))
+        entries = self.manifest.get_many(paths)
+        cached_sources = [{
+            'title': source['title'],
+            'category': source['category'],
+            'full_path': source['full_path'],
+            'similarity': source['similarity'],
+            'digest': (entries.get(source['full_path']) or {}).get('digest')
+        } for source in sources]
+
+        try:
+            self._ensure_index(len(vector))
+            now = time.time()
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hset(key, mapping={
+                'question': question,
+                'scope': scope,
+                'answer': answer,
+                'sources': json.dumps(cached_sources),
+                'created_at': now,
+                'embedding': vector.tobytes()
+            })
+            if self.ttl:
+                pipe.expire(key, self.ttl)
+            pipe.zadd(self.lru_key, {key: now})
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+
+            # Éviction des entrées les moins récemment utilisées
+            if self.max_entries and size > self.max_entries:
+                evicted = self.redis_client.zpopmin(self.lru_key, size - self.max_entries)
+                if evicted:
+                    self.redis_client.delete(*[member for member, _ in evicted])
+        except Exception as e:
+            logger.warning(f"⚠️ Impossible d'enregistrer la réponse en cache: {e}")
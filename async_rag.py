@@ -0,0 +1,535 @@
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+import numpy as np
+import redis.asyncio as aioredis
+from redis import Redis
+
+from answer_cache import SemanticAnswerCache
+from embedding_backends import LMStudioBackend
+from embedding_cache import EmbeddingCache
+from manifest import IngestionManifest
+from metrics import Metrics
+from reranking import RERANKERS, DEFAULT_CROSS_ENCODER, CrossEncoderReranker, cosine_rerank
+from script import (PROMPT_TEMPLATE, SEARCH_MODES, RedisVectorStore, build_text_query_terms,
+                    format_context, select_context)
+from vector_store import VECTOR_STORES, LocalVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingBatcher:
+    """Regroupe les embeddings de requêtes arrivant presque simultanément
+
+    La première requête d'un lot ouvre une fenêtre de ``window`` secondes ;
+    toutes les requêtes reçues pendant cette fenêtre (au plus ``max_batch``)
+    partent en un seul appel ``/embeddings``. Les textes identiques d'un même
+    lot ne sont encodés qu'une fois.
+    """
+
+    def __init__(self, embed_batch, window: float = 0.005, max_batch: int = 64):
+        self.embed_batch = embed_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Références aux lots en cours, pour éviter leur ramassage
+        self._tasks = set()
+        self.batches = 0
+        self.requests = 0
+
+    async def embed(self, text: str):
+        """Retourne l'embedding d'un texte, calculé avec le lot en cours"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(text, []).append(future)
+        self.requests += 1
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        self.batches += 1
+        task = asyncio.ensure_future(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: Dict[str, List[asyncio.Future]]) -> None:
+        texts = list(pending)
+        try:
+            embeddings = await self.embed_batch(texts)
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for text, embedding in zip(texts, embeddings):
+            for future in pending[text]:
+                if not future.done():
+                    future.set_result(embedding)
+
+    def stats(self) -> Dict:
+        """Nombre de requêtes et de lots envoyés"""
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0
+        }
+
+
+class AsyncLocalRAG:
+    """Pendant asynchrone de ``LocalRAG`` pour les requêtes concurrentes
+
+    Repose sur ``redis.asyncio`` et un client ``httpx.AsyncClient`` partagé :
+    un même processus peut traiter de nombreuses questions en parallèle.
+    Avec ``vector_store='local'``, le stockage local construit par
+    ``LocalRAG`` est interrogé dans un thread, sans Redis. L'ingestion reste
+    assurée par ``LocalRAG``.
+
+    Exemple::
+
+        async with AsyncLocalRAG() as rag:
+            results = await rag.answer_many(["question 1", "question 2"])
+    """
+
+    def __init__(self,
+                 redis_host='localhost',
+                 redis_port=6379,
+                 index_name='docs',
+                 llm_url='http://localhost:1234/v1',
+                 embedding_model='local',
+                 embedding_batch_size=32,
+                 embedding_concurrency=4,
+                 embedding_max_retries=3,
+                 query_cache_size=1024,
+                 query_cache_ttl=86400,
+                 answer_cache=False,
+                 answer_cache_distance=0.05,
+                 answer_cache_ttl=7 * 86400,
+                 answer_cache_size=10000,
+                 context_window=8192,
+                 max_answer_tokens=1000,
+                 embedding_timeout=30,
+                 llm_connect_timeout=10,
+                 llm_timeout=120,
+                 max_connections=32,
+                 query_batch_window=0.0,
+                 query_batch_size=64,
+                 embedding_backend=None,
+                 ef_runtime=None,
+                 search_mode='hybrid',
+                 rerank=None,
+                 rerank_candidates=50,
+                 rerank_model=DEFAULT_CROSS_ENCODER,
+                 vector_store='redis',
+                 local_store_path='vector_store',
+                 rescore_candidates=100):
+
+        if vector_store not in VECTOR_STORES:
+            raise ValueError(f"Stockage de vecteurs inconnu: {vector_store} (disponibles: {', '.join(VECTOR_STORES)})")
+        self.index_name = index_name
+        # Stockage interrogé : index Redis (client asynchrone) ou fichiers locaux
+        if vector_store == 'local':
+            if answer_cache:
+                raise ValueError("Le cache sémantique des réponses nécessite Redis Stack")
+            if not LocalVectorStore.exists(local_store_path):
+                raise RuntimeError(f"Aucun stockage local dans {local_store_path}, "
+                                   "chargez d'abord les documents")
+            self.redis_client = None
+            self.store = LocalVectorStore(local_store_path, rescore_candidates)
+        else:
+            self.redis_client = aioredis.Redis(host=redis_host, port=redis_port)
+            self.store = RedisVectorStore(self.redis_client, index_name, ef_runtime=ef_runtime)
+        self.llm_url = llm_url
+
+        # Client HTTP partagé (pool de connexions keep-alive)
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(llm_timeout, connect=llm_connect_timeout)
+        )
+
+        # Client d'embedding par lots (mêmes lots et retry que LocalRAG) ; un
+        # moteur local (EmbeddingBackend) remplace l'appel HTTP et s'exécute
+        # dans un thread
+        self.embedding_backend = embedding_backend
+        self.embedding_model = embedding_backend.model_id if embedding_backend else embedding_model
+        self.embedding_api = LMStudioBackend(
+            None, llm_url,
+            model_id=self.embedding_model,
+            batch_size=embedding_batch_size,
+            concurrency=embedding_concurrency,
+            max_retries=embedding_max_retries,
+            timeout=embedding_timeout
+        )
+        self._embedding_slots = asyncio.Semaphore(max(embedding_concurrency, 1))
+
+        # Micro-batching des embeddings de requêtes (désactivé si fenêtre nulle)
+        self.query_batcher = None
+        if query_batch_window > 0:
+            self.query_batcher = QueryEmbeddingBatcher(
+                self.get_embeddings,
+                window=query_batch_window,
+                max_batch=query_batch_size
+            )
+
+        # Métadonnées de l'index actif (type de vecteur, profil), lues avant
+        # la première recherche (ou par ``check``) ; le stockage local a les
+        # siennes. Modèle servi qui a construit l'index (None pour un index ancien)
+        self.index_model = getattr(self.store, 'served_model', None)
+        self._metadata_loaded = self.redis_client is None
+        self._metadata_lock = asyncio.Lock()
+
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Mode de recherche inconnu: {search_mode}")
+        self.search_mode = search_mode
+
+        # Reclassement optionnel d'un ensemble élargi de candidats
+        if rerank is not None and rerank not in RERANKERS:
+            raise ValueError(f"Reclassement inconnu: {rerank} (disponibles: {', '.join(RERANKERS)})")
+        self.rerank = rerank
+        self.rerank_candidates = rerank_candidates
+        self.cross_encoder = CrossEncoderReranker(rerank_model) if rerank == 'cross-encoder' else None
+
+        # Durées par étape et compteurs des requêtes
+        self.metrics = Metrics()
+
+        # Paramètres de génération des réponses
+        self.context_window = context_window
+        self.max_answer_tokens = max_answer_tokens
+
+        # Cache des embeddings de requêtes (LRU local + Redis avec TTL)
+        self.query_cache = EmbeddingCache(
+            redis_client=self.redis_client,
+            model_id=self.embedding_model,
+            max_size=query_cache_size,
+            ttl=query_cache_ttl
+        )
+        self.query_cache.model_id = self.index_model or self.embedding_model
+
+        # Cache sémantique des réponses (optionnel), interrogé dans un thread
+        self.answer_cache = None
+        if answer_cache:
+            sync_client = Redis(host=redis_host, port=redis_port)
+            self.answer_cache = SemanticAnswerCache(
+                sync_client,
+                IngestionManifest(sync_client, self.index_name),
+                index_name=f"{self.index_name}_answers",
+                distance_threshold=answer_cache_distance,
+                ttl=answer_cache_ttl,
+                max_entries=answer_cache_size
+            )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self) -> None:
+        """Ferme les connexions HTTP et Redis, et le stockage"""
+        await self.http.aclose()
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
+        self.store.close()
+
+    async def check(self) -> bool:
+        """Vérifie Redis Stack (module search) et LM Studio en parallèle
+
+        Lit au passage les métadonnées de l'index actif (type de vecteur,
+        profil). Le stockage local, ouvert à la création, n'a rien à vérifier.
+        """
+        async def check_redis():
+            if self.redis_client is None:
+                return True
+            modules = await self.redis_client.module_list()
+            if not any(module[b'name'].decode('utf-8') == 'search' for module in modules):
+                return False
+            await self.load_index_metadata()
+            return True
+
+        async def check_llm():
+            response = await self.http.get(f"{self.llm_url}/models")
+            return response.status_code == 200
+
+        redis_ok, llm_ok = await asyncio.gather(check_redis(), check_llm(), return_exceptions=True)
+        if redis_ok is not True:
+            logger.error(f"❌ Redis Stack indisponible: {redis_ok}")
+        if llm_ok is not True:
+            logger.error(f"❌ LM Studio indisponible: {llm_ok}")
+        return redis_ok is True and llm_ok is True
+
+    async def load_index_metadata(self) -> bool:
+        """Lit le type de vecteur et le profil de l'index derrière l'alias
+
+        Returns:
+            False si l'index n'existe pas (encore)
+        """
+        if self.redis_client is None:
+            return True
+        try:
+            info = await self.redis_client.ft(self.index_name).info()
+        except Exception:
+            return False
+        index = info.get('index_name', self.index_name)
+        index = index.decode('utf-8') if isinstance(index, bytes) else index
+        raw = await self.redis_client.hgetall(f"index_meta:{index}")
+        meta = {key.decode('utf-8'): value.decode('utf-8') for key, value in raw.items()}
+        self.store.configure(index, meta)
+        # Embeddings de requêtes rangés sous le modèle servi de l'index
+        self.index_model = meta.get('served_model') or None
+        self.query_cache.model_id = self.index_model or self.embedding_model
+        self._metadata_loaded = True
+        return True
+
+    async def _ensure_index_metadata(self) -> None:
+        """Charge une seule fois les métadonnées de l'index, avant la première recherche"""
+        if self._metadata_loaded:
+            return
+        async with self._metadata_lock:
+            if not self._metadata_loaded:
+                await self.load_index_metadata()
+
+    async def get_embeddings(self, texts: List[str]) -> List[Optional[list]]:
+        """Obtient les embeddings d'une liste de textes, par lots concurrents"""
+        if not texts:
+            return []
+
+        texts = [text[:8000] for text in texts]
+        self.metrics.incr('embedding_texts', len(texts))
+        with self.metrics.timer('embedding'):
+            if self.embedding_backend is not None:
+                return await asyncio.to_thread(self.embedding_backend.embed, texts)
+            return await self.embedding_api.aembed(self.http, texts, self._embedding_slots)
+
+    async def get_query_embedding(self, query: str):
+        """Obtient l'embedding d'une requête en passant par le cache"""
+        await self._ensure_index_metadata()
+        with self.metrics.timer('query_embedding'):
+            embedding = await self.query_cache.aget(query)
+            if embedding is not None:
+                return embedding
+
+            if self.query_batcher is not None:
+                embedding = await self.query_batcher.embed(query)
+            else:
+                embedding = (await self.get_embeddings([query]))[0]
+            served = (self.embedding_backend or self.embedding_api).served_model
+            if embedding is not None and self.index_model and served and served != self.index_model:
+                raise ValueError(
+                    f"Le modèle d'embedding servi ({served}) n'est pas celui de l'index "
+                    f"({self.index_model}) : rechargez-le dans LM Studio ou reconstruisez l'index"
+                )
+            if embedding is not None:
+                await self.query_cache.aput(query, embedding)
+            return embedding
+
+    async def _search(self, query_vector, top_k: int, category=None,
+                      query_text: Optional[str] = None) -> List[Dict]:
+        """Recherche à partir d'un embedding déjà calculé
+
+        Avec ``query_text`` et le mode ``hybrid``, la requête plein texte BM25
+        est envoyée en même temps que la requête KNN et les deux classements
+        sont fusionnés par rang réciproque. Avec un reclassement,
+        ``rerank_candidates`` candidats sont reclassés avant de garder les
+        ``top_k`` meilleurs.
+        """
+        self.metrics.incr('searches')
+        if self.rerank:
+            results = await self._retrieve(query_vector, max(self.rerank_candidates, top_k),
+                                           category, query_text)
+            with self.metrics.timer('rerank'):
+                return await self._rerank(query_text, query_vector, results, top_k)
+        return await self._retrieve(query_vector, top_k, category, query_text)
+
+    async def _retrieve(self, query_vector, top_k: int, category=None,
+                        query_text: Optional[str] = None) -> List[Dict]:
+        """Recherche KNN, ou hybride, des ``top_k`` premiers candidats
+
+        En mode hybride, les requêtes KNN et plein texte partent dans un même
+        pipeline Redis, comme avec ``LocalRAG``.
+        """
+        await self._ensure_index_metadata()
+        terms = build_text_query_terms(query_text) if query_text and self.search_mode == 'hybrid' else ""
+        with self.metrics.timer(f'{self.store.name}_search'):
+            if terms:
+                return await self.store.ahybrid_search(query_vector, terms, top_k, category)
+            return await self.store.asearch(query_vector, top_k, category)
+
+    async def fetch_vectors(self, results: List[Dict]) -> List[Optional[np.ndarray]]:
+        """Charge les vecteurs stockés des passages (un seul pipeline Redis)"""
+        await self._ensure_index_metadata()
+        return await self.store.afetch_vectors(results)
+
+    async def _rerank(self, query_text: Optional[str], query_vector,
+                      results: List[Dict], top_k: int) -> List[Dict]:
+        """Reclasse des candidats par cosinus exact ou par cross-encoder (dans un thread)"""
+        if not results:
+            return results
+        if self.rerank == 'cross-encoder' and query_text:
+            await self.fetch_contents(results)
+            return await asyncio.to_thread(self.cross_encoder.rerank, query_text, results, top_k)
+        return cosine_rerank(query_vector, await self.fetch_vectors(results), results, top_k)
+
+    async def vector_search(self, query: str, top_k=3, category=None) -> List[Dict]:
+        """Recherche selon le mode du moteur (KNN seul ou hybride)"""
+        query_vector = await self.get_query_embedding(query)
+        if query_vector is None:
+            raise ValueError("Impossible de générer l'embedding de la requête")
+        return await self._search(query_vector, top_k, category, query_text=query)
+
+    async def fetch_contents(self, results: List[Dict]) -> List[Dict]:
+        """Charge en un seul pipeline ``HMGET`` le contenu des passages qui ne l'ont pas"""
+        with self.metrics.timer('fetch_contents'):
+            return await self.store.afetch_contents(results)
+
+    async def complete(self, prompt: str, temperature: float = 0.7,
+                       max_tokens: Optional[int] = None) -> str:
+        """Génère une réponse complète de LM Studio (sans streaming)"""
+        with self.metrics.timer('llm_generation'):
+            response = await self.http.post(
+                f"{self.llm_url}/chat/completions",
+                json={
+                    "messages": [
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": temperature,
+                    "max_tokens": max_tokens or self.max_answer_tokens
+                }
+            )
+        if response.status_code != 200:
+            raise RuntimeError(f"Erreur lors de l'appel à LM Studio: {response.status_code}")
+        return response.json()['choices'][0]['message']['content']
+
+    async def stream_completion(self, prompt: str, temperature: float = 0.7,
+                                max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """Génère une réponse de LM Studio token par token (server-sent events)"""
+        start = time.perf_counter()
+        first_token = None
+        async with self.http.stream(
+            "POST",
+            f"{self.llm_url}/chat/completions",
+            json={
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": temperature,
+                "max_tokens": max_tokens or self.max_answer_tokens,
+                "stream": True
+            }
+        ) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"Erreur lors de l'appel à LM Studio: {response.status_code}")
+
+            try:
+                async for line in response.aiter_lines():
+                    line = line.strip()
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+
+                    choices = json.loads(data).get('choices') or [{}]
+                    token = (choices[0].get('delta') or {}).get('content')
+                    if token:
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                            self.metrics.observe('llm_first_token', first_token)
+                        yield token
+            finally:
+                self.metrics.observe('llm_generation', time.perf_counter() - start)
+
+    async def _lookup_cached_answer(self, query_vector, filters: Dict) -> Optional[Dict]:
+        if self.answer_cache is None:
+            return None
+        return await asyncio.to_thread(self.answer_cache.lookup, query_vector, filters)
+
+    async def _cache_answer(self, question: str, query_vector, answer: str,
+                            sources: List[Dict], filters: Dict) -> None:
+        if self.answer_cache is not None:
+            await asyncio.to_thread(self.answer_cache.store, question, query_vector,
+                                    answer, sources, filters)
+
+    async def answer(self, question: str, top_k: int = 8, category=None,
+                     stream: bool = False, temperature: float = 0.7) -> Dict:
+        """Répond à une question à partir de la documentation indexée
+
+        Une fois l'embedding de la question obtenu, le cache de réponses et la
+        recherche KNN sont interrogés en parallèle.
+
+        Returns:
+            ``{'answer', 'sources', 'cached'}`` ; avec ``stream=True``,
+            ``answer`` est un itérateur asynchrone de fragments
+        """
+        self.metrics.incr('questions')
+        query_vector = await self.get_query_embedding(question)
+        if query_vector is None:
+            raise ValueError("Impossible de générer l'embedding de la requête")
+
+        filters = {'category': category, 'top_k': top_k}
+        cached, results = await asyncio.gather(
+            self._lookup_cached_answer(query_vector, filters),
+            self._search(query_vector, top_k, category, query_text=question)
+        )
+
+        if cached:
+            self.metrics.incr('answer_cache_hits')
+            answer = cached['answer']
+            return {
+                'answer': self._single(answer) if stream else answer,
+                'sources': cached['sources'],
+                'cached': True
+            }
+
+        if not results:
+            return {'answer': None, 'sources': [], 'cached': False}
+
+        with self.metrics.timer('context_assembly'):
+            selected = select_context(question, results, self.context_window, self.max_answer_tokens)
+            sources = await self.fetch_contents([r for r, _ in selected])
+            context = format_context(selected)
+        prompt = PROMPT_TEMPLATE.format(context=context, question=question)
+
+        if stream:
+            answer = self._stream_and_cache(question, query_vector, prompt, sources,
+                                            temperature, filters)
+        else:
+            answer = await self.complete(prompt, temperature=temperature)
+            await self._cache_answer(question, query_vector, answer, sources, filters)
+
+        return {'answer': answer, 'sources': sources, 'cached': False}
+
+    async def answer_many(self, questions: List[str], **kwargs) -> List[Dict]:
+        """Répond à plusieurs questions simultanément (réponses complètes)"""
+        return await asyncio.gather(*[
+            self.answer(question, stream=False, **kwargs) for question in questions
+        ])
+
+    @staticmethod
+    async def _single(text: str) -> AsyncIterator[str]:
+        yield text
+
+    async def _stream_and_cache(self, question: str, query_vector, prompt: str,
+                                sources: List[Dict], temperature: float,
+                                filters: Dict) -> AsyncIterator[str]:
+        """Relaie le flux de génération puis met la réponse complète en cache"""
+        tokens = []
+        async for token in self.stream_completion(prompt, temperature=temperature):
+            tokens.append(token)
+            yield token
+        await self._cache_answer(question, query_vector, "".join(tokens), sources, filters)
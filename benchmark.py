@@ -0,0 +1,320 @@
+import argparse
+import json
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from redis import Redis, ResponseError
+from redis.commands.search.indexDefinition import IndexDefinition
+from redis.commands.search.query import Query
+
+from index_profiles import INDEX_PROFILES, VECTOR_TYPES, vector_dtype, vector_field
+from vector_store import LocalStoreWriter, LocalVectorStore, normalize_rows
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int = 50, seed: int = 0) -> np.ndarray:
+    """Génère un corpus de vecteurs regroupés en amas, comme de vrais embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centers[labels] + 0.5 * rng.normal(size=(n, dim))
+    return normalize_rows(vectors)
+
+
+def sample_corpus(client: Redis, alias: str, n: int) -> np.ndarray:
+    """Échantillonne jusqu'à ``n`` vecteurs d'un index existant (via SCAN)"""
+    info = client.ft(alias).info()
+    index = info.get('index_name', alias)
+    index = index.decode('utf-8') if isinstance(index, bytes) else index
+    vector_type = (client.hget(f"index_meta:{index}", 'vector_type') or b'FLOAT32').decode('utf-8')
+
+    vectors = []
+    for key in client.scan_iter(match=f"{index}:*", count=1000):
+        raw = client.hget(key, 'embedding')
+        if raw:
+            vectors.append(np.frombuffer(raw, dtype=vector_dtype(vector_type)).astype(np.float32))
+        if len(vectors) >= n:
+            break
+    if not vectors:
+        raise ValueError(f"Aucun vecteur trouvé dans l'index {alias}")
+    return normalize_rows(np.stack(vectors))
+
+
+def make_queries(corpus: np.ndarray, count: int, noise: float = 0.1, seed: int = 1) -> np.ndarray:
+    """Construit des requêtes proches de points du corpus"""
+    rng = np.random.default_rng(seed)
+    picks = corpus[rng.integers(0, len(corpus), size=count)]
+    return normalize_rows(picks + noise * rng.normal(size=picks.shape) / np.sqrt(corpus.shape[1]))
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Vérité terrain : top-k exact par force brute (similarité cosinus)"""
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, kth=min(k, corpus.shape[0] - 1), axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def wait_for_indexing(client: Redis, index: str, timeout: float = 3600) -> None:
+    """Attend la fin de l'indexation en arrière-plan"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = client.ft(index).info()
+        if int(info.get('indexing', 0)) == 0 and float(info.get('percent_indexed', 1)) >= 1:
+            return
+        time.sleep(0.05)
+    raise TimeoutError(f"Indexation de {index} non terminée après {timeout}s")
+
+
+def result_row(profile: str, vector_type: str, ef_runtime, rescore: int,
+               corpus: np.ndarray, build_time: float, memory_mb: float,
+               latencies: List[float], hits: int, queries: int, k: int,
+               disk_mb: Optional[float] = None) -> Dict:
+    """Ligne de résultats commune aux index Redis et au stockage local
+
+    ``memory_mb`` est la mémoire parcourue par les recherches ; ``disk_mb``
+    la taille totale du stockage local sur disque (None pour Redis).
+    """
+    latencies = np.array(latencies)
+    return {
+        'profile': profile,
+        'vector_type': vector_type,
+        'ef_runtime': ef_runtime,
+        'rescore': rescore,
+        'vectors': len(corpus),
+        'dim': corpus.shape[1],
+        'build_time_s': round(build_time, 3),
+        'memory_mb': round(memory_mb, 3),
+        'disk_mb': round(disk_mb, 2) if disk_mb is not None else None,
+        'qps': round(len(latencies) / latencies.sum(), 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+        f'recall@{k}': round(hits / (queries * k), 4)
+    }
+
+
+def bench_profile(client: Redis, profile: str, vector_type: str,
+                  corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray,
+                  k: int, ef_values: List[Optional[int]], rescore_values: List[int] = (0,),
+                  batch_size: int = 1000) -> List[Dict]:
+    """Mesure construction, mémoire, latence, débit et rappel d'un profil
+
+    Avec un reclassement, ``rescore`` candidats sont recherchés puis
+    reclassés par cosinus exact sur les vecteurs stockés (comme
+    ``--rerank cosine``).
+
+    Returns:
+        Une ligne de résultats par valeur d'EF_RUNTIME et de reclassement testée
+    """
+    index = f"bench_{profile}_{vector_type.lower()}"
+    try:
+        client.ft(index).dropindex(delete_documents=True)
+    except ResponseError:
+        pass
+
+    client.ft(index).create_index(
+        (vector_field(profile, corpus.shape[1], vector_type=vector_type,
+                      initial_cap=len(corpus)),),
+        definition=IndexDefinition(prefix=[f"{index}:"])
+    )
+
+    # Construction : écriture pipelinée puis attente de l'indexation
+    dtype = vector_dtype(vector_type)
+    start = time.perf_counter()
+    pipe = client.pipeline(transaction=False)
+    for i, vector in enumerate(corpus):
+        pipe.hset(f"{index}:{i}", mapping={'embedding': vector.astype(dtype).tobytes()})
+        if len(pipe) >= batch_size:
+            pipe.execute()
+    pipe.execute()
+    wait_for_indexing(client, index)
+    build_time = time.perf_counter() - start
+
+    info = client.ft(index).info()
+    memory_mb = float(info.get('vector_index_sz_mb', 0) or 0)
+
+    # Vecteurs tels que stockés (précision du type), pour le reclassement
+    stored = corpus.astype(dtype).astype(np.float32)
+    is_hnsw = INDEX_PROFILES[profile]['algorithm'] == 'HNSW'
+    rows = []
+    for ef in (ef_values if is_hnsw else [None]):
+        ef_clause = f" EF_RUNTIME {ef}" if ef else ""
+        for rescore in rescore_values:
+            candidates = max(k, rescore)
+            query = Query(f"*=>[KNN {candidates} @embedding $query_vector{ef_clause} AS score]")\
+                .return_fields("score")\
+                .sort_by("score")\
+                .paging(0, candidates)\
+                .dialect(2)
+
+            latencies = []
+            hits = 0
+            for q, expected in zip(queries, truth):
+                t0 = time.perf_counter()
+                results = client.ft(index).search(query, {"query_vector": q.astype(dtype).tobytes()})
+                found = [int(doc.id.rsplit(':', 1)[1]) for doc in results.docs]
+                if rescore and found:
+                    ids = np.array(found)
+                    found = ids[np.argsort(-(stored[ids] @ q), kind='stable')].tolist()
+                latencies.append(time.perf_counter() - t0)
+                hits += len(set(found[:k]) & set(expected.tolist()))
+
+            rows.append(result_row(profile, vector_type,
+                                   ef if ef else INDEX_PROFILES[profile].get('EF_RUNTIME'),
+                                   rescore, corpus, build_time, memory_mb,
+                                   latencies, hits, len(queries), k))
+
+    client.ft(index).dropindex(delete_documents=True)
+    return rows
+
+
+def bench_local(corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int,
+                quantization: Optional[str] = None, rescore_values: List[int] = (0,),
+                batch_size: int = 10000) -> List[Dict]:
+    """Mesure le stockage local (NumPy, memory-map), en float32 ou quantifié
+
+    La mémoire indiquée est celle de la matrice parcourue à chaque recherche
+    (int8 et échelles pour un stockage quantifié) ; le reclassement ne lit
+    que les lignes float32 des candidats. La taille sur disque compte tous
+    les fichiers : un stockage quantifié garde aussi sa matrice float32.
+
+    Returns:
+        Une ligne de résultats par valeur de reclassement testée (une seule
+        en float32, exact)
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        writer = LocalStoreWriter(f"{directory}/store", corpus.shape[1], 'bench', quantization=quantization)
+        for first in range(0, len(corpus), batch_size):
+            block = corpus[first:first + batch_size]
+            writer.add_document(
+                {'full_path': f"bench/{first}", 'title': str(first), 'source': '',
+                 'category': 'bench', 'doc_id': str(first)},
+                [{'content': '', 'start': 0, 'end': 0, 'heading': ''}] * len(block),
+                block
+            )
+        writer.commit()
+        build_time = time.perf_counter() - start
+
+        store = LocalVectorStore(f"{directory}/store")
+        disk_mb = sum(f.stat().st_size for f in store.path.iterdir()) / (1024 * 1024)
+        rows = []
+        for rescore in (rescore_values if quantization else [0]):
+            store.rescore_candidates = rescore
+            latencies = []
+            hits = 0
+            for q, expected in zip(queries, truth):
+                t0 = time.perf_counter()
+                found = [r['row'] for r in store.search(q, k)]
+                latencies.append(time.perf_counter() - t0)
+                hits += len(set(found) & set(expected.tolist()))
+            rows.append(result_row('local', (quantization or 'float32').upper(), None, rescore,
+                                   corpus, build_time, store.search_nbytes / (1024 * 1024),
+                                   latencies, hits, len(queries), k, disk_mb))
+        store.close()
+    return rows
+
+
+def add_quantization_costs(rows: List[Dict], k: int) -> None:
+    """Ajoute la mémoire et le disque économisés et le rappel perdu par rapport à FLOAT32
+
+    Chaque ligne est comparée à la ligne FLOAT32 de même profil, même
+    EF_RUNTIME et même reclassement (sinon sans reclassement). Un
+    ``disk_saved`` négatif signale un stockage plus gros sur disque.
+    """
+    recall = f'recall@{k}'
+    baselines = {(r['profile'], r['ef_runtime'], r['rescore']): r
+                 for r in rows if r['vector_type'] == 'FLOAT32'}
+    for r in rows:
+        base = baselines.get((r['profile'], r['ef_runtime'], r['rescore'])) \
+            or baselines.get((r['profile'], r['ef_runtime'], 0))
+        if base is None:
+            r['memory_saved'] = r['disk_saved'] = r['recall_lost'] = None
+            continue
+        # Le rappel reste comparable même si la mémoire de l'index n'est pas rapportée
+        r['memory_saved'] = f"{1 - r['memory_mb'] / base['memory_mb']:.0%}" if base['memory_mb'] else None
+        r['disk_saved'] = f"{1 - r['disk_mb'] / base['disk_mb']:.0%}" if base['disk_mb'] else None
+        r['recall_lost'] = round(base[recall] - r[recall], 4)
+
+
+def print_table(rows: List[Dict]) -> None:
+    """Affiche les résultats sous forme de tableau"""
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Banc d'essai des profils d'index vectoriel (rappel / latence / mémoire)"
+    )
+    parser.add_argument("--redis-host", type=str, default="localhost")
+    parser.add_argument("--redis-port", type=int, default=6379)
+    parser.add_argument("--vectors", type=int, default=10000,
+                       help="Taille du corpus")
+    parser.add_argument("--dim", type=int, default=768,
+                       help="Dimension des vecteurs synthétiques")
+    parser.add_argument("--sample-index", type=str, default=None,
+                       help="Échantillonne le corpus dans cet index au lieu de le générer")
+    parser.add_argument("--queries", type=int, default=200,
+                       help="Nombre de requêtes mesurées")
+    parser.add_argument("-k", type=int, default=10,
+                       help="Nombre de voisins recherchés (recall@k)")
+    parser.add_argument("--profiles", type=str, default=",".join(INDEX_PROFILES),
+                       help="Profils testés, séparés par des virgules")
+    parser.add_argument("--vector-types", type=str, default="FLOAT32,FLOAT16",
+                       help="Types de vecteurs testés, séparés par des virgules")
+    parser.add_argument("--ef-runtime", type=str, default="10,64,200",
+                       help="Valeurs d'EF_RUNTIME testées pour les profils HNSW")
+    parser.add_argument("--rescore", type=str, default="0",
+                       help="Nombres de candidats reclassés en cosinus exact, séparés par des virgules (0 : aucun)")
+    parser.add_argument("--local", action="store_true",
+                       help="Mesure aussi le stockage local, en float32 (exact) et quantifié int8")
+    parser.add_argument("--json", type=str, default=None,
+                       help="Écrit aussi les résultats dans ce fichier JSON")
+
+    args = parser.parse_args()
+
+    client = Redis(host=args.redis_host, port=args.redis_port)
+    if args.sample_index:
+        corpus = sample_corpus(client, args.sample_index, args.vectors)
+        print(f"📥 {len(corpus)} vecteurs échantillonnés dans {args.sample_index}")
+    else:
+        corpus = synthetic_corpus(args.vectors, args.dim)
+        print(f"🧪 Corpus synthétique: {len(corpus)} vecteurs de dimension {args.dim}")
+
+    queries = make_queries(corpus, args.queries)
+    truth = exact_top_k(corpus, queries, args.k)
+    ef_values = [int(ef) for ef in args.ef_runtime.split(",") if ef]
+    rescore_values = [int(r) for r in args.rescore.split(",") if r]
+
+    rows = []
+    for profile in filter(None, args.profiles.split(",")):
+        for vector_type in args.vector_types.split(","):
+            if vector_type not in VECTOR_TYPES:
+                raise ValueError(f"Type de vecteur inconnu: {vector_type}")
+            print(f"⏱️ Profil {profile} ({vector_type})...")
+            rows.extend(bench_profile(client, profile, vector_type,
+                                      corpus, queries, truth, args.k, ef_values, rescore_values))
+
+    if args.local:
+        for quantization in (None, 'int8'):
+            print(f"⏱️ Stockage local ({quantization or 'float32'})...")
+            rows.extend(bench_local(corpus, queries, truth, args.k, quantization,
+                                    sorted(set(rescore_values) | {0, 100})))
+    add_quantization_costs(rows, args.k)
+
+    print()
+    print_table(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import re
+from typing import List, Dict, Tuple
+
+# Titres Markdown (# Titre) en dehors des blocs de code
+MARKDOWN_HEADING = re.compile(r'^#{1,6}\s+\S')
+MARKDOWN_FENCE = re.compile(r'^(```|~~~)')
+
+# Caractères autorisés pour le soulignement des titres RST
+RST_UNDERLINE = re.compile(r'^([=\-~^"\'`*+#:.])\1{2,}\s*$')
+
+MARKDOWN_EXTENSIONS = {'.md'}
+RST_EXTENSIONS = {'.rst'}
+
+
+def _line_offsets(text: str) -> List[Tuple[int, str]]:
+    """Retourne les lignes du texte avec leur position de début"""
+    lines = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        lines.append((offset, line))
+        offset += len(line)
+    return lines
+
+
+def _markdown_sections(text: str) -> List[Tuple[int, str]]:
+    """Repère les débuts de section Markdown (position, titre)"""
+    sections = []
+    in_fence = False
+    for offset, line in _line_offsets(text):
+        stripped = line.strip()
+        if MARKDOWN_FENCE.match(stripped):
+            in_fence = not in_fence
+            continue
+        if not in_fence and MARKDOWN_HEADING.match(stripped):
+            sections.append((offset, stripped.lstrip('#').strip()))
+    return sections
+
+
+def _rst_sections(text: str) -> List[Tuple[int, str]]:
+    """Repère les débuts de section RST (titre souligné, avec ou sans surlignement)"""
+    sections = []
+    lines = _line_offsets(text)
+    for i in range(1, len(lines)):
+        title = lines[i - 1][1].rstrip()
+        underline = lines[i][1].rstrip()
+        if not title.strip() or RST_UNDERLINE.match(title):
+            continue
+        if RST_UNDERLINE.match(underline) and len(underline) >= len(title.strip()):
+            start = lines[i - 1][0]
+            # Surlignement éventuel au-dessus du titre
+            if i >= 2 and lines[i - 2][1].rstrip() == underline:
+                start = lines[i - 2][0]
+            sections.append((start, title.strip()))
+    return sections
+
+
+def split_sections(text: str, extension: str = '') -> List[Dict]:
+    """Découpe un texte en sections selon ses titres Markdown ou RST
+
+    Args:
+        text: Contenu du document
+        extension: Extension du fichier (``.md``, ``.rst``...)
+
+    Returns:
+        Liste de sections ``{'start', 'end', 'heading'}``
+    """
+    extension = extension.lower()
+    if extension in MARKDOWN_EXTENSIONS:
+        headings = _markdown_sections(text)
+    elif extension in RST_EXTENSIONS:
+        headings = _rst_sections(text)
+    else:
+        headings = []
+
+    if not headings or headings[0][0] > 0:
+        headings.insert(0, (0, ''))
+
+    sections = []
+    for i, (start, heading) in enumerate(headings):
+        end = headings[i + 1][0] if i + 1 < len(headings) else len(text)
+        if end > start:
+            sections.append({'start': start, 'end': end, 'heading': heading})
+    return sections
+
+
+def _find_break(text: str, start: int, end: int) -> int:
+    """Cherche une coupure naturelle (paragraphe, ligne, phrase, mot) avant ``end``"""
+    # On ne recule pas au-delà de la moitié de la fenêtre
+    floor = start + (end - start) // 2
+    for separator in ('\n\n', '\n', '. ', ' '):
+        position = text.rfind(separator, floor, end)
+        if position != -1:
+            return position + len(separator)
+    return end
+
+
+def chunk_text(text: str,
+               chunk_size: int = 1000,
+               chunk_overlap: int = 200,
+               extension: str = '') -> List[Dict]:
+    """Découpe un texte en passages de taille bornée avec recouvrement
+
+    Les titres Markdown/RST délimitent des sections ; les petites sections
+    consécutives sont regroupées et les grandes sont découpées en fenêtres
+    glissantes, coupées de préférence sur une limite naturelle.
+
+    Args:
+        text: Contenu du document
+        chunk_size: Taille maximale d'un passage (en caractères)
+        chunk_overlap: Recouvrement entre deux passages d'une même section
+        extension: Extension du fichier, pour le découpage par titres
+
+    Returns:
+        Liste de passages ``{'content', 'start', 'end', 'heading'}`` dont
+        les positions se réfèrent au texte d'origine
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size doit être strictement positif")
+    if not 0 <= chunk_overlap < chunk_size:
+        raise ValueError("chunk_overlap doit être compris entre 0 et chunk_size")
+
+    # Regroupement des petites sections consécutives
+    spans = []
+    for section in split_sections(text, extension):
+        if spans and section['end'] - spans[-1]['start'] <= chunk_size:
+            spans[-1]['end'] = section['end']
+        else:
+            spans.append(dict(section))
+
+    chunks = []
+    for span in spans:
+        start = span['start']
+        while start < span['end']:
+            end = min(start + chunk_size, span['end'])
+            if end < span['end']:
+                end = _find_break(text, start, end)
+
+            content = text[start:end]
+            stripped = content.strip()
+            if stripped:
+                leading = len(content) - len(content.lstrip())
+                chunks.append({
+                    'content': stripped,
+                    'start': start + leading,
+                    'end': start + leading + len(stripped),
+                    'heading': span['heading']
+                })
+
+            if end >= span['end']:
+                break
+            # Recul pour le recouvrement, sans jamais stagner
+            start = max(end - chunk_overlap, start + 1)
+
+    return chunks
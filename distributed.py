@@ -0,0 +1,182 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from redis import ResponseError
+
+logger = logging.getLogger(__name__)
+
+# Groupe de consommateurs partagé par tous les workers d'un alias
+WORKER_GROUP = "ingest-workers"
+
+# Compteurs d'un job tenus à jour par les workers
+JOB_COUNTERS = ('acked', 'failed', 'processed', 'skipped', 'unchanged')
+
+
+def _str(value):
+    return value.decode('utf-8', 'replace') if isinstance(value, bytes) else value
+
+
+def stream_key(alias: str) -> str:
+    """Flux Redis des tâches d'ingestion d'un alias"""
+    return f"ingest:{alias}"
+
+
+def job_key(alias: str, job_id: str) -> str:
+    """Hash décrivant un job d'ingestion (index cible, paramètres, compteurs)"""
+    return f"ingest:{alias}:job:{job_id}"
+
+
+def new_job_id() -> str:
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def default_worker_name() -> str:
+    """Nom de consommateur unique par machine et processus"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def ensure_group(redis_client, stream: str, group: str = WORKER_GROUP) -> None:
+    """Crée le flux et son groupe de consommateurs s'ils n'existent pas"""
+    try:
+        redis_client.xgroup_create(stream, group, id='0', mkstream=True)
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def create_job(redis_client, alias: str, settings: Dict, ttl: int) -> str:
+    """Enregistre un job d'ingestion et ses paramètres
+
+    Args:
+        settings: Paramètres lus par les workers (index, manifeste,
+            découpage, modèle d'embedding...)
+        ttl: Durée de vie (s) du job ; un job expiré est ignoré des workers
+
+    Returns:
+        Identifiant du job
+    """
+    job_id = new_job_id()
+    key = job_key(alias, job_id)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hset(key, mapping={**settings, **{counter: 0 for counter in JOB_COUNTERS}})
+    pipe.expire(key, ttl)
+    pipe.execute()
+    return job_id
+
+
+def load_job(redis_client, alias: str, job_id: str) -> Optional[Dict]:
+    """Paramètres et compteurs d'un job (None s'il a expiré ou été annulé)"""
+    raw = redis_client.hgetall(job_key(alias, job_id))
+    if not raw:
+        return None
+    return {_str(key): _str(value) for key, value in raw.items()}
+
+
+def publish_tasks(redis_client, stream: str, job_id: str, paths: List[str],
+                  batch_size: int = 500) -> int:
+    """Ajoute une tâche par fichier dans le flux (XADD pipelinés)
+
+    Returns:
+        Nombre de tâches publiées
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    for path in paths:
+        pipe.xadd(stream, {'job': job_id, 'path': path})
+        if len(pipe) >= batch_size:
+            pipe.execute()
+    pipe.execute()
+    return len(paths)
+
+
+def read_tasks(redis_client, stream: str, consumer: str, count: int,
+               block_ms: int, min_idle_ms: int,
+               group: str = WORKER_GROUP) -> List[Tuple[str, Dict]]:
+    """Lit un lot de tâches pour ce worker
+
+    Les tâches restées non acquittées plus de ``min_idle_ms`` (worker
+    arrêté ou en échec) sont reprises en priorité par XAUTOCLAIM ; sinon de
+    nouvelles tâches sont lues par XREADGROUP, en attendant au plus
+    ``block_ms``.
+
+    Returns:
+        Liste de tuples (identifiant du message, champs décodés)
+    """
+    claimed = redis_client.xautoclaim(stream, group, consumer, min_idle_ms,
+                                      start_id='0-0', count=count)
+    messages = [m for m in claimed[1] if m and m[1]]
+    if not messages:
+        response = redis_client.xreadgroup(group, consumer, {stream: '>'},
+                                           count=count, block=block_ms)
+        messages = [m for _, entries in (response or []) for m in entries if m and m[1]]
+    return [(_str(message_id), {_str(k): _str(v) for k, v in fields.items()})
+            for message_id, fields in messages]
+
+
+def delivery_counts(redis_client, stream: str, message_ids: List[str],
+                    group: str = WORKER_GROUP) -> Dict[str, int]:
+    """Nombre de livraisons de messages en attente (XPENDING)"""
+    pipe = redis_client.pipeline(transaction=False)
+    for message_id in message_ids:
+        pipe.xpending_range(stream, group, min=message_id, max=message_id, count=1)
+    counts = {}
+    for message_id, pending in zip(message_ids, pipe.execute()):
+        counts[message_id] = pending[0]['times_delivered'] if pending else 0
+    return counts
+
+
+def acknowledge(redis_client, stream: str, message_ids: List[str],
+                group: str = WORKER_GROUP) -> List[str]:
+    """Acquitte et retire des tâches terminées du flux
+
+    Chaque message est acquitté par son propre XACK : une tâche reprise par
+    un autre worker pendant son traitement n'est acquittée qu'une fois, par
+    le premier qui la termine.
+
+    Returns:
+        Messages acquittés par cet appel (les autres l'étaient déjà)
+    """
+    if not message_ids:
+        return []
+    pipe = redis_client.pipeline(transaction=False)
+    for message_id in message_ids:
+        pipe.xack(stream, group, message_id)
+    pipe.xdel(stream, *message_ids)
+    replies = pipe.execute()
+    return [message_id for message_id, acked in zip(message_ids, replies) if acked]
+
+
+class ClaimRenewer(threading.Thread):
+    """Maintient la réclamation d'un lot de tâches pendant son traitement
+
+    XAUTOCLAIM reprend les tâches inactives depuis ``min_idle_ms`` : un lot
+    plus long que ce délai serait traité une seconde fois par un autre
+    worker. Toutes les ``interval`` secondes, XCLAIM ... JUSTID remet à zéro
+    l'inactivité des tâches sans compter de nouvelle livraison.
+    """
+
+    def __init__(self, redis_client, stream: str, consumer: str, message_ids: List[str],
+                 interval: float, group: str = WORKER_GROUP):
+        super().__init__(daemon=True)
+        self.redis_client = redis_client
+        self.stream = stream
+        self.consumer = consumer
+        self.message_ids = message_ids
+        self.interval = interval
+        self.group = group
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.redis_client.xclaim(self.stream, self.group, self.consumer, 0,
+                                         self.message_ids, justid=True)
+            except Exception as e:
+                logger.warning(f"⚠️ Impossible de prolonger la réclamation des tâches: {e}")
+
+    def stop(self) -> None:
+        self._stopped.set()
@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SENTENCE_TRANSFORMER = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+
+
+def describe_model(model_id: str, served_model: Optional[str] = None) -> str:
+    """Nom lisible d'un modèle : identifiant demandé et modèle servi s'ils diffèrent"""
+    if served_model and served_model != model_id:
+        return f"{model_id} ({served_model})"
+    return model_id
+
+
+class EmbeddingBackend(ABC):
+    """Interface des moteurs d'embedding utilisés par ``LocalRAG``
+
+    Une implémentation encode une liste de textes et retourne une liste
+    alignée d'embeddings (None pour un texte en échec). ``model_id``
+    identifie le modèle demandé ; ``served_model`` est le modèle qui a
+    réellement encodé les textes, connu après le premier encodage (LM Studio
+    répond avec le modèle chargé, quel que soit l'identifiant demandé).
+    """
+
+    model_id = 'local'
+    served_model: Optional[str] = None
+
+    def matches(self, model_id: str, served_model: Optional[str] = None) -> bool:
+        """Vérifie qu'un index construit avec ce modèle est compatible
+
+        Le modèle servi est comparé quand il est connu des deux côtés ; les
+        index qui ne l'ont pas enregistré sont comparés sur le modèle demandé.
+        """
+        if served_model and self.served_model:
+            return served_model == self.served_model
+        return model_id == self.model_id
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[Optional[list]]:
+        """Encode des textes ; les textes en échec ont un embedding None"""
+
+
+class LMStudioBackend(EmbeddingBackend):
+    """Embeddings via l'API ``/embeddings`` de LM Studio (compatible OpenAI)
+
+    Les textes sont regroupés en lots envoyés en une seule requête
+    (``input: [...]``), avec plusieurs lots en parallèle et retry/backoff.
+    ``embed`` utilise la session ``requests`` ; ``aembed`` envoie les mêmes
+    lots avec un client ``httpx.AsyncClient`` (la session peut alors être
+    None).
+    """
+
+    def __init__(self, session: Optional[requests.Session], llm_url: str,
+                 model_id: str = 'local',
+                 batch_size: int = 32,
+                 concurrency: int = 4,
+                 max_retries: int = 3,
+                 timeout: float = 30):
+        self.session = session
+        self.llm_url = llm_url
+        self.model_id = model_id
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        size = max(self.batch_size, 1)
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+    @staticmethod
+    def _merge(batches: List[List[str]], results: List[Optional[List[list]]]) -> List[Optional[list]]:
+        """Aplatit les résultats des lots (None pour chaque texte d'un lot en échec)"""
+        embeddings = []
+        for batch, result in zip(batches, results):
+            embeddings.extend(result if result is not None else [None] * len(batch))
+        return embeddings
+
+    def embed(self, texts: List[str]) -> List[Optional[list]]:
+        batches = self._batches(texts)
+        logger.debug(f"📡 Appel à l'API d'embedding ({len(texts)} textes, {len(batches)} lots)...")
+
+        if len(batches) == 1 or self.concurrency <= 1:
+            results = [self._post_batch(batch) for batch in batches]
+        else:
+            workers = min(self.concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self._post_batch, batches))
+        return self._merge(batches, results)
+
+    async def aembed(self, client, texts: List[str],
+                     slots: Optional[asyncio.Semaphore] = None) -> List[Optional[list]]:
+        """Variante asynchrone de ``embed``
+
+        Args:
+            client: ``httpx.AsyncClient`` partagé
+            texts: Textes à encoder
+            slots: Sémaphore bornant les lots en vol (partagé entre appels)
+        """
+        slots = slots or asyncio.Semaphore(max(self.concurrency, 1))
+
+        async def post(batch):
+            async with slots:
+                return await self._apost_batch(client, batch)
+
+        batches = self._batches(texts)
+        return self._merge(batches, await asyncio.gather(*[post(batch) for batch in batches]))
+
+    def _handle_response(self, response, batch: List[str]) -> Tuple[Optional[List[list]], bool]:
+        """Interprète une réponse de l'API d'embedding (``requests`` ou ``httpx``)
+
+        Returns:
+            Tuple (embeddings ou None, True si une nouvelle tentative est utile)
+        """
+        if response.status_code == 200:
+            payload = response.json()
+            data = sorted(payload['data'], key=lambda item: item.get('index', 0))
+            if len(data) != len(batch):
+                raise ValueError(f"{len(data)} embeddings reçus pour {len(batch)} textes")
+            self.served_model = payload.get('model') or self.served_model
+            return [item['embedding'] for item in data], False
+
+        logger.warning(f"❌ Erreur HTTP: {response.status_code} ({response.text})")
+        # Les erreurs client (hors 429) ne sont pas réessayées
+        return None, not (400 <= response.status_code < 500 and response.status_code != 429)
+
+    def _abandon(self, batch: List[str]) -> None:
+        logger.error(f"❌ Lot de {len(batch)} textes abandonné après {self.max_retries + 1} tentatives")
+
+    def _post_batch(self, batch: List[str]) -> Optional[List[list]]:
+        """Envoie un lot de textes à l'API d'embedding avec retry/backoff"""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Backoff exponentiel entre les tentatives
+                time.sleep(0.5 * 2 ** (attempt - 1))
+            try:
+                response = self.session.post(
+                    f"{self.llm_url}/embeddings",
+                    json={"input": batch, "model": self.model_id},
+                    timeout=self.timeout
+                )
+                embeddings, retry = self._handle_response(response, batch)
+                if not retry:
+                    return embeddings
+            except requests.Timeout:
+                logger.warning("❌ Timeout lors de l'appel à l'API d'embedding")
+            except Exception as e:
+                logger.warning(f"❌ Erreur lors de l'appel à l'API d'embedding: {e}")
+
+        self._abandon(batch)
+        return None
+
+    async def _apost_batch(self, client, batch: List[str]) -> Optional[List[list]]:
+        """Variante asynchrone de ``_post_batch``"""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+            try:
+                response = await client.post(
+                    f"{self.llm_url}/embeddings",
+                    json={"input": batch, "model": self.model_id},
+                    timeout=self.timeout
+                )
+                embeddings, retry = self._handle_response(response, batch)
+                if not retry:
+                    return embeddings
+            except Exception as e:
+                logger.warning(f"❌ Erreur lors de l'appel à l'API d'embedding: {e}")
+
+        self._abandon(batch)
+        return None
+
+
+# Modèles sentence-transformers chargés, partagés par toutes les instances
+_loaded_models: Dict[tuple, object] = {}
+_models_lock = threading.Lock()
+
+
+def load_sentence_transformers_model(model_class: str, model_name: str,
+                                     device: str = 'cpu', threads: Optional[int] = None):
+    """Charge un modèle sentence-transformers, une seule fois par processus
+
+    torch et sentence_transformers ne sont importés qu'au premier appel.
+
+    Args:
+        model_class: ``'SentenceTransformer'`` ou ``'CrossEncoder'``
+        model_name: Nom ou chemin du modèle
+        device: Périphérique de calcul
+        threads: Nombre de threads CPU de torch (inchangé si None)
+    """
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    with _models_lock:
+        model = _loaded_models.get((model_class, model_name, device))
+        if model is None:
+            import sentence_transformers
+            logger.info(f"📦 Chargement du modèle {model_class} {model_name}...")
+            model = getattr(sentence_transformers, model_class)(model_name, device=device)
+            _loaded_models[(model_class, model_name, device)] = model
+        return model
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Embeddings calculés localement sur CPU avec SentenceTransformer
+
+    Le modèle est chargé une seule fois par processus, au premier encodage.
+    Évite l'aller-retour HTTP et permet d'indexer sur des machines sans LM
+    Studio.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_SENTENCE_TRANSFORMER,
+                 batch_size: int = 32,
+                 threads: Optional[int] = None,
+                 device: str = 'cpu'):
+        self.model_id = model_name
+        self.served_model = model_name
+        self.batch_size = batch_size
+        self.device = device
+        self.threads = threads
+        self._model = None
+
+    @property
+    def model(self):
+        """Modèle SentenceTransformer, chargé (avec torch) à la première utilisation"""
+        if self._model is None:
+            self._model = load_sentence_transformers_model(
+                'SentenceTransformer', self.model_id, self.device, self.threads
+            )
+        return self._model
+
+    def embed(self, texts: List[str]) -> List[Optional[list]]:
+        # Encodage lot par lot : un lot en échec n'invalide que ses textes,
+        # comme avec LMStudioBackend
+        size = max(self.batch_size, 1)
+        embeddings = []
+        for i in range(0, len(texts), size):
+            batch = texts[i:i + size]
+            try:
+                vectors = self.model.encode(
+                    batch,
+                    batch_size=size,
+                    convert_to_numpy=True,
+                    show_progress_bar=False
+                )
+                embeddings.extend(vector.astype('float32') for vector in vectors)
+            except Exception as e:
+                logger.warning(f"❌ Erreur d'encodage SentenceTransformer ({len(batch)} textes): {e}")
+                embeddings.extend([None] * len(batch))
+        return embeddings
+
+
+EMBEDDING_BACKENDS = ('lmstudio', 'sentence-transformers')
+
+
+def create_embedding_backend(name: str, **options) -> EmbeddingBackend:
+    """Crée un moteur d'embedding à partir de son nom
+
+    Args:
+        name: ``'lmstudio'`` ou ``'sentence-transformers'``
+        options: Paramètres propres au moteur
+    """
+    if name == 'lmstudio':
+        return LMStudioBackend(**options)
+    if name == 'sentence-transformers':
+        return SentenceTransformerBackend(**options)
+    raise ValueError(f"Moteur d'embedding inconnu: {name} (disponibles: {', '.join(EMBEDDING_BACKENDS)})")
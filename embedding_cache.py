@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalise une requête : Unicode NFC, casse et espaces"""
+    return ' '.join(unicodedata.normalize('NFC', text).casefold().split())
+
+
+class EmbeddingCache:
+    """Cache à deux niveaux des embeddings de requêtes
+
+    Niveau 1 : LRU en mémoire, borné à ``max_size`` entrées.
+    Niveau 2 (optionnel) : Redis partagé, vecteurs float32 bruts avec TTL.
+
+    Les clés combinent l'identifiant du modèle et le texte normalisé.
+    """
+
+    def __init__(self, redis_client=None, model_id: str = 'local',
+                 max_size: int = 1024, ttl: Optional[int] = 86400):
+        self.redis_client = redis_client
+        self.model_id = model_id
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+        return f"embcache:{self.model_id}:{digest}"
+
+    @property
+    def _shared(self) -> bool:
+        """Vrai si le niveau Redis est actif"""
+        return self.redis_client is not None and bool(self.ttl)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _recall(self, key: str) -> Optional[np.ndarray]:
+        """Lecture du niveau mémoire"""
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return vector
+
+    def _resolve(self, key: str, raw: Optional[bytes]) -> Optional[np.ndarray]:
+        """Décode la valeur lue dans Redis et compte le succès ou l'échec"""
+        if raw is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        vector = np.frombuffer(raw, dtype=np.float32)
+        self._remember(key, vector)
+        with self._lock:
+            self.redis_hits += 1
+        return vector
+
+    def _prepare(self, text: str, embedding) -> Tuple[str, np.ndarray]:
+        """Clé et vecteur float32 d'un embedding à enregistrer (niveau mémoire inclus)"""
+        key = self._key(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._remember(key, vector)
+        return key, vector
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Retourne l'embedding en cache d'un texte, ou None"""
+        key = self._key(text)
+        vector = self._recall(key)
+        if vector is not None:
+            return vector
+        raw = None
+        if self._shared:
+            try:
+                raw = self.redis_client.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache Redis des embeddings indisponible: {e}")
+        return self._resolve(key, raw)
+
+    def put(self, text: str, embedding) -> None:
+        """Enregistre l'embedding d'un texte dans les deux niveaux"""
+        key, vector = self._prepare(text, embedding)
+        if self._shared:
+            try:
+                self.redis_client.set(key, vector.tobytes(), ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache Redis des embeddings indisponible: {e}")
+
+    async def aget(self, text: str) -> Optional[np.ndarray]:
+        """Variante asynchrone de ``get`` (client ``redis.asyncio``)"""
+        key = self._key(text)
+        vector = self._recall(key)
+        if vector is not None:
+            return vector
+        raw = None
+        if self._shared:
+            try:
+                raw = await self.redis_client.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache Redis des embeddings indisponible: {e}")
+        return self._resolve(key, raw)
+
+    async def aput(self, text: str, embedding) -> None:
+        """Variante asynchrone de ``put`` (client ``redis.asyncio``)"""
+        key, vector = self._prepare(text, embedding)
+        if self._shared:
+            try:
+                await self.redis_client.set(key, vector.tobytes(), ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache Redis des embeddings indisponible: {e}")
+
+    def stats(self) -> Dict:
+        """Compteurs de succès/échecs du cache"""
+        with self._lock:
+            lookups = self.hits + self.redis_hits + self.misses
+            return {
+                'hits': self.hits,
+                'redis_hits': self.redis_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+                'size': len(self._entries)
+            }
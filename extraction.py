@@ -0,0 +1,96 @@
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from chunking import chunk_text
+from manifest import content_digest, file_stat
+
+logger = logging.getLogger(__name__)
+
+
+def extract_pdf_content(pdf_path: Path) -> str:
+    """Extrait le texte d'un fichier PDF
+
+    Les bibliothèques PDF ne sont importées qu'au premier PDF rencontré.
+    """
+    try:
+        # Méthode 1: Utiliser pdfplumber (meilleure qualité)
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            text_content = []
+            for page in pdf.pages:
+                text_content.append(page.extract_text() or '')
+            return '\n\n'.join(text_content)
+
+    except Exception as e:
+        logger.warning(f"⚠️ Erreur avec pdfplumber, tentative avec PyPDF2: {e}")
+        try:
+            # Méthode 2: Utiliser PyPDF2 (fallback)
+            from PyPDF2 import PdfReader
+            with open(pdf_path, 'rb') as file:
+                reader = PdfReader(file)
+                text_content = []
+                for page in reader.pages:
+                    text_content.append(page.extract_text() or '')
+                return '\n\n'.join(text_content)
+
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'extraction du PDF: {e}")
+            return ""
+
+
+def extract_document(path: str,
+                     chunk_size: int,
+                     chunk_overlap: int,
+                     previous_digest: Optional[str] = None) -> Dict:
+    """Lit, extrait et découpe un fichier (exécuté dans un processus de travail)
+
+    Args:
+        path: Chemin du fichier
+        chunk_size: Taille maximale d'un passage
+        chunk_overlap: Recouvrement entre passages
+        previous_digest: Empreinte connue du fichier ; si elle est inchangée,
+            l'extraction est évitée
+
+    Returns:
+        Dictionnaire ``{'path', 'status', 'stat', 'digest', 'chunks', 'error',
+        'duration'}`` où ``status`` vaut ``'ok'``, ``'unchanged'``, ``'empty'``
+        ou ``'error'`` et ``duration`` est la durée de l'extraction (s)
+    """
+    start = time.perf_counter()
+    file_path = Path(path)
+    result = {'path': path, 'status': 'ok', 'stat': None, 'digest': None,
+              'chunks': [], 'error': None, 'duration': None}
+    try:
+        result['stat'] = file_stat(file_path)
+        raw = file_path.read_bytes()
+        result['digest'] = content_digest(raw)
+
+        # Date modifiée mais contenu identique : pas d'extraction
+        if previous_digest is not None and previous_digest == result['digest']:
+            result['status'] = 'unchanged'
+            return result
+
+        # Lecture différente selon le type de fichier
+        if file_path.suffix.lower() == '.pdf':
+            content = extract_pdf_content(file_path)
+        else:
+            content = raw.decode('utf-8')
+
+        if not content.strip():
+            result['status'] = 'empty'
+            return result
+
+        result['chunks'] = chunk_text(
+            content,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            extension=file_path.suffix
+        )
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    finally:
+        result['duration'] = time.perf_counter() - start
+    return result
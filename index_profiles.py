@@ -0,0 +1,70 @@
+from typing import Dict, Optional
+
+import numpy as np
+from redis.commands.search.field import VectorField
+
+# Profils d'index vectoriel : compromis rappel / latence / mémoire.
+# EF_RUNTIME est la valeur par défaut des requêtes ; elle peut être
+# surchargée requête par requête.
+INDEX_PROFILES: Dict[str, Dict] = {
+    'flat': {
+        'algorithm': 'FLAT'
+    },
+    'hnsw-fast': {
+        'algorithm': 'HNSW',
+        'M': 16,
+        'EF_CONSTRUCTION': 100,
+        'EF_RUNTIME': 20
+    },
+    'hnsw': {
+        'algorithm': 'HNSW',
+        'M': 40,
+        'EF_CONSTRUCTION': 200,
+        'EF_RUNTIME': 64
+    },
+    'hnsw-accurate': {
+        'algorithm': 'HNSW',
+        'M': 64,
+        'EF_CONSTRUCTION': 400,
+        'EF_RUNTIME': 200
+    }
+}
+
+VECTOR_TYPES = ('FLOAT32', 'FLOAT16')
+
+
+def vector_dtype(vector_type: str):
+    """Type NumPy correspondant au type de vecteur Redis"""
+    return np.float16 if vector_type == 'FLOAT16' else np.float32
+
+
+def vector_field(profile: str, dim: int,
+                 vector_type: str = 'FLOAT32',
+                 initial_cap: Optional[int] = None,
+                 name: str = 'embedding') -> VectorField:
+    """Construit le champ vectoriel d'un index selon un profil
+
+    Args:
+        profile: Nom du profil (voir ``INDEX_PROFILES``)
+        dim: Dimension des embeddings
+        vector_type: ``FLOAT32`` ou ``FLOAT16`` (moitié moins de mémoire)
+        initial_cap: Capacité initiale, pour éviter les réallocations
+            successives sur un gros corpus
+        name: Nom du champ
+    """
+    if profile not in INDEX_PROFILES:
+        raise ValueError(f"Profil d'index inconnu: {profile} (disponibles: {', '.join(INDEX_PROFILES)})")
+    if vector_type not in VECTOR_TYPES:
+        raise ValueError(f"Type de vecteur inconnu: {vector_type} (disponibles: {', '.join(VECTOR_TYPES)})")
+
+    settings = dict(INDEX_PROFILES[profile])
+    algorithm = settings.pop('algorithm')
+    attributes = {
+        "TYPE": vector_type,
+        "DIM": dim,
+        "DISTANCE_METRIC": "COSINE",
+        **settings
+    }
+    if initial_cap:
+        attributes["INITIAL_CAP"] = initial_cap
+    return VectorField(name, algorithm, attributes)
@@ -0,0 +1,222 @@
+from typing import Dict, Iterator, List, Optional
+
+from redis import ResponseError
+from redis.commands.search import reducers
+from redis.commands.search.aggregation import AggregateRequest, Desc
+
+# Champs de FT.INFO dont la somme donne la mémoire de l'index (hors hashes)
+INDEX_MEMORY_FIELDS = ('inverted_sz_mb', 'vector_index_sz_mb', 'offset_vectors_sz_mb',
+                       'doc_table_size_mb', 'sortable_values_size_mb', 'key_table_size_mb')
+
+# Options des attributs de FT.INFO qui n'ont pas de valeur
+ATTRIBUTE_FLAGS = ('SORTABLE', 'NOSTEM', 'NOINDEX', 'UNF', 'CASESENSITIVE', 'WITHSUFFIXTRIE')
+
+
+def _str(value):
+    return value.decode('utf-8', 'replace') if isinstance(value, bytes) else value
+
+
+def _number(value, default=0.0) -> float:
+    try:
+        return float(_str(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def _pairs(raw: list) -> Dict:
+    """Convertit une réponse ``clé, valeur, clé, valeur...`` en dictionnaire"""
+    return {_str(raw[i]): raw[i + 1] for i in range(0, len(raw) - 1, 2)}
+
+
+def list_indexes(redis_client) -> List[str]:
+    """Noms de tous les index RediSearch"""
+    return sorted(_str(name) for name in redis_client.execute_command("FT._LIST"))
+
+
+def collect_index_info(redis_client, indexes: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Lit FT.INFO de tous les index en un seul pipeline
+
+    Returns:
+        Informations par nom d'index ; chaque entrée contient ``attributes``
+        (liste de dictionnaires) et ``vector_fields`` (attributs VECTOR)
+    """
+    indexes = list_indexes(redis_client) if indexes is None else indexes
+    pipe = redis_client.pipeline(transaction=False)
+    for name in indexes:
+        pipe.execute_command("FT.INFO", name)
+
+    infos = {}
+    for name, raw in zip(indexes, pipe.execute(raise_on_error=False)):
+        if isinstance(raw, Exception):
+            infos[name] = {'error': str(raw), 'attributes': [], 'vector_fields': []}
+            continue
+        info = _pairs(raw)
+        attributes = [parse_attribute(attribute) for attribute in info.get('attributes', [])]
+        info['attributes'] = attributes
+        info['vector_fields'] = [a for a in attributes if a.get('type') == 'VECTOR']
+        info['memory_mb'] = sum(_number(info.get(field)) for field in INDEX_MEMORY_FIELDS)
+        infos[name] = info
+    return infos
+
+
+def parse_attribute(raw: list) -> Dict:
+    """Décode un attribut de FT.INFO (les options sans valeur sont ignorées)"""
+    attribute = {}
+    items = [_str(item) for item in raw]
+    i = 0
+    while i < len(items):
+        key = items[i]
+        if key in ATTRIBUTE_FLAGS:
+            attribute[key.lower()] = True
+            i += 1
+            continue
+        if i + 1 < len(items):
+            attribute[key] = items[i + 1]
+        i += 2
+    return attribute
+
+
+def vector_index_stats(redis_client, index: str, fields: List[str]) -> Dict[str, Dict]:
+    """Statistiques internes des champs vectoriels (FT.DEBUG VECSIM_INFO)
+
+    Pour un index HNSW : taille, niveaux du graphe, M, EF, mémoire,
+    vecteurs marqués supprimés. Vide si la commande n'est pas disponible.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    for field in fields:
+        pipe.execute_command("FT.DEBUG", "VECSIM_INFO", index, field)
+    stats = {}
+    for field, raw in zip(fields, pipe.execute(raise_on_error=False)):
+        if not isinstance(raw, Exception):
+            stats[field] = {key: _str(value) for key, value in _pairs(raw).items()
+                            if not isinstance(value, list)}
+    return stats
+
+
+def category_counts(redis_client, index: str) -> List[tuple]:
+    """Nombre de passages par catégorie, calculé par Redis (FT.AGGREGATE)
+
+    Returns:
+        Liste de tuples (catégorie, nombre), du plus fréquent au moins fréquent
+    """
+    request = AggregateRequest("*")\
+        .group_by("@category", reducers.count().alias("count"))\
+        .sort_by(Desc("@count"), max=10000)
+    result = redis_client.ft(index).aggregate(request)
+    counts = []
+    for row in result.rows:
+        values = _pairs(row)
+        counts.append((_str(values.get('category')) or '', int(_number(values.get('count')))))
+    return counts
+
+
+def iter_documents(redis_client, index: str, query: str = "*",
+                   fields: tuple = ("title", "category", "source", "full_path", "chunk_index"),
+                   batch_size: int = 1000) -> Iterator[Dict]:
+    """Parcourt les passages d'un index par lots, en mémoire constante
+
+    S'appuie sur un curseur FT.AGGREGATE : seuls ``batch_size`` passages
+    sont en mémoire à la fois, quelle que soit la taille de l'index. Le
+    curseur est libéré si le parcours est interrompu.
+
+    Args:
+        query: Filtre des passages (par exemple ``@chunk_index:[0 0]`` pour
+            un passage par document)
+    """
+    request = AggregateRequest(query)\
+        .load(*[f"@{field}" for field in fields])\
+        .cursor(count=batch_size)
+    search = redis_client.ft(index)
+    result = search.aggregate(request)
+    try:
+        while True:
+            for row in result.rows:
+                yield {key: _str(value) for key, value in _pairs(row).items()}
+            if not result.cursor or not result.cursor.cid:
+                break
+            result = search.aggregate(result.cursor)
+    finally:
+        if result.cursor and result.cursor.cid:
+            try:
+                redis_client.execute_command("FT.CURSOR", "DEL", index, result.cursor.cid)
+            except ResponseError:
+                pass
+
+
+def estimate_documents_memory(redis_client, prefix: str, num_docs: int, sample: int = 100) -> float:
+    """Estime la mémoire des hashes d'un index (MEMORY USAGE sur un échantillon)
+
+    Returns:
+        Estimation en Mo, 0 si l'index est vide
+    """
+    keys = []
+    for key in redis_client.scan_iter(match=f"{prefix}*", count=sample):
+        keys.append(key)
+        if len(keys) >= sample:
+            break
+    if not keys:
+        return 0.0
+
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key)
+    sizes = [size for size in pipe.execute(raise_on_error=False) if isinstance(size, int)]
+    if not sizes:
+        return 0.0
+    return sum(sizes) / len(sizes) * num_docs / (1024 * 1024)
+
+
+def index_prefix(info: Dict) -> Optional[str]:
+    """Préfixe des clés indexées, d'après la définition de l'index"""
+    definition = _pairs(info.get('index_definition', []))
+    prefixes = definition.get('prefixes') or []
+    return _str(prefixes[0]) if prefixes else None
+
+
+def describe_vector_field(field: Dict) -> str:
+    """Résumé lisible d'un champ vectoriel"""
+    details = [field.get('algorithm', '?'), field.get('data_type', ''),
+               f"dim {field['dim']}" if field.get('dim') else '',
+               field.get('distance_metric', '')]
+    if field.get('M'):
+        details.append(f"M {field['M']}, EF_CONSTRUCTION {field.get('ef_construction', '?')}")
+    return f"{field.get('identifier', '?')} ({', '.join(d for d in details if d)})"
+
+
+def print_index_report(redis_client, infos: Dict[str, Dict], active: Optional[str] = None) -> None:
+    """Affiche l'état de chaque index : documents, mémoire et champs vectoriels"""
+    for name, info in infos.items():
+        marker = " (actif)" if name == active else ""
+        print(f"\n🗂️ Index {name}{marker}")
+        if 'error' in info:
+            print(f"  ❌ {info['error']}")
+            continue
+
+        num_docs = int(_number(info.get('num_docs')))
+        print(f"  - Passages: {num_docs}, termes: {int(_number(info.get('num_terms')))}")
+        if _number(info.get('percent_indexed'), 1) < 1:
+            print(f"  - Indexation en cours: {_number(info.get('percent_indexed')):.0%}")
+        failures = int(_number(info.get('hash_indexing_failures')))
+        if failures:
+            print(f"  ⚠️ Échecs d'indexation: {failures}")
+
+        print(f"  - Mémoire de l'index: {info['memory_mb']:.2f} Mo "
+              f"(vecteurs {_number(info.get('vector_index_sz_mb')):.2f} Mo, "
+              f"texte {_number(info.get('inverted_sz_mb')):.2f} Mo)")
+        prefix = index_prefix(info)
+        if prefix and num_docs:
+            print(f"  - Mémoire des passages (estimée): "
+                  f"{estimate_documents_memory(redis_client, prefix, num_docs):.2f} Mo")
+
+        fields = info['vector_fields']
+        stats = vector_index_stats(redis_client, name, [f.get('identifier') for f in fields]) if fields else {}
+        for field in fields:
+            print(f"  - Champ vectoriel: {describe_vector_field(field)}")
+            field_stats = stats.get(field.get('identifier'))
+            if field_stats:
+                summary = ", ".join(f"{key.lower()}={value}" for key, value in field_stats.items()
+                                    if key in ('INDEX_SIZE', 'MAX_LEVEL', 'EF_RUNTIME', 'MEMORY',
+                                               'NUMBER_OF_MARKED_DELETED', 'BLOCK_SIZE'))
+                if summary:
+                    print(f"    {summary}")
+
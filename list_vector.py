@@ -1,38 +1,43 @@
+import argparse
+
 import redis
 
-def list_vector_indexes():
-    # Connexion à Redis (modifier les paramètres si nécessaire)
-    r = redis.Redis(host='localhost', port=6379, decode_responses=True)
-    
-    # Liste pour stocker les noms d'index contenant des champs VECTOR
-    vector_indexes = []
-    
-    # Récupère tous les index
+from inspection import collect_index_info, describe_vector_field, print_index_report
+
+
+def list_vector_indexes(r, details: bool = False):
+    # Lecture de FT.INFO pour tous les index en un seul pipeline
     try:
-        indexes = r.execute_command("FT._LIST")
+        infos = collect_index_info(r)
     except redis.exceptions.ResponseError:
         print("Assurez-vous que le module RedisSearch est bien activé.")
         return []
 
-    # Parcourt chaque index et vérifie les champs VECTOR
-    for index_name in indexes:
-        info = r.execute_command(f"FT.INFO {index_name}")
-        
-        # Recherche des attributs et vérifie le type VECTOR
-        attributes_index = info.index("attributes") + 1  # Position des attributs
-        attributes = info[attributes_index]
-        
-        for attribute in attributes:
-            if "VECTOR" in attribute:
-                vector_indexes.append(index_name)
-                break  # Passe au prochain index si un champ VECTOR est trouvé
-
-    return vector_indexes
-
-# Exécution et affichage des résultats
-vector_indexes = list_vector_indexes()
-if vector_indexes:
-    print("Les index contenant des champs VECTOR sont :", vector_indexes)
-else:
-    print("Aucun index contenant de champ VECTOR n'a été trouvé.")
+    # Index contenant au moins un champ VECTOR
+    vector_infos = {name: info for name, info in infos.items() if info['vector_fields']}
+    if details:
+        print_index_report(r, vector_infos)
+    return vector_infos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Liste les index vectoriels de Redis Stack")
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--details", action="store_true",
+                       help="Affiche la mémoire et les statistiques HNSW de chaque index")
+    args = parser.parse_args()
+
+    r = redis.Redis(host=args.host, port=args.port)
+    vector_infos = list_vector_indexes(r, details=args.details)
+    if vector_infos:
+        print("Les index contenant des champs VECTOR sont :")
+        for name, info in vector_infos.items():
+            fields = ", ".join(describe_vector_field(field) for field in info['vector_fields'])
+            print(f"- {name} : {fields}")
+    else:
+        print("Aucun index contenant de champ VECTOR n'a été trouvé.")
+
 
+if __name__ == "__main__":
+    main()
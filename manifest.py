@@ -0,0 +1,75 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+def content_digest(data: bytes) -> str:
+    """Calcule l'empreinte SHA-256 du contenu brut d'un fichier"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_stat(file_path: Path) -> Dict:
+    """Retourne la date de modification et la taille d'un fichier"""
+    stat = file_path.stat()
+    return {'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+class IngestionManifest:
+    """Manifeste d'ingestion persistant, stocké dans un hash Redis
+
+    Chaque champ du hash est le chemin d'un fichier indexé ; sa valeur est un
+    JSON ``{'mtime', 'size', 'digest', 'doc_id', 'chunks'}``. Le hash est
+    volontairement hors du préfixe de l'index pour ne pas être indexé.
+    """
+
+    def __init__(self, redis_client, index_name: str):
+        self.redis_client = redis_client
+        self.key = f"manifest:{index_name}"
+
+    def load(self) -> Dict[str, Dict]:
+        """Charge toutes les entrées du manifeste"""
+        entries = {}
+        for path, value in self.redis_client.hscan_iter(self.key, count=1000):
+            if isinstance(path, bytes):
+                path = path.decode('utf-8')
+            entries[path] = json.loads(value)
+        return entries
+
+    def get_many(self, paths: List[str]) -> Dict[str, Optional[Dict]]:
+        """Charge les entrées de quelques fichiers (None si absents)"""
+        if not paths:
+            return {}
+        values = self.redis_client.hmget(self.key, paths)
+        return {
+            path: json.loads(value) if value is not None else None
+            for path, value in zip(paths, values)
+        }
+
+    def update(self, entries: Dict[str, Dict], pipe=None) -> None:
+        """Enregistre ou remplace des entrées du manifeste
+
+        Args:
+            entries: Entrées par chemin de fichier
+            pipe: Pipeline Redis dans lequel ajouter l'écriture (optionnel)
+        """
+        if entries:
+            (pipe if pipe is not None else self.redis_client).hset(self.key, mapping={
+                path: json.dumps(entry) for path, entry in entries.items()
+            })
+
+    def remove(self, paths: Iterable[str], pipe=None) -> None:
+        """Supprime des entrées du manifeste
+
+        Args:
+            paths: Chemins des fichiers à retirer
+            pipe: Pipeline Redis dans lequel ajouter la suppression (optionnel)
+        """
+        paths = list(paths)
+        if paths:
+            (pipe if pipe is not None else self.redis_client).hdel(self.key, *paths)
+
+    @staticmethod
+    def is_unchanged(entry: Dict, stat: Dict) -> bool:
+        """Indique si un fichier n'a pas bougé depuis son indexation (date et taille)"""
+        return entry.get('mtime') == stat['mtime'] and entry.get('size') == stat['size']
@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# Bornes des histogrammes de durée (secondes)
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                                      0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICS_FORMATS = ('prometheus', 'json')
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (compatible Prometheus)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimation d'un quantile : borne supérieure du seau qui le contient"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """Minuteurs par étape et compteurs d'un moteur RAG
+
+    Les durées sont regroupées en histogrammes par étape (embedding,
+    recherche Redis, assemblage du contexte, génération...). Les
+    enregistrements sont protégés par un verrou : les threads d'ingestion et
+    les requêtes concurrentes partagent la même instance.
+
+    Exemple::
+
+        with metrics.timer('redis_search'):
+            results = index.search(query)
+        metrics.incr('queries')
+    """
+
+    def __init__(self, namespace: str = 'rag', buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Mesure la durée du bloc et l'enregistre pour ``stage``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Enregistre une durée pour une étape"""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        """Incrémente un compteur"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def to_dict(self) -> Dict:
+        """Instantané des mesures : compteurs, et par étape nombre, durées
+        totale et moyenne, quantiles estimés et seaux cumulés"""
+        with self._lock:
+            stages = {}
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                buckets['+Inf'] = histogram.count
+                stages[stage] = {
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'mean': histogram.sum / histogram.count if histogram.count else 0.0,
+                    'p50': histogram.quantile(0.5),
+                    'p99': histogram.quantile(0.99),
+                    'buckets': buckets
+                }
+            return {'counters': dict(sorted(self.counters.items())), 'stages': stages}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Mesures au format texte d'exposition Prometheus"""
+        snapshot = self.to_dict()
+        name = f"{self.namespace}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Durée des étapes du moteur RAG",
+            f"# TYPE {name} histogram"
+        ]
+        for stage, data in snapshot['stages'].items():
+            for bound, count in data['buckets'].items():
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {data["sum"]}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {data["count"]}')
+
+        for counter, value in snapshot['counters'].items():
+            metric = f"{self.namespace}_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, fmt: str = 'prometheus') -> str:
+        """Exporte les mesures au format ``prometheus`` ou ``json``"""
+        if fmt not in METRICS_FORMATS:
+            raise ValueError(f"Format de mesures inconnu: {fmt} (disponibles: {', '.join(METRICS_FORMATS)})")
+        return self.to_json() if fmt == 'json' else self.to_prometheus()
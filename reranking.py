@@ -0,0 +1,94 @@
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from embedding_backends import load_sentence_transformers_model
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CROSS_ENCODER = 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1'
+
+RERANKERS = ('cosine', 'cross-encoder')
+
+
+def rerank_by_scores(results: List[Dict], scores, top_k: int) -> List[Dict]:
+    """Reclasse des passages selon des scores alignés (plus grand = meilleur)
+
+    Returns:
+        Les ``top_k`` meilleurs passages, avec leur score ``rerank_score``
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    order = np.argsort(-scores, kind='stable')[:top_k]
+    return [dict(results[i], rerank_score=float(scores[i])) for i in order]
+
+
+def cosine_rerank(query_vector, vectors: List[Optional[np.ndarray]],
+                  results: List[Dict], top_k: int) -> List[Dict]:
+    """Reclasse des passages par cosinus exact en float32
+
+    Le calcul est fait en une seule multiplication matrice-vecteur sur les
+    vecteurs stockés des candidats ; la similarité exacte remplace celle de
+    l'index approché (et complète celle des résultats plein texte).
+
+    Args:
+        query_vector: Embedding de la requête
+        vectors: Vecteurs stockés des passages (None si introuvable)
+        results: Passages candidats, alignés sur ``vectors``
+        top_k: Nombre de passages conservés
+    """
+    present = [i for i, vector in enumerate(vectors) if vector is not None]
+    if not present:
+        return results[:top_k]
+
+    matrix = np.stack([vectors[i] for i in present]).astype(np.float32, copy=False)
+    query = np.asarray(query_vector, dtype=np.float32)
+    scores = matrix @ query / np.maximum(
+        np.linalg.norm(matrix, axis=1) * np.linalg.norm(query), 1e-12
+    )
+
+    ranked = rerank_by_scores([results[i] for i in present], scores, top_k)
+    for r in ranked:
+        r['similarity'] = r['rerank_score']
+    return ranked
+
+
+class CrossEncoderReranker:
+    """Reclassement par un cross-encoder SentenceTransformer sur CPU
+
+    Chaque paire (question, passage) est évaluée conjointement par le
+    modèle, plus précis qu'une similarité entre embeddings ; les paires
+    sont évaluées par lots. Le modèle est chargé une seule fois par
+    processus, au premier reclassement.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_CROSS_ENCODER,
+                 batch_size: int = 32,
+                 threads: Optional[int] = None,
+                 device: str = 'cpu'):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = device
+        self.threads = threads
+        self._model = None
+
+    @property
+    def model(self):
+        """Modèle CrossEncoder, chargé (avec torch) à la première utilisation"""
+        if self._model is None:
+            self._model = load_sentence_transformers_model(
+                'CrossEncoder', self.model_name, self.device, self.threads
+            )
+        return self._model
+
+    def rerank(self, query: str, results: List[Dict], top_k: int) -> List[Dict]:
+        """Reclasse des passages dont le contenu est chargé"""
+        if not results:
+            return []
+        scores = self.model.predict(
+            [(query, r.get('content') or "") for r in results],
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return rerank_by_scores(results, scores, top_k)
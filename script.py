@@ -1,24 +1,493 @@
 import numpy as np
 from redis import Redis, ResponseError
-from redis.commands.search.field import TextField, TagField, VectorField
+from redis.commands.search.field import TextField, TagField, NumericField
 from redis.commands.search.indexDefinition import IndexDefinition
 from redis.commands.search.query import Query
+from redis.commands.search.result import Result
 import argparse
 import os
+import re
 from pathlib import Path
 import hashlib
-from typing import List, Dict
-from sentence_transformers import SentenceTransformer
+import time
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Optional, Iterable, Iterator
 import json
+import logging
 import requests
-from PyPDF2 import PdfReader
-import pdfplumber  # Alternative plus robuste pour l'extraction de texte
+from requests.adapters import HTTPAdapter
+from extraction import extract_document, extract_pdf_content
+from manifest import IngestionManifest, file_stat
+from index_profiles import INDEX_PROFILES, VECTOR_TYPES, vector_dtype, vector_field
+from embedding_cache import EmbeddingCache
+from embedding_backends import (EMBEDDING_BACKENDS, DEFAULT_SENTENCE_TRANSFORMER, create_embedding_backend,
+                                describe_model)
+from answer_cache import SemanticAnswerCache
+from inspection import category_counts, collect_index_info, iter_documents, print_index_report
+from reranking import RERANKERS, DEFAULT_CROSS_ENCODER, CrossEncoderReranker, cosine_rerank
+from metrics import METRICS_FORMATS, Metrics
+from watcher import ChangeBuffer, PollingWatcher, start_watchdog
+from vector_store import QUANTIZATIONS, VECTOR_STORES, LocalStoreWriter, LocalVectorStore, VectorStore
+from distributed import (ClaimRenewer, acknowledge, create_job, default_worker_name, delivery_counts,
+                         ensure_group, job_key, load_job, publish_tasks, read_tasks, stream_key)
 
-def verify_redis_stack():
-    """Vérifie si Redis Stack est installé avec les capacités vectorielles"""
+logger = logging.getLogger(__name__)
+
+# Extensions des fichiers indexés
+SUPPORTED_EXTENSIONS = {'.md', '.txt', '.rst', '.yaml', '.yml', '.pdf'}
+
+# Prompt envoyé au modèle de chat
+PROMPT_TEMPLATE = """Tu es un assistant expert en infrastructure qui aide à comprendre la documentation de Lempire.
+Utilise uniquement les informations du contexte ci-dessous pour répondre à la question.
+Si tu ne peux pas répondre avec le contexte donné, dis-le clairement.
+
+Contexte:
+{context}
+
+Question: {question}
+
+Réponse:"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Estime le nombre de tokens d'un texte (environ 4 caractères par token)"""
+    return len(text) // 4 + 1
+
+
+def context_header(result: Dict) -> str:
+    """En-tête d'un passage dans le contexte envoyé au modèle"""
+    header = f"Document '{result['title']}' ({result['category']})"
+    if result.get('heading'):
+        header += f" - {result['heading']}"
+    return header
+
+
+def passage_length(result: Dict) -> int:
+    """Longueur d'un passage, connue sans son contenu grâce à ses offsets"""
+    if result.get('content') is not None:
+        return len(result['content'])
+    return max(result.get('end_offset', 0) - result.get('start_offset', 0), 0)
+
+
+def select_context(question: str, results: List[Dict],
+                   context_window: int, max_answer_tokens: int) -> List[tuple]:
+    """Choisit les passages qui tiennent dans le budget de contexte du modèle
+    
+    Le budget est la fenêtre de contexte moins la réponse attendue et le
+    prompt. Les passages sont retenus par ordre de pertinence d'après leur
+    longueur, sans avoir besoin de leur contenu ; le dernier est tronqué
+    s'il ne tient qu'en partie.
+    
+    Returns:
+        Liste de tuples (passage, nombre maximal de caractères ou None)
+    """
+    budget = (context_window - max_answer_tokens
+              - estimate_tokens(PROMPT_TEMPLATE) - estimate_tokens(question))
+    selected = []
+    
+    for r in results:
+        header = context_header(r)
+        length = passage_length(r)
+        
+        cost = (len(header) + 2 + length) // 4 + 2
+        if length and cost <= budget:
+            selected.append((r, None))
+            budget -= cost
+            continue
+        
+        # Troncature du dernier passage s'il reste une place utile
+        # (longueur inconnue : le passage occupe la place restante)
+        remaining_chars = (budget - estimate_tokens(header) - 2) * 4
+        if remaining_chars >= 200:
+            selected.append((r, remaining_chars))
+        break
+    
+    return selected
+
+
+def format_context(selected: List[tuple]) -> str:
+    """Assemble le contexte à partir des passages choisis par ``select_context``"""
+    parts = []
+    for r, limit in selected:
+        content = r.get('content') or ""
+        if limit is not None and len(content) > limit:
+            content = content[:limit] + "..."
+        parts.append(f"{context_header(r)}:\n{content}")
+    return "\n\n".join(parts)
+
+
+def build_context(question: str, results: List[Dict],
+                  context_window: int, max_answer_tokens: int):
+    """Remplit le budget de contexte du modèle avec des passages déjà chargés
+    
+    Returns:
+        Tuple (contexte, passages effectivement utilisés)
+    """
+    selected = select_context(question, results, context_window, max_answer_tokens)
+    return format_context(selected), [r for r, _ in selected]
+
+
+# Champs renvoyés par les recherches ; le contenu des passages n'est
+# chargé qu'à la demande (``fetch_contents``)
+SEARCH_RESULT_FIELDS = ("title", "source", "category", "full_path", "doc_id",
+                        "chunk_index", "start_offset", "end_offset", "heading")
+
+
+def build_knn_query(top_k: int, category=None, ef_runtime: Optional[int] = None) -> Query:
+    """Construit la requête KNN sur le champ ``embedding``
+    
+    Args:
+        ef_runtime: EF_RUNTIME propre à cette requête (index HNSW uniquement)
+    """
+    ef = f" EF_RUNTIME {int(ef_runtime)}" if ef_runtime else ""
+    base_query = f"*=>[KNN {top_k} @embedding $query_vector{ef} AS score]"
+    if category:
+        base_query = f"@category:{{{category}}} {base_query}"
+    
+    return Query(base_query)\
+        .return_fields(*SEARCH_RESULT_FIELDS, "score")\
+        .dialect(2)\
+        .sort_by("score")\
+        .paging(0, top_k)
+
+
+# Mots vides ignorés dans la partie plein texte des recherches hybrides
+TEXT_STOPWORDS = {
+    'le', 'la', 'les', 'un', 'une', 'des', 'du', 'de', 'et', 'ou', 'en',
+    'au', 'aux', 'ce', 'ces', 'cet', 'cette', 'est', 'sont', 'pour', 'par',
+    'sur', 'dans', 'avec', 'que', 'qui', 'quoi', 'quel', 'quelle', 'quels',
+    'quelles', 'comment', 'pourquoi', 'il', 'elle', 'on', 'je', 'tu', 'nous',
+    'vous', 'ils', 'elles', 'ne', 'pas', 'se', 'sa', 'son', 'ses', 'mon',
+    'ma', 'mes', 'the', 'is', 'are', 'of', 'to', 'and', 'or', 'in', 'on',
+    'for', 'with', 'what', 'how', 'why'
+}
+
+# Constante k de la fusion par rang réciproque (RRF)
+RRF_K = 60
+
+# Modes de recherche : KNN seul, ou plein texte BM25 + KNN fusionnés
+SEARCH_MODES = ('vector', 'hybrid')
+
+
+def build_text_query_terms(question: str) -> str:
+    """Construit la partie plein texte (union de termes) d'une question
+    
+    Les identifiants contenant de la ponctuation (``db-01.prod``,
+    ``ERR_42``, ``nginx/1.25``) sont découpés comme à l'indexation et
+    cherchés aussi sous forme de phrase exacte, ce qui favorise les
+    passages qui les citent tels quels.
+    
+    Returns:
+        Expression de requête RediSearch, vide si la question ne contient
+        aucun terme utile
+    """
+    clauses = []
+    for token in re.findall(r"\w+(?:[^\w\s]+\w+)*", question):
+        parts = re.findall(r"\w+", token)
+        if len(parts) > 1:
+            clauses.append('"' + " ".join(parts) + '"')
+        for part in parts:
+            if len(part) > 1 and part.lower() not in TEXT_STOPWORDS:
+                clauses.append(part)
+    return "|".join(dict.fromkeys(clauses))
+
+
+def build_text_query(terms: str, top_k: int, category=None) -> Query:
+    """Construit la requête plein texte BM25 sur ``title`` et ``content``"""
+    base_query = f"@title|content:({terms})"
+    if category:
+        base_query = f"@category:{{{category}}} {base_query}"
+    
+    return Query(base_query)\
+        .scorer("BM25")\
+        .with_scores()\
+        .return_fields(*SEARCH_RESULT_FIELDS)\
+        .dialect(2)\
+        .paging(0, top_k)
+
+
+def parse_search_results(docs, vector: bool = True) -> List[Dict]:
+    """Convertit les documents retournés par FT.SEARCH en dictionnaires
+    
+    Args:
+        vector: True pour une requête KNN (``score`` est une distance
+            cosinus), False pour une requête plein texte (``score`` est le
+            score BM25 et la similarité est inconnue)
+    
+    ``key`` est la clé Redis du passage ; ``content`` vaut None tant
+    qu'il n'a pas été chargé par ``fetch_contents``.
+    """
+    return [{
+        "key": doc.id,
+        "content": getattr(doc, "content", None),
+        "title": doc.title,
+        "source": doc.source,
+        "category": doc.category,
+        "full_path": doc.full_path,
+        "doc_id": getattr(doc, "doc_id", None),
+        "chunk_index": int(getattr(doc, "chunk_index", 0)),
+        "start_offset": int(getattr(doc, "start_offset", 0)),
+        "end_offset": int(getattr(doc, "end_offset", 0)),
+        "heading": getattr(doc, "heading", ""),
+        "similarity": 1 - float(doc.score) if vector else None,
+        **({} if vector else {"text_score": float(doc.score)})
+    } for doc in docs]
+
+
+def describe_relevance(result: Dict) -> str:
+    """Libellé de pertinence d'une source, pour l'affichage"""
+    if result.get('similarity') is None:
+        return "Correspondance plein texte"
+    return f"Similarité: {result['similarity']:.2%}"
+
+
+def parse_pipeline_result(raw, with_scores: bool = False) -> List:
+    """Décode la réponse brute d'un FT.SEARCH exécuté dans un pipeline
+    
+    Args:
+        with_scores: True si la requête utilisait ``WITHSCORES``
+    """
+    return Result(raw, True, with_scores=with_scores).docs
+
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], top_k: int,
+                           k: int = RRF_K) -> List[Dict]:
+    """Fusionne plusieurs classements par rang réciproque (RRF)
+    
+    Chaque passage reçoit la somme des ``1 / (k + rang)`` de ses
+    classements ; la similarité vectorielle est conservée si le passage
+    figure dans les résultats KNN.
+    
+    Returns:
+        Les ``top_k`` meilleurs passages, avec leur score ``rrf_score``
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            key = (result.get('doc_id') or result['full_path'], result['chunk_index'])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = dict(result, rrf_score=0.0)
+            elif entry.get('similarity') is None:
+                entry['similarity'] = result.get('similarity')
+            entry['rrf_score'] += 1.0 / (k + rank)
+    
+    return sorted(fused.values(), key=lambda r: r['rrf_score'], reverse=True)[:top_k]
+
+
+class RedisVectorStore(VectorStore):
+    """Stockage Redis Stack : index RediSearch interrogé par son alias
+    
+    Recherche KNN (HNSW ou FLAT) et, en mode hybride, requête plein texte
+    BM25 envoyée dans le même pipeline. ``redis_client`` est un client
+    ``redis`` (méthodes synchrones) ou ``redis.asyncio`` (variantes
+    ``asearch``, ``ahybrid_search``...). La dimension, le type de vecteur
+    et le profil sont ceux de l'index actif derrière l'alias (``configure``).
+    
+    Args:
+        manifest: Manifeste des fichiers indexés, compté par ``report``
+        ef_runtime: EF_RUNTIME par défaut des requêtes (défaut : celui de l'index)
+    """
+    
+    name = 'redis'
+    
+    def __init__(self, redis_client, index_name: str,
+                 manifest: Optional[IngestionManifest] = None, ef_runtime: Optional[int] = None):
+        self.redis_client = redis_client
+        self.index_name = index_name
+        self.manifest = manifest
+        self.ef_runtime = ef_runtime
+        self.configure(None, {})
+    
+    @property
+    def label(self) -> str:
+        return f"l'index {self.active_index or self.index_name}"
+    
+    def configure(self, index: Optional[str], meta: Dict) -> None:
+        """Adopte l'index physique actif et ses métadonnées (``index_meta:<index>``)"""
+        self.active_index = index
+        self.metadata = meta
+        self.dim = int(meta['dim']) if meta.get('dim') else None
+        self.vector_type = meta.get('vector_type', 'FLOAT32')
+        self.profile = meta.get('profile', 'hnsw')
+    
+    def _knn_query(self, query_vector, top_k: int, category=None, ef_runtime=None) -> tuple:
+        """Requête KNN et ses paramètres (vecteur au type de l'index)"""
+        # EF_RUNTIME n'a de sens que pour un index HNSW
+        ef = ef_runtime or self.ef_runtime
+        if INDEX_PROFILES.get(self.profile, {}).get('algorithm') != 'HNSW':
+            ef = None
+        query = build_knn_query(top_k, category, ef)
+        logger.debug(f"🔎 Requête Redis: {query.query_string()}")
+        return query, {
+            "query_vector": np.asarray(query_vector, dtype=vector_dtype(self.vector_type)).tobytes()
+        }
+    
+    def _hybrid_queries(self, query_vector, terms: str, top_k: int, category=None,
+                        ef_runtime=None) -> tuple:
+        """Requêtes KNN et plein texte d'une recherche hybride, ``2 * top_k`` candidats chacune"""
+        candidates = max(top_k * 2, 10)
+        knn_query, params_dict = self._knn_query(query_vector, candidates, category, ef_runtime)
+        text_query = build_text_query(terms, candidates, category)
+        logger.debug(f"🔎 Requête plein texte: {text_query.query_string()}")
+        return knn_query, params_dict, text_query
+    
+    @staticmethod
+    def _fuse(knn_raw, text_raw, top_k: int) -> List[Dict]:
+        """Décode les réponses brutes du pipeline hybride et fusionne les classements"""
+        knn_results = parse_search_results(parse_pipeline_result(knn_raw))
+        text_results = parse_search_results(
+            parse_pipeline_result(text_raw, with_scores=True), vector=False
+        )
+        logger.debug(f"📊 Nombre de résultats: {len(knn_results)} KNN, {len(text_results)} plein texte")
+        return reciprocal_rank_fusion([knn_results, text_results], top_k)
+    
+    def _decode_vectors(self, raws: List[Optional[bytes]]) -> List[Optional[np.ndarray]]:
+        dtype = vector_dtype(self.vector_type)
+        return [np.frombuffer(raw, dtype=dtype) if raw else None for raw in raws]
+    
+    @staticmethod
+    def _missing_contents(results: List[Dict]) -> List[Dict]:
+        return [r for r in results if r.get('content') is None and r.get('key')]
+    
+    @staticmethod
+    def _apply_contents(missing: List[Dict], contents: List) -> None:
+        for r, (content,) in zip(missing, contents):
+            r['content'] = content.decode('utf-8') if content else ""
+    
+    def search(self, query_vector, top_k: int, category=None, ef_runtime=None) -> List[Dict]:
+        query, params_dict = self._knn_query(query_vector, top_k, category, ef_runtime)
+        return parse_search_results(self.redis_client.ft(self.index_name).search(query, params_dict).docs)
+    
+    def hybrid_search(self, query_vector, terms: str, top_k: int, category=None,
+                      ef_runtime=None) -> List[Dict]:
+        """KNN et BM25 dans un même pipeline, fusionnés par rang réciproque"""
+        knn_query, params_dict, text_query = self._hybrid_queries(query_vector, terms, top_k,
+                                                                  category, ef_runtime)
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.ft(self.index_name).search(knn_query, params_dict)
+        pipe.ft(self.index_name).search(text_query)
+        return self._fuse(*pipe.execute(), top_k)
+    
+    def fetch_vectors(self, results: List[Dict]) -> List[Optional[np.ndarray]]:
+        """Charge en un seul pipeline les vecteurs stockés des passages"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for r in results:
+            pipe.hget(r['key'], 'embedding')
+        return self._decode_vectors(pipe.execute())
+    
+    def fetch_contents(self, results: List[Dict]) -> List[Dict]:
+        """Charge en un seul pipeline ``HMGET`` le contenu des passages qui ne l'ont pas"""
+        missing = self._missing_contents(results)
+        if missing:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for r in missing:
+                pipe.hmget(r['key'], 'content')
+            self._apply_contents(missing, pipe.execute())
+        return results
+    
+    async def asearch(self, query_vector, top_k: int, category=None, ef_runtime=None) -> List[Dict]:
+        query, params_dict = self._knn_query(query_vector, top_k, category, ef_runtime)
+        results = await self.redis_client.ft(self.index_name).search(query, params_dict)
+        return parse_search_results(results.docs)
+    
+    async def ahybrid_search(self, query_vector, terms: str, top_k: int, category=None,
+                             ef_runtime=None) -> List[Dict]:
+        knn_query, params_dict, text_query = self._hybrid_queries(query_vector, terms, top_k,
+                                                                  category, ef_runtime)
+        # Pipeline du module search : ses réponses brutes sont décodées par ``_fuse``
+        pipe = self.redis_client.ft(self.index_name).pipeline(transaction=False)
+        await pipe.search(knn_query, params_dict)
+        await pipe.search(text_query)
+        return self._fuse(*await pipe.execute(), top_k)
+    
+    async def afetch_vectors(self, results: List[Dict]) -> List[Optional[np.ndarray]]:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for r in results:
+            pipe.hget(r['key'], 'embedding')
+        return self._decode_vectors(await pipe.execute())
+    
+    async def afetch_contents(self, results: List[Dict]) -> List[Dict]:
+        missing = self._missing_contents(results)
+        if missing:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for r in missing:
+                pipe.hmget(r['key'], 'content')
+            self._apply_contents(missing, await pipe.execute())
+        return results
+    
+    def report(self, limit: int = 10) -> None:
+        """Rapport de la base Redis
+        
+        Les informations de tous les index sont lues en un seul pipeline ;
+        les comptes par catégorie sont calculés par Redis et la liste des
+        documents est parcourue par curseur, en mémoire constante.
+        """
+        print("\n" + "="*50)
+        print("📊 RAPPORT DE LA BASE DE DONNÉES REDIS")
+        print("="*50)
+        
+        # Statistiques de tous les index
+        try:
+            infos = collect_index_info(self.redis_client)
+            print("\n📈 STATISTIQUES GÉNÉRALES:")
+            if self.active_index:
+                meta = self.metadata
+                print(f"- Index actif: {self.active_index} (alias {self.index_name})")
+                model = describe_model(meta.get('model_id', '?'), meta.get('served_model'))
+                print(f"- Modèle d'embedding: {model} (dimension {meta.get('dim', '?')})")
+                print(f"- Profil: {meta.get('profile', 'hnsw')} ({meta.get('vector_type', 'FLOAT32')})")
+            if self.manifest is not None:
+                print(f"- Fichiers indexés (manifeste): {self.redis_client.hlen(self.manifest.key)}")
+            print_index_report(self.redis_client, infos, active=self.active_index)
+        except Exception as e:
+            print(f"❌ Erreur lors de la lecture des statistiques: {e}")
+        
+        # Passages par catégorie
+        try:
+            print("\n🏷️ PASSAGES PAR CATÉGORIE:")
+            for category, count in category_counts(self.redis_client, self.index_name):
+                print(f"- {category or '(aucune)'}: {count}")
+        except Exception as e:
+            print(f"❌ Erreur lors du comptage par catégorie: {e}")
+        
+        # Liste des documents (premier passage de chaque fichier)
+        try:
+            print("\n📚 DOCUMENTS STOCKÉS:")
+            documents = iter_documents(self.redis_client, self.index_name, query="@chunk_index:[0 0]")
+            for i, doc in enumerate(documents, 1):
+                print(f"\nDocument {i}:")
+                print(f"  📄 Titre: {doc.get('title')}")
+                print(f"  🏷️ Catégorie: {doc.get('category')}")
+                print(f"  📂 Source: {doc.get('source')}")
+                print(f"   Chemin: {doc.get('full_path')}")
+                if limit and i >= limit:
+                    documents.close()
+                    break
+        except Exception as e:
+            print(f"❌ Erreur lors de la lecture des documents: {e}")
+        
+        print("\n" + "="*50)
+
+
+# Vérifications de santé réussies dans ce processus : (service, adresse)
+_healthy_services = set()
+
+
+def verify_redis_stack(host: str = 'localhost', port: int = 6379):
+    """Vérifie si Redis Stack est installé avec les capacités vectorielles
+    
+    Un succès est mémorisé pour le processus : les moteurs créés ensuite
+    sur le même serveur ne refont pas la vérification.
+    """
+    if ('redis', host, port) in _healthy_services:
+        return True
     try:
         # Création d'une connexion temporaire
-        temp_client = Redis(host='localhost', port=6379)
+        temp_client = Redis(host=host, port=port)
         
         # Vérification des modules chargés
         modules = temp_client.module_list()
@@ -30,14 +499,15 @@ def verify_redis_stack():
         )
         
         if not has_search:
-            print("❌ Module RediSearch non trouvé")
+            logger.error("❌ Module RediSearch non trouvé")
             return False
             
-        print("✅ Redis Stack vérifié avec succès")
+        logger.info("✅ Redis Stack vérifié avec succès")
+        _healthy_services.add(('redis', host, port))
         return True
         
     except Exception as e:
-        print(f"❌ Erreur lors de la vérification de Redis Stack: {e}")
+        logger.error(f"❌ Erreur lors de la vérification de Redis Stack: {e}")
         return False
 
 class LocalRAG:
@@ -45,73 +515,314 @@ class LocalRAG:
                  redis_host='localhost', 
                  redis_port=6379, 
                  index_name='docs',
-                 llm_url='http://localhost:1234/v1'):
-                 
-        # Vérification des capacités vectorielles
-        if not verify_redis_stack():
+                 llm_url='http://localhost:1234/v1',
+                 embedding_model='local',
+                 embedding_batch_size=32,
+                 embedding_concurrency=4,
+                 embedding_max_retries=3,
+                 chunk_size=1000,
+                 chunk_overlap=200,
+                 extraction_workers=None,
+                 ingestion_queue_size=64,
+                 ingestion_job_ttl=3600,
+                 ingestion_poll_interval=1.0,
+                 redis_write_batch_size=500,
+                 query_cache_size=1024,
+                 query_cache_ttl=86400,
+                 answer_cache=False,
+                 answer_cache_distance=0.05,
+                 answer_cache_ttl=7 * 86400,
+                 answer_cache_size=10000,
+                 context_window=8192,
+                 max_answer_tokens=1000,
+                 embedding_timeout=30,
+                 llm_connect_timeout=10,
+                 llm_timeout=120,
+                 embedding_backend='lmstudio',
+                 embedding_threads=None,
+                 index_profile='hnsw',
+                 vector_type='FLOAT32',
+                 ef_runtime=None,
+                 search_mode='hybrid',
+                 rerank=None,
+                 rerank_candidates=50,
+                 rerank_model=DEFAULT_CROSS_ENCODER,
+                 vector_store='redis',
+                 local_store_path='vector_store',
+                 local_quantization=None,
+                 rescore_candidates=100,
+                 health_checks=True):
+        
+        if vector_store not in VECTOR_STORES:
+            raise ValueError(f"Stockage de vecteurs inconnu: {vector_store} (disponibles: {', '.join(VECTOR_STORES)})")
+        # Stockage interrogé (VectorStore) : index Redis Stack, ou vecteurs en
+        # fichiers memory-map sans Redis (None tant qu'il n'a pas été construit)
+        self.vector_store = vector_store
+        self.local_store_path = Path(local_store_path)
+        # Quantification int8 du stockage local, reclassé en float32
+        self.local_quantization = local_quantization
+        self.rescore_candidates = rescore_candidates
+        self.store = None
+        if vector_store == 'local':
+            if answer_cache:
+                raise ValueError("Le cache sémantique des réponses nécessite Redis Stack")
+            if LocalVectorStore.exists(self.local_store_path):
+                self.store = LocalVectorStore(self.local_store_path, rescore_candidates)
+        
+        # Vérification des capacités vectorielles (facultative)
+        elif health_checks and not verify_redis_stack(redis_host, redis_port):
             raise RuntimeError(
                 "Redis Stack n'est pas correctement installé. "
                 "Les capacités vectorielles ne sont pas disponibles."
             )
             
-        self.redis_client = Redis(host=redis_host, port=redis_port)
+        self.redis_client = Redis(host=redis_host, port=redis_port) if vector_store == 'redis' else None
+        # ``index_name`` est l'alias interrogé ; les documents sont écrits dans
+        # un index physique ``<alias>_<date>`` échangé sans interruption
         self.index_name = index_name
         self.llm_url = llm_url
-        self.vector_dim = 4096
         
-        # Test de connexion à LM Studio
+        # Paramètres du client d'embedding par lots
+        self.embedding_model = embedding_model
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_concurrency = embedding_concurrency
+        self.embedding_max_retries = embedding_max_retries
+        self.embedding_timeout = embedding_timeout
+        self.session = self._create_http_session()
+        
+        # Moteur d'embedding : LM Studio (HTTP) ou SentenceTransformer local
+        if embedding_backend == 'sentence-transformers':
+            self.embedding_backend = create_embedding_backend(
+                embedding_backend,
+                model_name=embedding_model if embedding_model != 'local' else DEFAULT_SENTENCE_TRANSFORMER,
+                batch_size=embedding_batch_size,
+                threads=embedding_threads
+            )
+        else:
+            self.embedding_backend = create_embedding_backend(
+                embedding_backend,
+                session=self.session,
+                llm_url=self.llm_url,
+                model_id=embedding_model,
+                batch_size=embedding_batch_size,
+                concurrency=embedding_concurrency,
+                max_retries=embedding_max_retries,
+                timeout=embedding_timeout
+            )
+        
+        # Paramètres de génération des réponses
+        self.context_window = context_window
+        self.max_answer_tokens = max_answer_tokens
+        self.llm_timeout = (llm_connect_timeout, llm_timeout)
+        
+        # Paramètres du découpage en passages
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        
+        # Pipeline d'ingestion : processus d'extraction et file bornée
+        self.extraction_workers = extraction_workers or os.cpu_count() or 1
+        self.ingestion_queue_size = ingestion_queue_size
+        
+        # Ingestion répartie : durée de vie des jobs et suivi des acquittements
+        self.ingestion_job_ttl = ingestion_job_ttl
+        self.ingestion_poll_interval = ingestion_poll_interval
+        
+        # Nombre de commandes Redis regroupées par pipeline
+        self.redis_write_batch_size = redis_write_batch_size
+        
+        # Cache des embeddings de requêtes (LRU local + Redis avec TTL)
+        self.query_cache = EmbeddingCache(
+            redis_client=self.redis_client,
+            model_id=self.embedding_backend.model_id,
+            max_size=query_cache_size,
+            ttl=query_cache_ttl
+        )
+        
+        # Manifeste des fichiers indexés (ingestion incrémentale)
+        self.manifest = IngestionManifest(self.redis_client, self.index_name)
+        
+        # Profil des nouveaux index et EF_RUNTIME par défaut des requêtes
+        if index_profile not in INDEX_PROFILES:
+            raise ValueError(f"Profil d'index inconnu: {index_profile}")
+        self.index_profile = index_profile
+        self.new_vector_type = vector_type
+        
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Mode de recherche inconnu: {search_mode}")
+        self.search_mode = search_mode
+        
+        # Index physique actif derrière l'alias, sa dimension et son type de vecteur
+        if self.redis_client:
+            self.store = RedisVectorStore(self.redis_client, self.index_name, self.manifest, ef_runtime)
+        self.active_index = self._resolve_active_index() if self.redis_client else None
+        self._apply_index_metadata(self.active_index)
+        if isinstance(self.store, LocalVectorStore):
+            self.vector_dim = self.store.dim
+            self._adopt_served_model(self.store.served_model)
+        
+        # Cible des écritures d'ingestion (index actif, ou nouvel index en construction)
+        self.write_index = self.active_index
+        self.write_manifest = self.manifest
+        
+        # Statistiques de la dernière génération en streaming
+        self.last_generation_stats = {}
+        
+        # Cache sémantique des réponses (optionnel)
+        self.answer_cache = None
+        if answer_cache:
+            self.answer_cache = SemanticAnswerCache(
+                self.redis_client,
+                self.manifest,
+                index_name=f"{self.index_name}_answers",
+                distance_threshold=answer_cache_distance,
+                ttl=answer_cache_ttl,
+                max_entries=answer_cache_size
+            )
+        
+        # Durées par étape et compteurs (ingestion et requêtes)
+        self.metrics = Metrics()
+        
+        # Reclassement optionnel d'un ensemble élargi de candidats
+        if rerank is not None and rerank not in RERANKERS:
+            raise ValueError(f"Reclassement inconnu: {rerank} (disponibles: {', '.join(RERANKERS)})")
+        self.rerank = rerank
+        self.rerank_candidates = rerank_candidates
+        self.cross_encoder = None
+        if rerank == 'cross-encoder':
+            self.cross_encoder = CrossEncoderReranker(rerank_model, threads=embedding_threads)
+        
+        if health_checks:
+            self.check_llm()
+    
+    def check_llm(self) -> bool:
+        """Teste la connexion à LM Studio (un succès est mémorisé pour le processus)"""
+        if ('llm', self.llm_url) in _healthy_services:
+            return True
         try:
-            response = requests.get(f"{self.llm_url}/models")
+            response = self.session.get(f"{self.llm_url}/models", timeout=self.llm_timeout[0])
             if response.status_code == 200:
-                print("✅ Connexion à LM Studio établie")
-            else:
-                print("❌ Impossible de se connecter à LM Studio")
+                logger.info("✅ Connexion à LM Studio établie")
+                _healthy_services.add(('llm', self.llm_url))
+                return True
+            logger.warning("❌ Impossible de se connecter à LM Studio")
         except Exception as e:
-            print(f"❌ Erreur de connexion à LM Studio: {e}")
+            logger.warning(f"❌ Erreur de connexion à LM Studio: {e}")
+        return False
+    
+    def _create_http_session(self) -> requests.Session:
+        """Crée une session HTTP avec un pool de connexions réutilisables"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max(self.embedding_concurrency, 1)
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
     
     def get_embedding(self, text: str) -> list:
-        """Obtient l'embedding d'un texte via LM Studio"""
-        try:
-            print("    📡 Appel à l'API d'embedding...")
-            
-            # Tronquer le texte si trop long (par exemple, limiter à 8000 caractères)
-            text = text[:8000] if len(text) > 8000 else text
-            
-            response = requests.post(
-                f"{self.llm_url}/embeddings",
-                json={
-                    "input": text,
-                    "model": "local"
-                },
-                timeout=30  # Timeout de 30 secondes
-            )
-            
-            if response.status_code == 200:
-                embedding = response.json()['data'][0]['embedding']
-                print(f"    ✅ Embedding reçu ({len(embedding)} dimensions)")
-                return embedding
-            else:
-                print(f"    ❌ Erreur HTTP: {response.status_code}")
-                print(f"    📝 Réponse: {response.text}")
-                return None
+        """Obtient l'embedding d'un texte"""
+        return self.get_embeddings([text])[0]
+    
+    def get_embeddings(self, texts: List[str]) -> List[Optional[list]]:
+        """Obtient les embeddings d'une liste de textes via le moteur configuré
+        
+        Args:
+            texts: Textes à encoder
             
-        except requests.Timeout:
-            print("    ❌ Timeout lors de l'appel à l'API d'embedding")
-            return None
-        except Exception as e:
-            print(f"    ❌ Erreur lors de l'appel à l'API d'embedding: {e}")
+        Returns:
+            Liste d'embeddings alignée sur ``texts`` (None pour un texte en échec)
+        """
+        if not texts:
+            return []
+        
+        # Tronquer les textes trop longs (par exemple, limiter à 8000 caractères)
+        texts = [text[:8000] for text in texts]
+        with self.metrics.timer('embedding'):
+            embeddings = self.embedding_backend.embed(texts)
+        self.metrics.incr('embedding_texts', len(texts))
+        self.metrics.incr('embedding_failures', sum(1 for e in embeddings if e is None))
+        return embeddings
+    
+    def probe_dimension(self) -> int:
+        """Mesure une fois la dimension des embeddings du modèle courant
+        
+        L'appel fait aussi connaître le modèle réellement servi
+        (``embedding_backend.served_model``), enregistré avec l'index.
+        """
+        embedding = self.get_embedding("dimension")
+        if embedding is None:
+            raise RuntimeError("Impossible d'obtenir un embedding pour mesurer la dimension du modèle")
+        logger.info(f"📐 Dimension des embeddings du modèle "
+                    f"{self.embedding_backend.served_model or self.embedding_backend.model_id}: {len(embedding)}")
+        return len(embedding)
+    
+    def _model_mismatch(self, what: str, model_id: str, served_model: Optional[str],
+                        recorded_dim, dim: int) -> str:
+        """Message d'erreur d'un index construit avec un autre modèle"""
+        backend = self.embedding_backend
+        return (f"{what} a été construit avec le modèle {describe_model(model_id, served_model)} "
+                f"(dimension {recorded_dim}), incompatible avec "
+                f"{describe_model(backend.model_id, backend.served_model)} (dimension {dim}).")
+    
+    def _resolve_active_index(self) -> Optional[str]:
+        """Retourne l'index physique derrière l'alias (None s'il n'existe pas)"""
+        try:
+            info = self.redis_client.ft(self.index_name).info()
+        except ResponseError:
             return None
+        name = info.get('index_name', self.index_name)
+        return name.decode('utf-8') if isinstance(name, bytes) else name
+    
+    def get_index_metadata(self, index: str) -> Dict:
+        """Lit les métadonnées d'un index physique (modèle, dimension, profil, date)"""
+        raw = self.redis_client.hgetall(f"index_meta:{index}")
+        return {key.decode('utf-8'): value.decode('utf-8') for key, value in raw.items()}
+    
+    def _apply_index_metadata(self, index: Optional[str]) -> None:
+        """Adopte la dimension, le type de vecteur et le modèle d'un index physique
+        
+        Les écritures suivent l'index en construction ; les recherches
+        (``store``) suivent l'index actif derrière l'alias.
+        """
+        meta = self.get_index_metadata(index) if index else {}
+        self.vector_dim = int(meta['dim']) if meta.get('dim') else None
+        self.vector_type = meta.get('vector_type', 'FLOAT32')
+        self._adopt_served_model(meta.get('served_model'))
+        if index and index == self.active_index:
+            self.store.configure(index, meta)
+    
+    def _adopt_served_model(self, served_model: Optional[str]) -> None:
+        """Retient le modèle servi qui a construit l'index interrogé
+        
+        Les embeddings de requêtes en cache sont rangés sous ce modèle : un
+        changement de modèle dans LM Studio ne réutilise pas d'anciens
+        vecteurs. Les index qui ne l'ont pas enregistré gardent le modèle
+        demandé.
+        """
+        self.index_model = served_model or None
+        self.query_cache.model_id = self.index_model or self.embedding_backend.model_id
     
-    def _create_vector_index(self):
-        """Crée l'index vectoriel dans Redis"""
+    def _estimate_capacity(self) -> int:
+        """Estime la capacité initiale d'un nouvel index d'après l'index actif"""
+        try:
+            num_docs = int(self.redis_client.ft(self.index_name).info()['num_docs'])
+        except Exception:
+            num_docs = 0
+        return max(1000, int(num_docs * 1.2))
+    
+    def _create_vector_index(self, index: str, dim: int):
+        """Crée un index vectoriel physique de dimension ``dim`` et ses métadonnées
+        
+        Le champ vectoriel suit le profil ``index_profile`` (FLAT ou HNSW) et
+        le type ``new_vector_type`` ; sa capacité initiale est dimensionnée
+        sur l'index actif pour éviter les réallocations successives.
+        
+        Args:
+            index: Nom de l'index physique (préfixe des clés ``<index>:``)
+            dim: Dimension des embeddings du modèle
+        """
         try:
-            # Suppression de l'ancien index s'il existe
-            try:
-                self.redis_client.ft(self.index_name).dropindex(delete_docs=False)
-                print("✅ Ancien index supprimé")
-            except:
-                pass
-                
             # Création du schéma
             schema = (
                 TextField("content"),
@@ -119,247 +830,1532 @@ class LocalRAG:
                 TagField("source"),
                 TagField("category"),
                 TextField("full_path"),
-                VectorField("embedding",
-                    "HNSW",
-                    {
-                        "TYPE": "FLOAT32",
-                        "DIM": 768,
-                        "DISTANCE_METRIC": "COSINE",
-                        "M": 40,
-                        "EF_CONSTRUCTION": 200,
-                        "EF_RUNTIME": 10,
-                        "INITIAL_CAP": 100
-                    }
-                )
+                TagField("doc_id"),
+                NumericField("chunk_index"),
+                vector_field(self.index_profile, dim,
+                             vector_type=self.new_vector_type,
+                             initial_cap=self._estimate_capacity())
             )
             
             # Création de l'index
-            self.redis_client.ft(self.index_name).create_index(
+            self.redis_client.ft(index).create_index(
                 schema,
-                definition=IndexDefinition(prefix=[f"{self.index_name}:"])
+                definition=IndexDefinition(prefix=[f"{index}:"])
             )
-            print("✅ Index vectoriel créé avec succès")
+            self.redis_client.hset(f"index_meta:{index}", mapping={
+                'alias': self.index_name,
+                'model_id': self.embedding_backend.model_id,
+                'served_model': self.embedding_backend.served_model or '',
+                'dim': dim,
+                'profile': self.index_profile,
+                'vector_type': self.new_vector_type,
+                'created_at': time.time()
+            })
+            logger.info(f"✅ Index vectoriel {index} créé avec succès "
+                  f"(dimension {dim}, profil {self.index_profile}, {self.new_vector_type})")
             
         except Exception as e:
-            print(f"❌ Erreur lors de la création de l'index: {e}")
+            logger.error(f"❌ Erreur lors de la création de l'index: {e}")
             raise
     
-    def load_documents(self, docs_path: str, incremental: bool = False) -> None:
+    def _activate_index(self, index: str) -> None:
+        """Fait pointer l'alias vers ``index`` puis supprime l'ancien index
+        
+        La bascule (FT.ALIASUPDATE) est atomique : les recherches passent de
+        l'ancien au nouvel index sans interruption. Le manifeste de
+        construction remplace celui de l'alias.
+        """
+        previous = self.active_index
+        
+        if previous == self.index_name:
+            # Ancien index non aliasé : il porte le nom de l'alias et doit
+            # disparaître avant la création de celui-ci
+            self._drop_index(previous)
+            self.redis_client.ft(index).aliasadd(self.index_name)
+        elif previous:
+            self.redis_client.ft(index).aliasupdate(self.index_name)
+        else:
+            self.redis_client.ft(index).aliasadd(self.index_name)
+        
+        if self.write_manifest.key != self.manifest.key:
+            if self.redis_client.exists(self.write_manifest.key):
+                self.redis_client.rename(self.write_manifest.key, self.manifest.key)
+            else:
+                self.redis_client.unlink(self.manifest.key)
+        
+        self.active_index = index
+        self._apply_index_metadata(index)
+        logger.info(f"🔀 Alias {self.index_name} -> {index}")
+        
+        if previous and previous != self.index_name:
+            self._drop_index(previous)
+    
+    def _drop_index(self, index: str) -> None:
+        """Supprime un index physique, ses documents et ses métadonnées"""
+        try:
+            # Suppression de l'index d'abord pour ne pas désindexer clé par clé
+            self.redis_client.ft(index).dropindex(delete_documents=False)
+        except ResponseError:
+            pass
+        deleted = self.clear_documents(index)
+        self.redis_client.unlink(f"index_meta:{index}")
+        logger.info(f"🗑️ Index {index} supprimé ({deleted} clés)")
+    
+    def load_documents(self, docs_path: str, incremental: bool = False,
+                       distributed: bool = False) -> Dict:
         """Charge les documents depuis le chemin spécifié dans Redis
         
+        Sans ``incremental``, un nouvel index est construit à côté de l'index
+        actif (dimension mesurée sur le modèle courant), puis l'alias bascule
+        vers lui : les recherches ne sont jamais interrompues, même lors d'un
+        changement de modèle.
+        
         Args:
             docs_path: Chemin vers les documents
-            incremental: Si True, ajoute les documents sans recréer l'index
+            incremental: Si True, n'indexe que les fichiers nouveaux ou modifiés
+                et supprime ceux qui ont disparu, sans recréer l'index
+            distributed: Si True, les fichiers sont traités par des workers
+                via un flux Redis (voir ``_distribute`` et ``run_worker``)
+            
+        Returns:
+            Compteurs de l'ingestion (voir ``_ingest``)
         """
         docs_path = Path(docs_path)
         if not docs_path.exists():
             raise ValueError(f"Le chemin {docs_path} n'existe pas")
         
-        # Création de l'index seulement si nécessaire
+        if self.vector_store == 'local':
+            if distributed:
+                raise ValueError("L'ingestion répartie nécessite Redis Stack")
+            return self._build_local_store(docs_path, incremental)
+        
+        dim = self.probe_dimension()
+        ingest = self._distribute if distributed else self._ingest
+        
+        if incremental and self.active_index:
+            # L'index existant doit correspondre au modèle courant
+            meta = self.get_index_metadata(self.active_index)
+            if meta and (int(meta['dim']) != dim or not self.embedding_backend.matches(
+                    meta['model_id'], meta.get('served_model'))):
+                raise RuntimeError(
+                    self._model_mismatch(f"L'index {self.active_index}", meta['model_id'],
+                                         meta.get('served_model'), meta['dim'], dim)
+                    + " Relancez sans --incremental pour reconstruire l'index."
+                )
+            logger.info(f"✅ Utilisation de l'index existant {self.active_index}")
+            self.vector_dim = dim
+            return ingest(docs_path, incremental=True)
+        
+        # Construction d'un nouvel index physique, puis bascule de l'alias
+        index = f"{self.index_name}_{time.strftime('%Y%m%d%H%M%S')}"
+        logger.info(f"📑 Création de l'index vectoriel {index}...")
+        self._create_vector_index(index, dim)
+        
+        self.write_index = index
+        self.write_manifest = IngestionManifest(self.redis_client, index)
+        self._apply_index_metadata(index)
         try:
-            self.redis_client.ft(self.index_name).info()
-            if not incremental:
-                print("🗑️ Nettoyage de la base...")
-                self.redis_client.ft(self.index_name).dropindex()
-                print("📑 Création d'un nouvel index vectoriel...")
-                self._create_vector_index()
-            else:
-                print("✅ Utilisation de l'index existant")
-        except:
-            print("📑 Création de l'index vectoriel...")
-            self._create_vector_index()
+            if not self.active_index:
+                # Aucun index à préserver : l'alias pointe tout de suite vers le nouveau
+                self._activate_index(index)
+                self.write_manifest = self.manifest
+            stats = ingest(docs_path, incremental=incremental)
+            if self.active_index != index:
+                self._activate_index(index)
+            return stats
+        except BaseException:
+            if self.active_index != index:
+                logger.error(f"❌ Construction interrompue, l'alias reste sur {self.active_index}")
+                self._drop_index(index)
+                self.redis_client.unlink(self.write_manifest.key)
+            raise
+        finally:
+            self.write_index = self.active_index
+            self.write_manifest = self.manifest
+            self._apply_index_metadata(self.active_index)
+    
+    def _build_local_store(self, docs_path: Path, incremental: bool) -> Dict:
+        """Construit le stockage local à partir des documents
+        
+        Le stockage est réécrit en flux à côté de l'ancien puis substitué.
+        Avec ``incremental``, les documents inchangés (date et taille, ou
+        empreinte) et ceux hors de ``docs_path`` sont recopiés sans être
+        ré-encodés ; les fichiers disparus ne sont pas repris.
         
-        print(f"\n📂 Chargement des documents depuis {docs_path}")
+        Returns:
+            Compteurs de l'ingestion (voir ``_ingest``)
+        """
+        logger.info(f"📂 Chargement des documents depuis {docs_path} (stockage local)")
+        start = time.perf_counter()
+        dim = self.probe_dimension()
+        backend = self.embedding_backend
+        
+        previous = self.store if incremental else None
+        if previous is not None:
+            self._check_local_model(previous, dim)
         
-        # Extensions supportées
-        supported_extensions = {'.md', '.txt', '.rst', '.yaml', '.yml', '.pdf'}
-        files_processed = 0
+        files = self._list_files(docs_path)
+        current = {str(f) for f in files}
+        stats = {'processed': 0, 'skipped': 0, 'unchanged': 0, 'seen': 0,
+                 'total': len(files), 'removed': 0}
+        writer = LocalStoreWriter(self.local_store_path, dim, backend.model_id,
+                                  quantization=self.local_quantization,
+                                  served_model=backend.served_model)
+        try:
+            kept, digests = set(), {}
+            for path, document in (previous.files.items() if previous is not None else ()):
+                if not (Path(path) == docs_path or Path(path).is_relative_to(docs_path)):
+                    writer.copy_document(previous, document)
+                elif path not in current:
+                    stats['removed'] += 1
+                else:
+                    try:
+                        if IngestionManifest.is_unchanged(document, file_stat(Path(path))):
+                            writer.copy_document(previous, document)
+                            kept.add(path)
+                            stats['skipped'] += 1
+                            continue
+                    except OSError:
+                        pass
+                    digests[path] = document['digest']
+            
+            pending = []
+            pending_chunks = 0
+            flush_size = max(self.embedding_batch_size * self.embedding_concurrency, 1)
+            for result in self._extract_files([f for f in files if str(f) not in kept], digests):
+                stats['seen'] += 1
+                if result.get('duration') is not None:
+                    self.metrics.observe('extraction', result['duration'])
+                if result['status'] == 'error':
+                    self.metrics.incr('files_failed')
+                    logger.error(f"❌ Erreur lors du chargement de {result['path']}: {result['error']}")
+                elif result['status'] == 'unchanged':
+                    # Date modifiée mais contenu identique : recopie sans ré-encodage
+                    writer.copy_document(previous, previous.files[result['path']], **result['stat'])
+                    stats['unchanged'] += 1
+                elif result['status'] == 'empty':
+                    logger.warning(f"⚠️ Fichier vide: {Path(result['path']).name}")
+                else:
+                    pending.append(result)
+                    pending_chunks += len(result['chunks'])
+                    if pending_chunks >= flush_size:
+                        stats['processed'] += len(self._write_local_documents(writer, pending))
+                        pending = []
+                        pending_chunks = 0
+            if pending:
+                stats['processed'] += len(self._write_local_documents(writer, pending))
+            writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+        
+        self._open_local_store()
+        self._log_ingestion(stats)
+        self.metrics.observe('ingestion', time.perf_counter() - start)
+        return stats
+    
+    def _check_local_model(self, store: LocalVectorStore, dim: int) -> None:
+        """Vérifie que le stockage local a été construit avec le modèle courant"""
+        if store.dim != dim or not self.embedding_backend.matches(store.model_id, store.served_model):
+            raise RuntimeError(
+                self._model_mismatch(f"Le stockage {self.local_store_path}", store.model_id,
+                                     store.served_model, store.dim, dim)
+                + " Relancez sans --incremental."
+            )
+    
+    def _open_local_store(self) -> None:
+        """Ouvre le stockage local qui vient d'être écrit, à la place du précédent"""
+        if self.store is not None:
+            self.store.close()
+        self.store = LocalVectorStore(self.local_store_path, self.rescore_candidates)
+        self.vector_dim = self.store.dim
+        self._adopt_served_model(self.store.served_model)
+    
+    def _write_local_documents(self, writer: LocalStoreWriter, results: List[Dict]) -> List[str]:
+        """Encode les passages d'un lot d'extractions et les ajoute au stockage local
         
-        # Gestion des fichiers uniques vs dossiers
+        Returns:
+            Chemins des documents ajoutés
+        """
+        embeddings = self.get_embeddings([
+            chunk['content'] for result in results for chunk in result['chunks']
+        ])
+        position = 0
+        stored = []
+        for result in results:
+            chunks = result['chunks']
+            file_path = Path(result['path'])
+            doc_embeddings = embeddings[position:position + len(chunks)]
+            position += len(chunks)
+            if any(embedding is None for embedding in doc_embeddings):
+                logger.error(f"❌ Erreur lors du chargement de {file_path}: Impossible de générer l'embedding")
+                continue
+            mismatched = [len(e) for e in doc_embeddings if len(e) != writer.dim]
+            if mismatched:
+                logger.error(f"❌ {file_path.name} refusé: embedding de dimension {mismatched[0]}, "
+                             f"le stockage local attend {writer.dim}")
+                continue
+            
+            writer.add_document({
+                'full_path': result['path'],
+                'title': file_path.stem,
+                'source': file_path.suffix[1:],
+                'category': file_path.parent.name,
+                'doc_id': hashlib.md5(result['path'].encode()).hexdigest(),
+                'digest': result['digest'],
+                **result['stat']
+            }, chunks, doc_embeddings)
+            stored.append(result['path'])
+            self.metrics.incr('chunks_indexed', len(chunks))
+            logger.debug(f"✅ {file_path.name} chargé avec succès ({len(chunks)} passages)")
+        self.metrics.incr('documents_indexed', len(stored))
+        return stored
+    
+    def _list_files(self, docs_path: Path) -> List[Path]:
+        """Fichiers supportés d'un dossier (récursivement) ou fichier unique"""
         if docs_path.is_file():
-            files = [docs_path] if docs_path.suffix.lower() in supported_extensions else []
-        else:
-            files = [f for f in docs_path.rglob('*') if f.suffix.lower() in supported_extensions]
+            return [docs_path] if docs_path.suffix.lower() in SUPPORTED_EXTENSIONS else []
+        return [f for f in docs_path.rglob('*') if f.suffix.lower() in SUPPORTED_EXTENSIONS]
+    
+    def _ingest(self, docs_path: Path, incremental: bool) -> Dict:
+        """Extrait, découpe, encode et écrit les documents dans ``write_index``
+        
+        Returns:
+            Compteurs de l'ingestion (``processed``, ``skipped``,
+            ``unchanged``, ``removed``, ``total``)
+        """
+        logger.info(f"📂 Chargement des documents depuis {docs_path}")
+        start = time.perf_counter()
         
+        files = self._list_files(docs_path)
         total_files = len(files)
-        print(f"📁 {total_files} fichiers trouvés à traiter")
+        logger.info(f"📁 {total_files} fichiers trouvés à traiter")
+        
+        # Manifeste des fichiers déjà indexés (chemin, date, taille, empreinte)
+        previous = self.write_manifest.load()
+        
+        stats = {'processed': 0, 'skipped': 0, 'unchanged': 0, 'seen': 0, 'total': total_files}
+        self._process_files(files, previous, incremental, stats)
+        
+        removed = self._remove_missing(docs_path, previous, {str(f) for f in files})
+        stats['removed'] = len(removed)
+        self._log_ingestion(stats)
+        self.metrics.observe('ingestion', time.perf_counter() - start)
+        return stats
+    
+    def _process_files(self, files: List[Path], previous: Dict[str, Dict],
+                       incremental: bool, stats: Dict,
+                       outcomes: Optional[Dict[str, str]] = None) -> None:
+        """Extrait en parallèle puis encode et écrit une liste de fichiers
+        
+        Pipeline producteur/consommateur : les processus extraient et
+        découpent, une file bornée alimente le thread d'embedding/écriture.
+        
+        Args:
+            previous: Entrées du manifeste des fichiers (absentes si nouveaux)
+            incremental: Si True, les fichiers inchangés ne sont pas relus
+            stats: Compteurs de l'ingestion, mis à jour
+            outcomes: Si fourni, reçoit par chemin l'issue du fichier
+                (``processed``, ``skipped``, ``unchanged``, ``empty``, ou
+                ``failed`` pour un échec définitif) ; un fichier absent peut
+                être retenté
+        """
+        results = queue.Queue(maxsize=max(self.ingestion_queue_size, 1))
+        consumer = threading.Thread(
+            target=self._ingestion_consumer,
+            args=(results, previous, stats, outcomes),
+            daemon=True
+        )
+        consumer.start()
+        
+        def changed_files():
+            for file_path in files:
+                entry = previous.get(str(file_path))
+                # Fichier inchangé (date et taille) : rien à relire
+                if incremental and entry:
+                    try:
+                        if IngestionManifest.is_unchanged(entry, file_stat(file_path)):
+                            stats['skipped'] += 1
+                            if outcomes is not None:
+                                outcomes[str(file_path)] = 'skipped'
+                            continue
+                    except OSError:
+                        pass
+                yield file_path
+        
+        digests = {path: entry.get('digest') for path, entry in previous.items()} if incremental else {}
+        try:
+            for result in self._extract_files(changed_files(), digests):
+                results.put(result)
+        finally:
+            results.put(None)
+            consumer.join()
+    
+    def _extract_files(self, files: Iterable[Path], digests: Dict[str, str]) -> Iterator[Dict]:
+        """Extrait et découpe des fichiers dans un pool de processus
+        
+        Au plus deux extractions par processus sont en cours : la mémoire
+        reste bornée quel que soit le nombre de fichiers.
+        
+        Args:
+            digests: Empreintes connues par chemin ; un fichier dont le
+                contenu n'a pas changé est rendu avec le statut ``unchanged``
+        
+        Yields:
+            Résultats de ``extract_document``, dans l'ordre d'achèvement :
+            un PDF lent ne bloque pas les autres fichiers
+        """
+        max_in_flight = self.extraction_workers * 2
+        with ProcessPoolExecutor(max_workers=self.extraction_workers) as executor:
+            in_flight = set()
+            for file_path in files:
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                
+                in_flight.add(executor.submit(
+                    extract_document,
+                    str(file_path),
+                    self.chunk_size,
+                    self.chunk_overlap,
+                    digests.get(str(file_path))
+                ))
+            
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+    
+    def _remove_missing(self, docs_path: Path, previous: Dict[str, Dict],
+                        current_paths: set) -> List[str]:
+        """Supprime de l'index les fichiers disparus du chemin indexé
+        
+        Returns:
+            Chemins des fichiers supprimés
+        """
+        removed = [
+            path for path in previous
+            if path not in current_paths
+            and (Path(path) == docs_path or Path(path).is_relative_to(docs_path))
+            and not Path(path).exists()
+        ]
+        pipe = self.redis_client.pipeline(transaction=False)
+        for path in removed:
+            entry = previous[path]
+            self._delete_chunks(entry['doc_id'], 0, entry.get('chunks', 0), pipe=pipe)
+            if len(pipe) >= self.redis_write_batch_size:
+                pipe.execute()
+        self.write_manifest.remove(removed, pipe=pipe)
+        pipe.execute()
+        return removed
+    
+    def _log_ingestion(self, stats: Dict) -> None:
+        """Journalise et comptabilise le bilan d'une ingestion"""
+        skipped = stats['skipped'] + stats['unchanged']
+        self.metrics.incr('files_unchanged', skipped)
+        self.metrics.incr('files_removed', stats['removed'])
+        if skipped:
+            logger.info(f"⏭️ {skipped} fichiers inchangés ignorés")
+        if stats['removed']:
+            logger.info(f"🗑️ {stats['removed']} fichiers supprimés de l'index")
+        logger.info(f"📊 Total: {stats['processed']}/{stats['total'] - skipped} documents chargés")
+    
+    def watch_documents(self, docs_path: str, debounce: float = 2.0,
+                        poll_interval: float = 10.0, polling: bool = False) -> Iterator[Dict]:
+        """Maintient l'index à jour au fil des modifications des documents
+        
+        Les notifications du système de fichiers (watchdog : inotify,
+        FSEvents...) alimentent un tampon ; chaque rafale de changements,
+        une fois calme depuis ``debounce`` secondes, est appliquée à l'index
+        actif : seuls les fichiers touchés sont relus et ré-encodés, les
+        fichiers supprimés sont retirés. Sans watchdog (ou avec ``polling``),
+        les dates et tailles sont comparées toutes les ``poll_interval``
+        secondes, sans relire les fichiers.
+        
+        L'index doit déjà exister (``load_documents`` au préalable pour
+        rattraper les changements survenus hors surveillance). Avec le
+        stockage local, chaque rafale est appliquée de même par
+        ``_apply_local_changes``.
+        
+        Yields:
+            Compteurs de chaque mise à jour (voir ``_ingest``), plus
+            ``duration`` en secondes
+        """
+        docs_path = Path(docs_path)
+        if not docs_path.exists():
+            raise ValueError(f"Le chemin {docs_path} n'existe pas")
+        if self.vector_store == 'local':
+            self._require_store()
+            apply_changes = self._apply_local_changes
+        elif not self.active_index:
+            raise RuntimeError(f"L'index {self.index_name} n'existe pas, chargez d'abord les documents")
+        else:
+            apply_changes = self._apply_changes
+        
+        def accept(path: str) -> bool:
+            return (Path(path).suffix.lower() in SUPPORTED_EXTENSIONS
+                    and (docs_path.is_dir() or Path(path) == docs_path))
+        
+        buffer = ChangeBuffer()
+        watcher = None if polling else start_watchdog(docs_path, buffer, accept)
+        if watcher is None:
+            if not polling:
+                logger.warning("⚠️ watchdog n'est pas installé, surveillance par scrutation "
+                               f"toutes les {poll_interval:g}s")
+            watcher = PollingWatcher(docs_path, buffer, accept, interval=poll_interval)
+            watcher.start()
+        logger.info(f"👀 Surveillance de {docs_path}")
         
-        # Vérification des documents existants
-        existing_docs = set()
-        if incremental:
+        try:
+            while True:
+                paths = buffer.wait(debounce)
+                start = time.perf_counter()
+                stats = apply_changes(docs_path, paths, accept)
+                stats['duration'] = time.perf_counter() - start
+                self.metrics.observe('watch_update', stats['duration'])
+                yield stats
+        finally:
+            watcher.stop()
+    
+    def _resolve_changes(self, paths: set, accept) -> tuple:
+        """Répartit les chemins d'une rafale de changements
+        
+        Returns:
+            Tuple (fichiers surveillés à relire, chemins disparus)
+        """
+        files, missing = [], []
+        for path in sorted(paths):
+            candidate = Path(path)
+            if candidate.is_dir():
+                # Dossier déplacé ou copié dans l'arborescence : tous ses fichiers
+                files.extend(self._list_files(candidate))
+            elif candidate.is_file():
+                if accept(path):
+                    files.append(candidate)
+            else:
+                missing.append(candidate)
+        return list(dict.fromkeys(files)), missing
+    
+    def _apply_changes(self, docs_path: Path, paths: set, accept) -> Dict:
+        """Ré-indexe ou supprime les documents touchés par une rafale de changements
+        
+        Args:
+            paths: Fichiers ou dossiers créés, modifiés, déplacés ou supprimés
+            accept: Filtre des fichiers surveillés
+        """
+        files, missing = self._resolve_changes(paths, accept)
+        
+        previous = {path: entry for path, entry in
+                    self.write_manifest.get_many([str(f) for f in files]).items() if entry}
+        stats = {'processed': 0, 'skipped': 0, 'unchanged': 0, 'seen': 0, 'total': len(files)}
+        if files:
+            self._process_files(files, previous, True, stats)
+        
+        gone = {}
+        if missing:
+            known = {path: entry for path, entry in
+                     self.write_manifest.get_many([str(p) for p in missing]).items() if entry}
+            if len(known) < len(missing):
+                # Un dossier supprimé ou déplacé : ses fichiers sont dans le manifeste
+                known = self.write_manifest.load()
+            gone = {path: entry for path, entry in known.items()
+                    if any(Path(path) == root or Path(path).is_relative_to(root) for root in missing)}
+        stats['removed'] = len(self._remove_missing(docs_path, gone, set())) if gone else 0
+        self._log_ingestion(stats)
+        return stats
+    
+    def _apply_local_changes(self, docs_path: Path, paths: set, accept) -> Dict:
+        """Applique une rafale de changements au stockage local
+        
+        Seuls les fichiers touchés sont relus et ré-encodés, sans parcourir
+        l'arborescence ; les autres documents sont recopiés tels quels
+        (octets bruts, sans décodage ni normalisation) dans le nouveau
+        stockage, substitué à l'ancien. Un fichier en échec garde sa version
+        précédente.
+        
+        Args:
+            paths: Fichiers ou dossiers créés, modifiés, déplacés ou supprimés
+            accept: Filtre des fichiers surveillés
+        """
+        files, missing = self._resolve_changes(paths, accept)
+        store = self._require_store()
+        stats = {'processed': 0, 'skipped': 0, 'unchanged': 0, 'seen': 0,
+                 'total': len(files), 'removed': 0}
+        
+        # Fichiers supprimés, ou contenus dans un dossier supprimé ou déplacé
+        dropped = {path for path in store.files
+                   if any(Path(path) == root or Path(path).is_relative_to(root) for root in missing)}
+        stats['removed'] = len(dropped)
+        
+        changed, digests = [], {}
+        for file_path in files:
+            document = store.files.get(str(file_path))
+            if document is not None:
+                try:
+                    if IngestionManifest.is_unchanged(document, file_stat(file_path)):
+                        stats['skipped'] += 1
+                        continue
+                except OSError:
+                    pass
+                digests[str(file_path)] = document['digest']
+            changed.append(file_path)
+        
+        pending, updates = [], {}
+        for result in self._extract_files(changed, digests):
+            stats['seen'] += 1
+            if result.get('duration') is not None:
+                self.metrics.observe('extraction', result['duration'])
+            if result['status'] == 'error':
+                self.metrics.incr('files_failed')
+                logger.error(f"❌ Erreur lors du chargement de {result['path']}: {result['error']}")
+            elif result['status'] == 'unchanged':
+                # Date modifiée mais contenu identique : seule l'entrée change
+                updates[result['path']] = result['stat']
+                stats['unchanged'] += 1
+            elif result['status'] == 'empty':
+                logger.warning(f"⚠️ Fichier vide: {Path(result['path']).name}")
+                dropped.add(result['path'])
+            else:
+                pending.append(result)
+        
+        if pending or updates or dropped:
+            writer = LocalStoreWriter(self.local_store_path, store.dim, store.model_id,
+                                      quantization=store.quantization,
+                                      served_model=store.served_model or self.embedding_backend.served_model)
             try:
-                query = Query("*").dialect(2)
-                results = self.redis_client.ft(self.index_name).search(query)
-                existing_docs = {doc.full_path for doc in results.docs}
-            except:
+                stored = set(self._write_local_documents(writer, pending))
+                if stored:
+                    # Le modèle servi est connu après l'encodage
+                    self._check_local_model(store, store.dim)
+                for path, document in store.files.items():
+                    if path not in stored and path not in dropped:
+                        writer.copy_document(store, document, **updates.get(path, {}))
+                writer.commit()
+            except BaseException:
+                writer.abort()
+                raise
+            stats['processed'] = len(stored)
+            self._open_local_store()
+        
+        self._log_ingestion(stats)
+        return stats
+    
+    def _distribute(self, docs_path: Path, incremental: bool) -> Dict:
+        """Coordonne une ingestion répartie sur des workers via un flux Redis
+        
+        Les fichiers nouveaux ou modifiés sont publiés, un par tâche, dans le
+        flux ``ingest:<alias>`` ; les workers (``run_worker``, sur une ou
+        plusieurs machines) les extraient, encodent et écrivent dans
+        ``write_index`` puis acquittent. Le coordinateur attend que toutes les
+        tâches soient acquittées et supprime les fichiers disparus.
+        
+        Returns:
+            Compteurs de l'ingestion (voir ``_ingest``)
+        """
+        logger.info(f"📂 Distribution des documents de {docs_path}")
+        start = time.perf_counter()
+        
+        files = self._list_files(docs_path)
+        previous = self.write_manifest.load()
+        stats = {'processed': 0, 'skipped': 0, 'unchanged': 0, 'seen': 0, 'total': len(files)}
+        
+        # Les fichiers inchangés (date et taille) ne sont pas publiés
+        tasks = []
+        for file_path in files:
+            entry = previous.get(str(file_path))
+            try:
+                if incremental and entry and IngestionManifest.is_unchanged(entry, file_stat(file_path)):
+                    stats['skipped'] += 1
+                    continue
+            except OSError:
                 pass
+            tasks.append(str(file_path))
         
-        for i, file_path in enumerate(files, 1):
-            # Skip si le document existe déjà en mode incrémental
-            if incremental and str(file_path) in existing_docs:
-                print(f"\n[{i}/{total_files}] ⏭️ {file_path.name} déjà présent, ignoré")
+        stream = stream_key(self.index_name)
+        ensure_group(self.redis_client, stream)
+        job_id = create_job(self.redis_client, self.index_name, {
+            'index': self.write_index,
+            'manifest': self.write_manifest.key[len("manifest:"):],
+            'chunk_size': self.chunk_size,
+            'chunk_overlap': self.chunk_overlap,
+            'incremental': int(incremental),
+            'tasks': len(tasks)
+        }, ttl=self.ingestion_job_ttl)
+        key = job_key(self.index_name, job_id)
+        
+        try:
+            publish_tasks(self.redis_client, stream, job_id, tasks, self.redis_write_batch_size)
+            logger.info(f"📤 Job {job_id}: {len(tasks)} fichiers publiés dans {stream}"
+                        f" ({stats['skipped']} inchangés)")
+            
+            # Attente des acquittements, le job étant prolongé tant qu'il est suivi
+            acked = -1
+            while True:
+                job = load_job(self.redis_client, self.index_name, job_id)
+                if job is None:
+                    raise RuntimeError(f"Le job {job_id} a expiré avant la fin de l'ingestion")
+                if int(job['acked']) != acked:
+                    acked = int(job['acked'])
+                    logger.info(f"⏳ Job {job_id}: {acked}/{len(tasks)} fichiers traités"
+                                f" ({job['failed']} en échec)")
+                if acked >= len(tasks):
+                    break
+                self.redis_client.expire(key, self.ingestion_job_ttl)
+                time.sleep(self.ingestion_poll_interval)
+        finally:
+            # Un job annulé est ignoré par les workers qui n'ont pas encore lu ses tâches
+            self.redis_client.unlink(key)
+        
+        for counter in ('processed', 'skipped', 'unchanged'):
+            stats[counter] += int(job[counter])
+        stats['seen'] = acked
+        self.metrics.incr('files_failed', int(job['failed']))
+        
+        removed = self._remove_missing(docs_path, previous, {str(f) for f in files})
+        stats['removed'] = len(removed)
+        self._log_ingestion(stats)
+        self.metrics.observe('ingestion', time.perf_counter() - start)
+        return stats
+    
+    def run_worker(self, name: Optional[str] = None, block_ms: int = 5000,
+                   max_deliveries: int = 3, min_idle_ms: int = 60000,
+                   exit_when_idle: bool = False) -> None:
+        """Traite les tâches d'ingestion publiées par un coordinateur
+        
+        Le worker rejoint le groupe de consommateurs du flux de l'alias, lit
+        des lots de tâches, les traite comme ``_ingest`` (extraction
+        parallèle, embedding, écriture pipelinée) et acquitte chaque fichier
+        traité. Une tâche en échec transitoire (embedding, écriture) reste en
+        attente et est reprise, par ce worker ou un autre, après
+        ``min_idle_ms`` ; elle est abandonnée après ``max_deliveries``
+        livraisons. Les fichiers doivent être accessibles au même chemin que
+        sur le coordinateur (montage partagé).
+        
+        Args:
+            name: Nom du consommateur (défaut : machine et PID)
+            block_ms: Attente maximale (ms) de nouvelles tâches par lecture
+            max_deliveries: Nombre de livraisons avant abandon d'une tâche
+            min_idle_ms: Délai (ms) avant reprise d'une tâche non acquittée
+            exit_when_idle: S'arrête dès que le flux est vide
+        """
+        if self.redis_client is None:
+            raise ValueError("L'ingestion répartie nécessite Redis Stack")
+        name = name or default_worker_name()
+        stream = stream_key(self.index_name)
+        ensure_group(self.redis_client, stream)
+        batch_size = max(self.extraction_workers * 4, self.embedding_batch_size)
+        # Fait connaître le modèle servi, comparé à celui de chaque index
+        self.probe_dimension()
+        logger.info(f"👷 Worker {name} en attente de tâches sur {stream}")
+        
+        while True:
+            messages = read_tasks(self.redis_client, stream, name, batch_size,
+                                  block_ms, min_idle_ms)
+            if not messages:
+                if exit_when_idle:
+                    return
                 continue
-                
-            print(f"\n[{i}/{total_files}] Traitement de {file_path.name}...")
+            
+            by_job = {}
+            for message_id, fields in messages:
+                by_job.setdefault(fields.get('job'), []).append((message_id, fields['path']))
+            
+            for job_id, tasks in by_job.items():
+                job = load_job(self.redis_client, self.index_name, job_id)
+                if job is None or not self.get_index_metadata(job['index']):
+                    # Job annulé ou expiré, ou index supprimé : ses tâches sont obsolètes
+                    acknowledge(self.redis_client, stream, [m for m, _ in tasks])
+                    logger.warning(f"⚠️ {len(tasks)} tâches du job {job_id} ignorées (job inconnu)")
+                    continue
+                self._run_tasks(stream, name, job_id, job, tasks, max_deliveries, min_idle_ms)
+    
+    def _run_tasks(self, stream: str, consumer: str, job_id: str, job: Dict,
+                   tasks: List[tuple], max_deliveries: int, min_idle_ms: int) -> None:
+        """Traite un lot de tâches d'un job puis acquitte celles qui sont terminées
+        
+        Les tâches du lot sont réclamées à nouveau (XCLAIM) pendant le
+        traitement pour qu'aucun autre worker ne les reprenne ; si l'une l'a
+        été malgré tout, seul le premier acquittement compte dans le job.
+        
+        Args:
+            consumer: Nom du worker dans le groupe de consommateurs
+            job: Paramètres du job (index cible, manifeste, découpage)
+            tasks: Liste de tuples (identifiant du message, chemin du fichier)
+            min_idle_ms: Délai de reprise des tâches par les autres workers
+        """
+        index = job['index']
+        meta = self.get_index_metadata(index)
+        if meta.get('model_id') and not self.embedding_backend.matches(
+                meta['model_id'], meta.get('served_model')):
+            backend = self.embedding_backend
+            raise RuntimeError(
+                f"L'index {index} est construit avec le modèle "
+                f"{describe_model(meta['model_id'], meta.get('served_model'))}, "
+                f"ce worker utilise {describe_model(backend.model_id, backend.served_model)}"
+            )
+        
+        # Le worker écrit dans l'index et le manifeste du job, avec son découpage
+        settings = (self.chunk_size, self.chunk_overlap)
+        self.write_index = index
+        self.write_manifest = IngestionManifest(self.redis_client, job['manifest'])
+        self._apply_index_metadata(index)
+        self.chunk_size = int(job['chunk_size'])
+        self.chunk_overlap = int(job['chunk_overlap'])
+        incremental = job['incremental'] == '1'
+        
+        paths = list(dict.fromkeys(path for _, path in tasks))
+        previous = {path: entry for path, entry in self.write_manifest.get_many(paths).items() if entry}
+        stats = {'processed': 0, 'skipped': 0, 'unchanged': 0, 'seen': 0, 'total': len(paths)}
+        outcomes = {}
+        renewer = ClaimRenewer(self.redis_client, stream, consumer, [m for m, _ in tasks],
+                               interval=max(min_idle_ms / 3000, 1.0))
+        renewer.start()
+        try:
+            self._process_files([Path(path) for path in paths], previous, incremental, stats, outcomes)
+        finally:
+            renewer.stop()
+            renewer.join()
+            self.chunk_size, self.chunk_overlap = settings
+            self.write_index = self.active_index
+            self.write_manifest = self.manifest
+            self._apply_index_metadata(self.active_index)
+        
+        # Échec transitoire : nouvelle tentative tant que la limite n'est pas atteinte
+        retry = [m for m, path in tasks if path not in outcomes]
+        deliveries = delivery_counts(self.redis_client, stream, retry) if retry else {}
+        abandoned = [m for m in retry if deliveries.get(m, 0) >= max_deliveries]
+        done = [m for m, path in tasks if path in outcomes]
+        
+        # Seules les tâches acquittées par ce worker sont comptées dans le job
+        acked = set(acknowledge(self.redis_client, stream, done + abandoned))
+        counts = Counter(outcomes[path] for m, path in tasks if m in acked and path in outcomes)
+        counts['failed'] += sum(1 for m in abandoned if m in acked)
+        
+        key = job_key(self.index_name, job_id)
+        pipe = self.redis_client.pipeline(transaction=False)
+        for counter in ('processed', 'skipped', 'unchanged', 'failed'):
+            pipe.hincrby(key, counter, counts[counter])
+        pipe.hincrby(key, 'acked', len(acked))
+        pipe.execute()
+        
+        if len(acked) < len(done) + len(abandoned):
+            logger.warning(f"⚠️ {len(done) + len(abandoned) - len(acked)} tâches déjà acquittées "
+                           "par un autre worker")
+        
+        for message_id in abandoned:
+            logger.error(f"❌ Tâche {message_id} abandonnée après {deliveries[message_id]} tentatives")
+        if len(retry) > len(abandoned):
+            logger.warning(f"⚠️ {len(retry) - len(abandoned)} fichiers seront retentés")
+        logger.info(f"📊 Job {job_id}: {stats['processed']}/{len(tasks)} documents chargés par ce lot")
+    
+    def _ingestion_consumer(self, results: queue.Queue, previous: Dict[str, Dict], stats: Dict,
+                            outcomes: Optional[Dict[str, str]] = None) -> None:
+        """Consomme les extractions et les encode/écrit par lots
+        
+        Args:
+            results: File bornée des résultats d'extraction (None pour terminer)
+            previous: Entrées du manifeste avant ingestion
+            stats: Compteurs partagés avec le producteur (chaque thread
+                n'incrémente que ses propres clés)
+            outcomes: Issue de chaque fichier (voir ``_process_files``)
+        """
+        pending = []
+        pending_chunks = 0
+        manifest_updates = {}
+        # Issue des fichiers dont seul le manifeste change, connue après son écriture
+        manifest_outcomes = {}
+        flush_size = max(self.embedding_batch_size * self.embedding_concurrency, 1)
+        
+        while True:
+            result = results.get()
+            if result is None:
+                break
             try:
-                # Lecture différente selon le type de fichier
-                if file_path.suffix.lower() == '.pdf':
-                    print("  📄 Lecture du PDF...")
-                    content = self._extract_pdf_content(file_path)
-                else:
-                    content = file_path.read_text(encoding='utf-8')
+                stats['seen'] += 1
+                path_key = result['path']
+                file_path = Path(path_key)
+                entry = previous.get(path_key)
                 
-                if not content.strip():
-                    print(f"  ⚠️ Fichier vide: {file_path.name}")
+                if result.get('duration') is not None:
+                    self.metrics.observe('extraction', result['duration'])
+                
+                if result['status'] == 'error':
+                    self.metrics.incr('files_failed')
+                    logger.error(f"❌ Erreur lors du chargement de {file_path}: {result['error']}")
+                    if outcomes is not None:
+                        outcomes[path_key] = 'failed'
                     continue
                 
-                embedding = self.get_embedding(content)
-                if embedding is None:
-                    raise ValueError("Impossible de générer l'embedding")
+                # Date modifiée mais contenu identique : seul le manifeste change
+                if result['status'] == 'unchanged':
+                    manifest_updates[path_key] = {**entry, **result['stat']}
+                    manifest_outcomes[path_key] = 'unchanged'
+                    stats['unchanged'] += 1
+                    continue
+                
+                logger.debug(f"[{stats['seen']}/{stats['total']}] Traitement de {file_path.name}...")
+                doc_id = hashlib.md5(path_key.encode()).hexdigest()
+                new_entry = {**result['stat'], 'digest': result['digest'],
+                             'doc_id': doc_id, 'chunks': len(result['chunks'])}
+                
+                if result['status'] == 'empty':
+                    logger.warning(f"⚠️ Fichier vide: {file_path.name}")
+                    if entry:
+                        self._delete_chunks(entry['doc_id'], 0, entry.get('chunks', 0))
+                    manifest_updates[path_key] = new_entry
+                    manifest_outcomes[path_key] = 'empty'
+                    continue
                 
-                doc_id = hashlib.md5(str(file_path).encode()).hexdigest()
+                logger.debug(f"✂️ {len(result['chunks'])} passages")
+                pending.append((file_path, result['chunks'], new_entry, entry))
+                pending_chunks += len(result['chunks'])
                 
-                self.redis_client.hset(
-                    f"{self.index_name}:{doc_id}",
+                if pending_chunks >= flush_size:
+                    stored = self._store_documents(pending)
+                    stats['processed'] += len(stored)
+                    if outcomes is not None:
+                        outcomes.update(dict.fromkeys(stored, 'processed'))
+                    pending = []
+                    pending_chunks = 0
+                    
+            except Exception as e:
+                logger.error(f"❌ Erreur lors de l'ingestion: {e}")
+        
+        try:
+            if pending:
+                stored = self._store_documents(pending)
+                stats['processed'] += len(stored)
+                if outcomes is not None:
+                    outcomes.update(dict.fromkeys(stored, 'processed'))
+            self.write_manifest.update(manifest_updates)
+            if outcomes is not None:
+                outcomes.update(manifest_outcomes)
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'ingestion: {e}")
+    
+    def clear_documents(self, index: str) -> int:
+        """Supprime en masse tous les documents d'un index physique
+        
+        Les clés sont parcourues par SCAN et supprimées par UNLINK (libération
+        asynchrone côté Redis) via un pipeline, par lots de
+        ``redis_write_batch_size`` clés.
+        
+        Returns:
+            Nombre de clés supprimées
+        """
+        deleted = 0
+        batch = []
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in self.redis_client.scan_iter(match=f"{index}:*",
+                                                count=self.redis_write_batch_size):
+            batch.append(key)
+            if len(batch) >= self.redis_write_batch_size:
+                pipe.unlink(*batch)
+                deleted += len(batch)
+                batch = []
+                # Un aller-retour toutes les 10 commandes UNLINK
+                if len(pipe) >= 10:
+                    pipe.execute()
+        if batch:
+            pipe.unlink(*batch)
+            deleted += len(batch)
+        pipe.execute()
+        return deleted
+    
+    def _delete_chunks(self, doc_id: str, start: int, end: int, pipe=None) -> None:
+        """Supprime les passages ``start`` à ``end - 1`` d'un document
+        
+        Args:
+            pipe: Pipeline Redis dans lequel ajouter la suppression (optionnel)
+        """
+        if end > start:
+            (pipe if pipe is not None else self.redis_client).unlink(*[
+                f"{self.write_index}:{doc_id}:{n}" for n in range(start, end)
+            ])
+    
+    def _store_documents(self, documents: List[tuple]) -> List[str]:
+        """Encode les passages d'un lot de documents et les enregistre dans Redis
+        
+        Chaque passage est stocké dans son propre hash ``<index>:<doc_id>:<n>``.
+        Les écritures passent par un pipeline non transactionnel vidé toutes
+        les ``redis_write_batch_size`` commandes. Les passages surnuméraires
+        d'une version précédente sont supprimés et le manifeste est mis à jour
+        pour chaque document enregistré.
+        
+        Args:
+            documents: Liste de tuples (chemin du fichier, passages,
+                nouvelle entrée du manifeste, entrée précédente ou None)
+            
+        Returns:
+            Chemins des documents entièrement enregistrés
+        """
+        embeddings = self.get_embeddings([
+            chunk['content'] for _, chunks, _, _ in documents for chunk in chunks
+        ])
+        position = 0
+        stored = []
+        pipe = self.redis_client.pipeline(transaction=False)
+        segment = {}
+        
+        for file_path, chunks, entry, previous in documents:
+            doc_embeddings = embeddings[position:position + len(chunks)]
+            position += len(chunks)
+            if any(embedding is None for embedding in doc_embeddings):
+                logger.error(f"❌ Erreur lors du chargement de {file_path}: Impossible de générer l'embedding")
+                continue
+            
+            # Refus des vecteurs dont la dimension ne correspond pas à l'index
+            mismatched = [len(e) for e in doc_embeddings if len(e) != self.vector_dim]
+            if mismatched:
+                logger.error(f"❌ {file_path.name} refusé: embedding de dimension {mismatched[0]}, "
+                      f"l'index {self.write_index} attend {self.vector_dim}")
+                continue
+            
+            doc_id = entry['doc_id']
+            
+            for n, (chunk, embedding) in enumerate(zip(chunks, doc_embeddings)):
+                pipe.hset(
+                    f"{self.write_index}:{doc_id}:{n}",
                     mapping={
-                        'content': content,
+                        'content': chunk['content'],
                         'title': file_path.stem,
                         'source': file_path.suffix[1:],
                         'category': file_path.parent.name,
                         'full_path': str(file_path),
-                        'embedding': np.array(embedding, dtype=np.float32).tobytes()
+                        'doc_id': doc_id,
+                        'chunk_index': n,
+                        'start_offset': chunk['start'],
+                        'end_offset': chunk['end'],
+                        'heading': chunk['heading'],
+                        'embedding': np.array(embedding, dtype=vector_dtype(self.vector_type)).tobytes()
                     }
                 )
-                
-                files_processed += 1
-                print(f"✅ {file_path.name} chargé avec succès")
-                
-            except Exception as e:
-                print(f"❌ Erreur lors du chargement de {file_path}: {e}")
-                continue
+            
+            if previous:
+                self._delete_chunks(doc_id, len(chunks), previous.get('chunks', 0), pipe=pipe)
+            
+            segment[str(file_path)] = entry
+            if len(pipe) >= self.redis_write_batch_size:
+                stored.extend(self._execute_writes(pipe, segment))
+                segment = {}
         
-        print(f"\n📊 Total: {files_processed}/{total_files} documents chargés")
+        if segment:
+            stored.extend(self._execute_writes(pipe, segment))
+        return stored
     
-    def _extract_pdf_content(self, pdf_path: Path) -> str:
-        """Extrait le texte d'un fichier PDF"""
+    def _execute_writes(self, pipe, segment: Dict[str, Dict]) -> List[str]:
+        """Exécute un pipeline d'écriture et enregistre ses documents au manifeste
+        
+        Args:
+            pipe: Pipeline contenant les écritures des documents de ``segment``
+            segment: Entrées du manifeste des documents écrits, par chemin
+            
+        Returns:
+            Chemins des documents enregistrés
+        """
         try:
-            # Méthode 1: Utiliser pdfplumber (meilleure qualité)
-            with pdfplumber.open(pdf_path) as pdf:
-                text_content = []
-                for page in pdf.pages:
-                    text_content.append(page.extract_text() or '')
-                return '\n\n'.join(text_content)
-                
+            self.write_manifest.update(segment, pipe=pipe)
+            with self.metrics.timer('redis_write'):
+                pipe.execute()
         except Exception as e:
-            print(f"  ⚠️ Erreur avec pdfplumber, tentative avec PyPDF2: {e}")
-            try:
-                # Méthode 2: Utiliser PyPDF2 (fallback)
-                with open(pdf_path, 'rb') as file:
-                    reader = PdfReader(file)
-                    text_content = []
-                    for page in reader.pages:
-                        text_content.append(page.extract_text() or '')
-                    return '\n\n'.join(text_content)
-                    
-            except Exception as e:
-                print(f"  ❌ Erreur lors de l'extraction du PDF: {e}")
-                return ""
+            pipe.reset()
+            logger.error(f"❌ Erreur lors de l'écriture de {len(segment)} documents dans Redis: {e}")
+            return []
+        
+        for path, entry in segment.items():
+            logger.debug(f"✅ {Path(path).name} chargé avec succès ({entry['chunks']} passages)")
+        self.metrics.incr('documents_indexed', len(segment))
+        self.metrics.incr('chunks_indexed', sum(entry['chunks'] for entry in segment.values()))
+        return list(segment)
     
-    def vector_search(self, query: str, top_k=3, category=None):
-        """Recherche vectorielle"""
-        try:
-            print("\n🔍 Recherche en cours...")
-            query_vector = self.get_embedding(query)
-            if query_vector is None:
-                raise ValueError("Impossible de générer l'embedding de la requête")
-            
-            print(f"✅ Embedding généré (dimension: {len(query_vector)})")
+    def _extract_pdf_content(self, pdf_path: Path) -> str:
+        """Extrait le texte d'un fichier PDF"""
+        return extract_pdf_content(pdf_path)
+    
+    def get_query_embedding(self, query: str):
+        """Obtient l'embedding d'une requête en passant par le cache"""
+        with self.metrics.timer('query_embedding'):
+            embedding = self.query_cache.get(query)
+            if embedding is not None:
+                return embedding
             
-            base_query = f"*=>[KNN {top_k} @embedding $query_vector AS score]"
-            if category:
-                base_query = f"@category:{{{category}}} {base_query}"
+            embedding = self.get_embedding(query)
+            served = self.embedding_backend.served_model
+            if embedding is not None and self.index_model and served and served != self.index_model:
+                raise ValueError(
+                    f"Le modèle d'embedding servi ({served}) n'est pas celui de l'index "
+                    f"({self.index_model}) : rechargez-le dans LM Studio ou reconstruisez l'index"
+                )
+            if embedding is not None:
+                self.query_cache.put(query, embedding)
+            return embedding
+    
+    def lookup_cached_answer(self, question: str, filters: Optional[Dict] = None) -> Optional[Dict]:
+        """Cherche une réponse déjà générée pour une question proche
+        
+        Args:
+            question: Question posée
+            filters: Paramètres de recherche (catégorie, top_k) que la
+                réponse en cache doit partager
             
-            print(f"🔎 Requête Redis: {base_query}")
+        Returns:
+            ``{'question', 'answer', 'sources', 'distance'}`` ou None si le
+            cache est désactivé ou ne contient pas de réponse valable
+        """
+        if self.answer_cache is None:
+            return None
+        query_vector = self.get_query_embedding(question)
+        if query_vector is None:
+            return None
+        with self.metrics.timer('answer_cache_lookup'):
+            return self.answer_cache.lookup(query_vector, filters)
+    
+    def cache_answer(self, question: str, answer: str, results: List[Dict],
+                     filters: Optional[Dict] = None) -> None:
+        """Enregistre une réponse générée dans le cache sémantique"""
+        if self.answer_cache is None:
+            return
+        query_vector = self.get_query_embedding(question)
+        if query_vector is not None:
+            self.answer_cache.store(question, query_vector, answer, results, filters)
+    
+    def complete(self, prompt: str, temperature: float = 0.7,
+                 max_tokens: Optional[int] = None) -> str:
+        """Génère une réponse complète de LM Studio (sans streaming)"""
+        with self.metrics.timer('llm_generation'):
+            response = self.session.post(
+                f"{self.llm_url}/chat/completions",
+                json={
+                    "messages": [
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": temperature,
+                    "max_tokens": max_tokens or self.max_answer_tokens
+                },
+                timeout=self.llm_timeout
+            )
+        if response.status_code != 200:
+            raise RuntimeError(f"Erreur lors de l'appel à LM Studio: {response.status_code}")
+        return response.json()['choices'][0]['message']['content']
+    
+    def stream_completion(self, prompt: str, temperature: float = 0.7,
+                          max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Génère une réponse de LM Studio token par token (server-sent events)
+        
+        Les statistiques de la génération (temps jusqu'au premier token,
+        durée totale, nombre de fragments) sont disponibles dans
+        ``last_generation_stats`` une fois le flux consommé.
+        
+        Args:
+            prompt: Prompt complet envoyé au modèle
+            temperature: Température d'échantillonnage
+            max_tokens: Nombre maximal de tokens générés (défaut : max_answer_tokens)
             
-            query = Query(base_query)\
-                .return_fields("content", "title", "source", "category", "full_path", "score")\
-                .dialect(2)\
-                .sort_by("score")\
-                .paging(0, top_k)
+        Yields:
+            Fragments de texte au fur et à mesure de leur génération
+        """
+        start = time.perf_counter()
+        first_token = None
+        fragments = 0
+        
+        response = self.session.post(
+            f"{self.llm_url}/chat/completions",
+            json={
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": temperature,
+                "max_tokens": max_tokens or self.max_answer_tokens,
+                "stream": True
+            },
+            stream=True,
+            timeout=self.llm_timeout
+        )
+        try:
+            if response.status_code != 200:
+                raise RuntimeError(f"Erreur lors de l'appel à LM Studio: {response.status_code}")
             
-            params_dict = {
-                "query_vector": np.array(query_vector, dtype=np.float32).tobytes()
+            for line in response.iter_lines():
+                # Décodage explicite : les flux SSE n'annoncent pas toujours leur charset
+                line = line.decode('utf-8').strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                
+                choices = json.loads(data).get('choices') or [{}]
+                token = (choices[0].get('delta') or {}).get('content')
+                if token:
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    fragments += 1
+                    yield token
+        finally:
+            response.close()
+            self.last_generation_stats = {
+                'time_to_first_token': first_token,
+                'total_time': time.perf_counter() - start,
+                'fragments': fragments
             }
+            if first_token is not None:
+                self.metrics.observe('llm_first_token', first_token)
+            self.metrics.observe('llm_generation', self.last_generation_stats['total_time'])
+    
+    def fetch_contents(self, results: List[Dict]) -> List[Dict]:
+        """Charge le contenu des passages qui ne l'ont pas encore
+        
+        Un seul pipeline ``HMGET`` pour tous les passages (lecture directe
+        dans le stockage local), seulement pour ceux qui entrent dans le
+        prompt plutôt que pour tous les candidats de la recherche.
+        """
+        with self.metrics.timer('fetch_contents'):
+            return self._require_store().fetch_contents(results)
+    
+    def build_context(self, question: str, results: List[Dict]):
+        """Remplit le budget de contexte du modèle avec les passages classés
+        
+        Les passages sont choisis d'après leur longueur, puis seul leur
+        contenu est chargé depuis Redis.
+        
+        Returns:
+            Tuple (contexte, passages effectivement utilisés)
+        """
+        with self.metrics.timer('context_assembly'):
+            selected = select_context(question, results, self.context_window, self.max_answer_tokens)
+            used = self.fetch_contents([r for r, _ in selected])
+            return format_context(selected), used
+    
+    def answer(self, question: str, top_k: int = 8, category=None,
+               stream: bool = False, temperature: float = 0.7) -> Dict:
+        """Répond à une question à partir de la documentation indexée
+        
+        Passe par le cache sémantique des réponses s'il est activé, sinon
+        recherche les passages pertinents, construit le contexte dans le
+        budget de tokens et interroge le modèle.
+        
+        Args:
+            question: Question posée
+            top_k: Nombre de passages candidats pour le contexte
+            category: Filtre optionnel sur la catégorie
+            stream: Si True, ``answer`` est un itérateur de fragments
+            temperature: Température d'échantillonnage
             
-            results = self.redis_client.ft(self.index_name).search(query, params_dict)
-            print(f"📊 Nombre de résultats: {len(results.docs)}")
-            
-            return [{
-                "content": doc.content,
-                "title": doc.title,
-                "source": doc.source,
-                "category": doc.category,
-                "full_path": doc.full_path,
-                "similarity": 1 - float(doc.score)
-            } for doc in results.docs]
+        Returns:
+            ``{'answer', 'sources', 'cached'}`` ; ``answer`` vaut None si
+            aucun document pertinent n'a été trouvé
+        """
+        self.metrics.incr('questions')
+        filters = {'category': category, 'top_k': top_k}
+        cached = self.lookup_cached_answer(question, filters)
+        if cached:
+            self.metrics.incr('answer_cache_hits')
+            return {
+                'answer': iter([cached['answer']]) if stream else cached['answer'],
+                'sources': cached['sources'],
+                'cached': True
+            }
+        
+        results = self.search(question, top_k=top_k, category=category)
+        if not results:
+            return {'answer': None, 'sources': [], 'cached': False}
+        
+        context, sources = self.build_context(question, results)
+        prompt = PROMPT_TEMPLATE.format(context=context, question=question)
+        
+        if stream:
+            answer = self._stream_and_cache(question, prompt, sources, temperature, filters)
+        else:
+            answer = self.complete(prompt, temperature=temperature)
+            self.cache_answer(question, answer, sources, filters)
+        
+        return {'answer': answer, 'sources': sources, 'cached': False}
+    
+    def _stream_and_cache(self, question: str, prompt: str, sources: List[Dict],
+                          temperature: float, filters: Optional[Dict] = None) -> Iterator[str]:
+        """Relaie le flux de génération puis met la réponse complète en cache"""
+        tokens = []
+        for token in self.stream_completion(prompt, temperature=temperature):
+            tokens.append(token)
+            yield token
+        self.cache_answer(question, "".join(tokens), sources, filters)
+    
+    def _require_store(self) -> VectorStore:
+        """Stockage interrogé ; le stockage local doit avoir été construit"""
+        if self.store is None:
+            raise RuntimeError(f"Aucun stockage local dans {self.local_store_path}, "
+                               "chargez d'abord les documents")
+        return self.store
+    
+    def _query_vector(self, query: str):
+        """Calcule l'embedding d'une requête et vérifie sa dimension"""
+        store = self._require_store()
+        query_vector = self.get_query_embedding(query)
+        if query_vector is None:
+            raise ValueError("Impossible de générer l'embedding de la requête")
+        
+        logger.debug(f"✅ Embedding généré (dimension: {len(query_vector)})")
+        if store.dim and len(query_vector) != store.dim:
+            raise ValueError(
+                f"L'embedding de la requête a {len(query_vector)} dimensions, "
+                f"{store.label} en attend {store.dim} : "
+                "le modèle d'embedding a changé, rechargez les documents"
+            )
+        return query_vector
+    
+    def search(self, query: str, top_k=3, category=None, ef_runtime=None):
+        """Recherche selon le mode du moteur (``search_mode``)
+        
+        Avec un reclassement (``rerank``), ``rerank_candidates`` candidats
+        sont recherchés puis reclassés, et les ``top_k`` meilleurs retenus.
+        """
+        self.metrics.incr('searches')
+        candidates = max(self.rerank_candidates, top_k) if self.rerank else top_k
+        if self.search_mode == 'hybrid':
+            results = self.hybrid_search(query, candidates, category, ef_runtime)
+        else:
+            results = self.vector_search(query, candidates, category, ef_runtime)
+        
+        if self.rerank and results:
+            results = self.rerank_results(query, results, top_k)
+        return results
+    
+    def fetch_vectors(self, results: List[Dict]) -> List[Optional[np.ndarray]]:
+        """Charge les vecteurs stockés des passages (un seul pipeline Redis)"""
+        return self._require_store().fetch_vectors(results)
+    
+    def rerank_results(self, query: str, results: List[Dict], top_k: int) -> List[Dict]:
+        """Reclasse des candidats par cosinus exact ou par cross-encoder
+        
+        Returns:
+            Les ``top_k`` meilleurs passages, avec leur score ``rerank_score``
+        """
+        with self.metrics.timer('rerank'):
+            if self.rerank == 'cross-encoder':
+                self.fetch_contents(results)
+                ranked = self.cross_encoder.rerank(query, results, top_k)
+            else:
+                ranked = cosine_rerank(self.get_query_embedding(query),
+                                       self.fetch_vectors(results), results, top_k)
+        logger.debug(f"⚖️ Reclassement ({self.rerank}) de {len(results)} candidats")
+        return ranked
+    
+    def vector_search(self, query: str, top_k=3, category=None, ef_runtime=None):
+        """Recherche vectorielle dans le stockage (``store``)
+        
+        Args:
+            ef_runtime: EF_RUNTIME de cette requête (défaut : celui du moteur,
+                sinon celui de l'index ; index HNSW uniquement)
+        """
+        try:
+            logger.debug("🔍 Recherche en cours...")
+            query_vector = self._query_vector(query)
+            with self.metrics.timer(f'{self.store.name}_search'):
+                results = self.store.search(query_vector, top_k, category, ef_runtime)
+            logger.debug(f"📊 Nombre de résultats: {len(results)}")
+            return results
             
         except Exception as e:
-            print(f"❌ Erreur lors de la recherche vectorielle : {e}")
+            logger.error(f"❌ Erreur lors de la recherche vectorielle : {e}")
             raise
     
-    def check_database(self):
-        """Affiche un rapport complet de la base de données"""
-        print("\n" + "="*50)
-        print("📊 RAPPORT DE LA BASE DE DONNÉES REDIS")
-        print("="*50)
-
-        # Statistiques de l'index
-        try:
-            info = self.redis_client.ft(self.index_name).info()
-            print("\n📈 STATISTIQUES GÉNÉRALES:")
-            print(f"- Nombre total de documents: {info['num_docs']}")
-            print(f"- Taille de l'index: {info.get('inverted_sz_mb', '0')} MB")
-            print(f"- Nombre de termes indexés: {info['num_terms']}")
-        except Exception as e:
-            print(f"❌ Erreur lors de la lecture des statistiques: {e}")
-
-        # Liste des documents
+    def hybrid_search(self, query: str, top_k=3, category=None, ef_runtime=None):
+        """Recherche hybride : plein texte BM25 et KNN fusionnés par rang réciproque
+        
+        Avec Redis, les deux requêtes partent dans un même pipeline et
+        renvoient chacune ``2 * top_k`` candidats ; seuls les ``top_k``
+        meilleurs après fusion sont retournés. Les noms d'hôtes, de services
+        ou les codes d'erreur cités dans la question remontent ainsi même
+        quand leur embedding est peu discriminant. Le stockage local, sans
+        index plein texte, s'en tient à la recherche vectorielle.
+        """
+        terms = build_text_query_terms(query)
+        if not terms:
+            return self.vector_search(query, top_k, category, ef_runtime)
+        
         try:
-            query = Query("*").dialect(2)
-            results = self.redis_client.ft(self.index_name).search(query)
+            logger.debug("🔍 Recherche hybride en cours...")
+            query_vector = self._query_vector(query)
+            with self.metrics.timer(f'{self.store.name}_search'):
+                return self.store.hybrid_search(query_vector, terms, top_k, category, ef_runtime)
             
-            print("\n📚 DOCUMENTS STOCKÉS:")
-            for i, doc in enumerate(results.docs, 1):
-                print(f"\nDocument {i}:")
-                print(f"  📄 Titre: {doc.title}")
-                print(f"  🏷️ Catégorie: {doc.category}")
-                print(f"  📂 Source: {doc.source}")
-                print(f"   Chemin: {doc.full_path}")
-                print(f"  📝 Aperçu: {doc.content[:100]}...")
         except Exception as e:
-            print(f"❌ Erreur lors de la lecture des documents: {e}")
-
-        print("\n" + "="*50)
+            logger.error(f"❌ Erreur lors de la recherche hybride : {e}")
+            raise
+    
+    def check_database(self, limit: int = 10):
+        """Affiche un rapport complet du stockage (voir ``VectorStore.report``)
+        
+        Args:
+            limit: Nombre de documents listés (0 pour tous)
+        """
+        if self.store is None:
+            print(f"\n❌ Aucun stockage local dans {self.local_store_path}")
+            return
+        self.store.report(limit)
 
 def main():
     parser = argparse.ArgumentParser(description="Gestionnaire de base de données Redis RAG")
     parser.add_argument("-check", action="store_true", 
                        help="Affiche les informations de la base de données")
+    parser.add_argument("--limit", type=int, default=10,
+                       help="Nombre de documents listés par -check (0 pour tous)")
     parser.add_argument("--docs", type=str, 
                        help="Chemin vers le dossier ou fichier à charger")
     parser.add_argument("--incremental", action="store_true",
                        help="Ajoute les documents sans recréer l'index")
     parser.add_argument("--chat", action="store_true",
                        help="Démarre une session de chat interactive avec le RAG")
+    parser.add_argument("--watch", action="store_true",
+                       help="Avec --docs, rattrape l'index (implique --incremental) puis le maintient à jour au fil des modifications")
+    parser.add_argument("--watch-debounce", type=float, default=2.0,
+                       help="Délai de calme (s) avant d'appliquer une rafale de changements")
+    parser.add_argument("--watch-polling", action="store_true",
+                       help="Surveillance par scrutation des dates et tailles plutôt que par watchdog")
+    parser.add_argument("--poll-interval", type=float, default=10.0,
+                       help="Intervalle (s) de scrutation sans watchdog")
+    parser.add_argument("--distributed", action="store_true",
+                       help="Avec --docs, publie les fichiers dans un flux Redis traité par des workers")
+    parser.add_argument("--worker", action="store_true",
+                       help="Démarre un worker d'ingestion répartie (voir --distributed)")
+    parser.add_argument("--worker-name", type=str, default=None,
+                       help="Nom du worker dans le groupe de consommateurs (défaut : machine et PID)")
+    parser.add_argument("--exit-when-idle", action="store_true",
+                       help="Arrête le worker dès qu'il n'y a plus de tâche")
+    parser.add_argument("--vector-store", choices=VECTOR_STORES, default="redis",
+                       help="Stockage des vecteurs : Redis Stack (défaut) ou fichiers locaux memory-map, sans Redis")
+    parser.add_argument("--local-store", type=str, default="vector_store",
+                       help="Dossier du stockage local (--vector-store local)")
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default=None,
+                       help="Quantifie les vecteurs du stockage local (int8 : 4 fois moins de mémoire parcourue)")
+    parser.add_argument("--rescore-candidates", type=int, default=100,
+                       help="Candidats quantifiés reclassés en float32 (0 pour désactiver)")
+    parser.add_argument("--skip-checks", action="store_true",
+                       help="Ne vérifie pas Redis Stack ni LM Studio au démarrage")
+    parser.add_argument("--redis-host", type=str, default="localhost")
+    parser.add_argument("--redis-port", type=int, default=6379)
+    parser.add_argument("--llm-url", type=str, default="http://localhost:1234/v1",
+                       help="URL de l'API LM Studio")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                       help="Taille maximale d'un passage indexé (en caractères)")
+    parser.add_argument("--chunk-overlap", type=int, default=200,
+                       help="Recouvrement entre passages consécutifs (en caractères)")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="Nombre de processus d'extraction (défaut : nombre de cœurs)")
+    parser.add_argument("--write-batch", type=int, default=500,
+                       help="Nombre de commandes Redis regroupées par pipeline")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS, default="lmstudio",
+                       help="Moteur d'embedding : LM Studio (HTTP) ou SentenceTransformer local (CPU)")
+    parser.add_argument("--embedding-model", type=str, default="local",
+                       help="Identifiant du modèle d'embedding (LM Studio ou nom SentenceTransformer)")
+    parser.add_argument("--embedding-threads", type=int, default=None,
+                       help="Nombre de threads CPU pour SentenceTransformer")
+    parser.add_argument("--query-cache-size", type=int, default=1024,
+                       help="Nombre d'embeddings de requêtes gardés en mémoire (0 pour désactiver)")
+    parser.add_argument("--query-cache-ttl", type=int, default=86400,
+                       help="Durée de vie (s) des embeddings de requêtes dans Redis (0 pour désactiver)")
+    parser.add_argument("--answer-cache", action="store_true",
+                       help="Active le cache sémantique des réponses")
+    parser.add_argument("--answer-cache-distance", type=float, default=0.05,
+                       help="Distance cosinus maximale pour réutiliser une réponse en cache")
+    parser.add_argument("--answer-cache-ttl", type=int, default=7 * 86400,
+                       help="Durée de vie (s) des réponses en cache")
+    parser.add_argument("--answer-cache-size", type=int, default=10000,
+                       help="Nombre maximal de réponses en cache")
+    parser.add_argument("--context-window", type=int, default=8192,
+                       help="Taille de la fenêtre de contexte du modèle (en tokens)")
+    parser.add_argument("--max-answer-tokens", type=int, default=1000,
+                       help="Nombre maximal de tokens générés par réponse")
+    parser.add_argument("--llm-timeout", type=int, default=120,
+                       help="Délai maximal (s) d'attente des réponses de LM Studio")
+    parser.add_argument("--index-profile", choices=list(INDEX_PROFILES), default="hnsw",
+                       help="Profil du nouvel index vectoriel (FLAT exact ou HNSW plus ou moins précis)")
+    parser.add_argument("--vector-type", choices=VECTOR_TYPES, default="FLOAT32",
+                       help="Type des vecteurs stockés (FLOAT16 divise la mémoire par deux)")
+    parser.add_argument("--ef-runtime", type=int, default=None,
+                       help="EF_RUNTIME des recherches HNSW (défaut : celui du profil)")
+    parser.add_argument("--search-mode", choices=SEARCH_MODES, default="hybrid",
+                       help="Recherche KNN seule, ou hybride plein texte BM25 + KNN (défaut)")
+    parser.add_argument("--rerank", choices=RERANKERS, default=None,
+                       help="Reclasse les candidats par cosinus exact ou par cross-encoder (CPU)")
+    parser.add_argument("--rerank-candidates", type=int, default=50,
+                       help="Nombre de candidats recherchés avant reclassement")
+    parser.add_argument("--rerank-model", type=str, default=DEFAULT_CROSS_ENCODER,
+                       help="Modèle CrossEncoder utilisé par --rerank cross-encoder")
+    
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                       help="Journalisation détaillée (-v : progression, -vv : chaque fichier et requête)")
+    parser.add_argument("--metrics", choices=METRICS_FORMATS, default=None,
+                       help="Affiche en fin d'exécution les durées par étape (Prometheus ou JSON)")
     
     args = parser.parse_args()
     
-    rag = LocalRAG()
+    # Journalisation discrète par défaut : seuls les avertissements et erreurs
+    logging.basicConfig(
+        level=[logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbose, 2)],
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    
+    rag = LocalRAG(redis_host=args.redis_host,
+                   redis_port=args.redis_port,
+                   llm_url=args.llm_url,
+                   chunk_size=args.chunk_size,
+                   chunk_overlap=args.chunk_overlap,
+                   extraction_workers=args.workers,
+                   redis_write_batch_size=args.write_batch,
+                   embedding_backend=args.embedding_backend,
+                   embedding_model=args.embedding_model,
+                   embedding_threads=args.embedding_threads,
+                   query_cache_size=args.query_cache_size,
+                   query_cache_ttl=args.query_cache_ttl,
+                   answer_cache=args.answer_cache,
+                   answer_cache_distance=args.answer_cache_distance,
+                   answer_cache_ttl=args.answer_cache_ttl,
+                   answer_cache_size=args.answer_cache_size,
+                   context_window=args.context_window,
+                   max_answer_tokens=args.max_answer_tokens,
+                   llm_timeout=args.llm_timeout,
+                   index_profile=args.index_profile,
+                   vector_type=args.vector_type,
+                   ef_runtime=args.ef_runtime,
+                   search_mode=args.search_mode,
+                   rerank=args.rerank,
+                   rerank_candidates=args.rerank_candidates,
+                   rerank_model=args.rerank_model,
+                   vector_store=args.vector_store,
+                   local_store_path=args.local_store,
+                   local_quantization=args.quantization,
+                   rescore_candidates=args.rescore_candidates,
+                   # -check n'interroge pas le modèle et signale lui-même les erreurs Redis
+                   health_checks=not (args.skip_checks or args.check))
     
     if args.docs:
-        rag.load_documents(args.docs, incremental=args.incremental)
+        # Le rattrapage avant surveillance est toujours incrémental : l'index
+        # existant est conservé et seuls les fichiers modifiés sont ré-encodés
+        stats = rag.load_documents(args.docs, incremental=args.incremental or args.watch,
+                                   distributed=args.distributed)
+        unchanged = stats['skipped'] + stats['unchanged']
+        print(f"📊 {stats['processed']}/{stats['total'] - unchanged} documents chargés, "
+              f"{unchanged} inchangés, {stats['removed']} supprimés")
+        
+        if args.watch:
+            print(f"👀 Surveillance de {args.docs} (Ctrl+C pour arrêter)")
+            try:
+                for update in rag.watch_documents(args.docs, debounce=args.watch_debounce,
+                                                  poll_interval=args.poll_interval,
+                                                  polling=args.watch_polling):
+                    print(f"🔄 {update['processed']} documents mis à jour, "
+                          f"{update['removed']} supprimés ({update['duration']:.1f}s)")
+            except KeyboardInterrupt:
+                print("\n👋 Surveillance arrêtée")
+    elif args.worker:
+        try:
+            rag.run_worker(name=args.worker_name, exit_when_idle=args.exit_when_idle)
+        except KeyboardInterrupt:
+            print("\n👋 Worker arrêté")
     elif args.check:
-        rag.check_database()
+        rag.check_database(limit=args.limit)
     elif args.chat:
         print("\n🤖 Bienvenue dans le chat RAG! (tapez 'quit' pour quitter)")
         print("📚 Contexte: documentation infrastructure Lempire")
@@ -370,62 +2366,44 @@ def main():
                 if question.lower() in ['quit', 'exit', 'q']:
                     print("👋 Au revoir!")
                     break
-                    
-                # Recherche des documents pertinents
-                results = rag.vector_search(question, top_k=3)
                 
-                if not results:
+                # Recherche, construction du contexte et génération en streaming
+                result = rag.answer(question, stream=True)
+                
+                if result['answer'] is None:
                     print("❌ Aucun document pertinent trouvé.")
                     continue
                 
-                # Construction du contexte
-                context = "\n\n".join([
-                    f"Document '{r['title']}' ({r['category']}):\n{r['content'][:500]}..."
-                    for r in results
-                ])
-                
-                # Construction du prompt
-                prompt = f"""Tu es un assistant expert en infrastructure qui aide à comprendre la documentation de Lempire.
-                Utilise uniquement les informations du contexte ci-dessous pour répondre à la question.
-                Si tu ne peux pas répondre avec le contexte donné, dis-le clairement.
+                print("\n🤖 Réponse (cache):" if result['cached'] else "\n🤖 Réponse:")
+                for token in result['answer']:
+                    print(token, end="", flush=True)
+                print()
                 
-                Contexte:
-                {context}
+                generation = rag.last_generation_stats
+                if not result['cached'] and generation.get('time_to_first_token') is not None:
+                    print(f"\n⏱️ Premier token: {generation['time_to_first_token']:.2f}s, "
+                          f"total: {generation['total_time']:.2f}s")
                 
-                Question: {question}
-                
-                Réponse:"""
-                
-                # Appel à l'API de LM Studio
-                response = requests.post(
-                    f"{rag.llm_url}/chat/completions",
-                    json={
-                        "messages": [
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.7,
-                        "max_tokens": 1000
-                    }
-                )
-                
-                if response.status_code == 200:
-                    answer = response.json()['choices'][0]['message']['content']
-                    print("\n🤖 Réponse:")
-                    print(answer)
-                    
-                    print("\n📚 Sources utilisées:")
-                    for r in results:
-                        print(f"- {r['title']} ({r['category']}) - Similarité: {r['similarity']:.2%}")
-                else:
-                    print(f"❌ Erreur lors de l'appel à LM Studio: {response.status_code}")
+                print("\n📚 Sources utilisées:")
+                for r in result['sources']:
+                    print(f"- {r['title']} ({r['category']}) - {describe_relevance(r)}")
                 
             except KeyboardInterrupt:
                 print("\n👋 Au revoir!")
                 break
             except Exception as e:
                 print(f"❌ Erreur: {e}")
+        
+        cache_stats = rag.query_cache.stats()
+        print(f"🧠 Cache des embeddings: {cache_stats['hits']} succès mémoire, "
+              f"{cache_stats['redis_hits']} succès Redis, {cache_stats['misses']} échecs "
+              f"(taux: {cache_stats['hit_rate']:.0%})")
     else:
         parser.print_help()
+        return
+    
+    if args.metrics:
+        print(rag.metrics.export(args.metrics))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,220 @@
+import argparse
+import json
+import logging
+
+from aiohttp import web
+
+from async_rag import AsyncLocalRAG
+from embedding_backends import EMBEDDING_BACKENDS, DEFAULT_SENTENCE_TRANSFORMER, create_embedding_backend
+from reranking import RERANKERS, DEFAULT_CROSS_ENCODER
+from script import SEARCH_MODES
+from vector_store import VECTOR_STORES
+
+logger = logging.getLogger(__name__)
+
+RAG_KEY = web.AppKey("rag", AsyncLocalRAG)
+
+
+async def _read_json(request: web.Request) -> dict:
+    try:
+        return await request.json()
+    except json.JSONDecodeError:
+        raise web.HTTPBadRequest(text="Corps JSON invalide")
+
+
+def _read_top_k(payload: dict, default: int) -> int:
+    """Valide le champ ``top_k`` (entier strictement positif)"""
+    top_k = payload.get("top_k", default)
+    if isinstance(top_k, bool) or not isinstance(top_k, (int, str)):
+        raise web.HTTPBadRequest(text="Champ 'top_k' invalide : entier attendu")
+    try:
+        top_k = int(top_k)
+    except ValueError:
+        raise web.HTTPBadRequest(text="Champ 'top_k' invalide : entier attendu")
+    if top_k < 1:
+        raise web.HTTPBadRequest(text="Champ 'top_k' invalide : doit être supérieur à 0")
+    return top_k
+
+
+def _read_category(payload: dict):
+    """Valide le champ ``category`` (chaîne ou absent)"""
+    category = payload.get("category")
+    if category is not None and not isinstance(category, str):
+        raise web.HTTPBadRequest(text="Champ 'category' invalide : chaîne attendue")
+    return category or None
+
+
+async def handle_search(request: web.Request) -> web.Response:
+    """POST /search {"query", "top_k"?, "category"?, "content"?}
+
+    Le contenu des passages n'est renvoyé qu'avec ``content: true``.
+    """
+    payload = await _read_json(request)
+    query = payload.get("query")
+    if not query:
+        raise web.HTTPBadRequest(text="Champ 'query' manquant")
+
+    top_k = _read_top_k(payload, 3)
+    category = _read_category(payload)
+
+    rag = request.app[RAG_KEY]
+    results = await rag.vector_search(query, top_k=top_k, category=category)
+    if payload.get("content"):
+        await rag.fetch_contents(results)
+    return web.json_response({"results": results})
+
+
+async def handle_answer(request: web.Request) -> web.StreamResponse:
+    """POST /answer {"question", "top_k"?, "category"?, "stream"?}
+
+    Avec ``stream: true``, la réponse est envoyée en server-sent events
+    (un événement par fragment, puis un événement ``sources``).
+    """
+    payload = await _read_json(request)
+    question = payload.get("question")
+    if not question:
+        raise web.HTTPBadRequest(text="Champ 'question' manquant")
+
+    top_k = _read_top_k(payload, 8)
+    category = _read_category(payload)
+
+    stream = bool(payload.get("stream", False))
+    result = await request.app[RAG_KEY].answer(
+        question,
+        top_k=top_k,
+        category=category,
+        stream=stream
+    )
+
+    if not stream or result['answer'] is None:
+        return web.json_response(result)
+
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache"
+    })
+    await response.prepare(request)
+    async for token in result['answer']:
+        await response.write(f"data: {json.dumps({'token': token})}\n\n".encode('utf-8'))
+    sources = {'sources': result['sources'], 'cached': result['cached']}
+    await response.write(f"event: sources\ndata: {json.dumps(sources)}\n\n".encode('utf-8'))
+    await response.write(b"data: [DONE]\n\n")
+    return response
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    """GET /health : état de Redis Stack et de LM Studio"""
+    healthy = await request.app[RAG_KEY].check()
+    return web.json_response({"healthy": healthy}, status=200 if healthy else 503)
+
+
+async def handle_stats(request: web.Request) -> web.Response:
+    """GET /stats : compteurs du cache et du micro-batching"""
+    rag = request.app[RAG_KEY]
+    return web.json_response({
+        "query_cache": rag.query_cache.stats(),
+        "query_batching": rag.query_batcher.stats() if rag.query_batcher else None
+    })
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """GET /metrics : durées par étape et compteurs (Prometheus, ou JSON avec ?format=json)"""
+    metrics = request.app[RAG_KEY].metrics
+    if request.query.get("format") == "json":
+        return web.json_response(metrics.to_dict())
+    return web.Response(text=metrics.to_prometheus(), content_type="text/plain", charset="utf-8")
+
+
+def create_app(**rag_options) -> web.Application:
+    """Crée l'application HTTP partageant un unique moteur ``AsyncLocalRAG``"""
+    app = web.Application()
+
+    async def startup(app):
+        app[RAG_KEY] = AsyncLocalRAG(**rag_options)
+        # Vérification unique au démarrage, et non à chaque client
+        if await app[RAG_KEY].check():
+            logger.info("✅ Stockage et LM Studio disponibles")
+
+    async def cleanup(app):
+        await app[RAG_KEY].close()
+
+    app.on_startup.append(startup)
+    app.on_cleanup.append(cleanup)
+    app.router.add_post("/search", handle_search)
+    app.router.add_post("/answer", handle_answer)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/stats", handle_stats)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service HTTP de requêtes RAG")
+    parser.add_argument("--host", type=str, default="127.0.0.1",
+                       help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=8000,
+                       help="Port d'écoute")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0,
+                       help="Fenêtre de regroupement des embeddings de requêtes (ms, 0 pour désactiver)")
+    parser.add_argument("--batch-size", type=int, default=64,
+                       help="Nombre maximal de requêtes par lot d'embeddings")
+    parser.add_argument("--answer-cache", action="store_true",
+                       help="Active le cache sémantique des réponses")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS, default="lmstudio",
+                       help="Moteur d'embedding : LM Studio (HTTP) ou SentenceTransformer local (CPU)")
+    parser.add_argument("--embedding-model", type=str, default="local",
+                       help="Identifiant du modèle d'embedding (LM Studio ou nom SentenceTransformer)")
+    parser.add_argument("--embedding-threads", type=int, default=None,
+                       help="Nombre de threads CPU pour SentenceTransformer")
+    parser.add_argument("--search-mode", choices=SEARCH_MODES, default="hybrid",
+                       help="Recherche KNN seule, ou hybride plein texte BM25 + KNN (défaut)")
+    parser.add_argument("--rerank", choices=RERANKERS, default=None,
+                       help="Reclasse les candidats par cosinus exact ou par cross-encoder (CPU)")
+    parser.add_argument("--rerank-candidates", type=int, default=50,
+                       help="Nombre de candidats recherchés avant reclassement")
+    parser.add_argument("--rerank-model", type=str, default=DEFAULT_CROSS_ENCODER,
+                       help="Modèle CrossEncoder utilisé par --rerank cross-encoder")
+    parser.add_argument("--vector-store", choices=VECTOR_STORES, default="redis",
+                       help="Stockage interrogé : Redis Stack (défaut) ou stockage local construit par script.py")
+    parser.add_argument("--local-store", type=str, default="vector_store",
+                       help="Dossier du stockage local (--vector-store local)")
+    parser.add_argument("--rescore-candidates", type=int, default=100,
+                       help="Candidats quantifiés reclassés en float32 (stockage local int8)")
+
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                       help="Journalisation détaillée (-v, -vv)")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=[logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbose, 2)],
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+    embedding_backend = None
+    if args.embedding_backend == "sentence-transformers":
+        embedding_backend = create_embedding_backend(
+            args.embedding_backend,
+            model_name=args.embedding_model if args.embedding_model != "local" else DEFAULT_SENTENCE_TRANSFORMER,
+            threads=args.embedding_threads
+        )
+
+    app = create_app(
+        query_batch_window=args.batch_window_ms / 1000,
+        query_batch_size=args.batch_size,
+        answer_cache=args.answer_cache,
+        embedding_model=args.embedding_model,
+        embedding_backend=embedding_backend,
+        search_mode=args.search_mode,
+        rerank=args.rerank,
+        rerank_candidates=args.rerank_candidates,
+        rerank_model=args.rerank_model,
+        vector_store=args.vector_store,
+        local_store_path=args.local_store,
+        rescore_candidates=args.rescore_candidates
+    )
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
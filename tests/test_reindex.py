@@ -0,0 +1,121 @@
+"""Reconstruction complète d'un index existant (bascule d'alias et nettoyage)
+
+Ces tests nécessitent un Redis Stack joignable (REDIS_HOST, REDIS_PORT ;
+défaut localhost:6379) et sont ignorés sinon. Les embeddings sont calculés
+localement, sans LM Studio.
+"""
+import hashlib
+import os
+import time
+import uuid
+
+import pytest
+
+redis = pytest.importorskip("redis")
+
+import numpy as np
+
+from embedding_backends import EmbeddingBackend
+from script import LocalRAG
+
+REDIS_HOST = os.environ.get("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.environ.get("REDIS_PORT", "6379"))
+DIM = 32
+
+
+class HashingBackend(EmbeddingBackend):
+    """Embeddings déterministes par hachage des mots (sans modèle)"""
+
+    model_id = 'test-hashing'
+    served_model = 'test-hashing'
+
+    def embed(self, texts):
+        embeddings = []
+        for text in texts:
+            vector = np.full(DIM, 0.01, dtype=np.float32)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % DIM] += 1
+            embeddings.append(vector.tolist())
+        return embeddings
+
+
+@pytest.fixture
+def redis_client():
+    client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
+    try:
+        modules = client.module_list()
+    except redis.ConnectionError:
+        pytest.skip(f"Redis indisponible sur {REDIS_HOST}:{REDIS_PORT}")
+    if not any(module[b'name'] == b'search' for module in modules):
+        pytest.skip("Redis Stack (module search) requis")
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def index_name(redis_client):
+    name = f"test_reindex_{uuid.uuid4().hex[:8]}"
+    yield name
+    for index in redis_client.execute_command("FT._LIST"):
+        index = index.decode('utf-8')
+        if index.startswith(name):
+            redis_client.ft(index).dropindex(delete_documents=True)
+    for key in redis_client.scan_iter(match=f"*{name}*"):
+        redis_client.unlink(key)
+
+
+@pytest.fixture
+def docs(tmp_path):
+    (tmp_path / "ops").mkdir()
+    (tmp_path / "ops" / "redis.md").write_text("# Redis\nRedis écoute sur le port 6379.\n", encoding="utf-8")
+    (tmp_path / "ops" / "nginx.md").write_text("# Nginx\nNginx sert les pages statiques.\n", encoding="utf-8")
+    return tmp_path
+
+
+def make_rag(index_name: str) -> LocalRAG:
+    rag = LocalRAG(redis_host=REDIS_HOST, redis_port=REDIS_PORT, index_name=index_name,
+                   extraction_workers=1, query_cache_ttl=0, health_checks=False)
+    rag.embedding_backend = HashingBackend()
+    return rag
+
+
+def index_names(client) -> set:
+    return {index.decode('utf-8') for index in client.execute_command("FT._LIST")}
+
+
+def assert_dropped(client, index: str) -> None:
+    assert index not in index_names(client)
+    assert not client.exists(f"index_meta:{index}")
+    assert next(client.scan_iter(match=f"{index}:*"), None) is None
+
+
+def test_full_rebuild_replaces_existing_index(redis_client, index_name, docs):
+    rag = make_rag(index_name)
+    assert rag.load_documents(str(docs))['processed'] == 2
+    first = rag.active_index
+
+    # Les noms des index physiques sont datés à la seconde
+    time.sleep(1.1)
+    stats = rag.load_documents(str(docs))
+
+    assert stats['processed'] == 2
+    assert rag.active_index != first
+    assert_dropped(redis_client, first)
+    assert rag.search("port redis", top_k=1)[0]['title'] == 'redis'
+
+    # Un nouveau moteur retrouve l'index derrière l'alias
+    assert make_rag(index_name).active_index == rag.active_index
+
+
+def test_full_rebuild_migrates_unaliased_index(redis_client, index_name, docs):
+    rag = make_rag(index_name)
+    # Ancien index portant le nom de l'alias, antérieur aux index datés
+    rag._create_vector_index(index_name, DIM)
+    rag = make_rag(index_name)
+    assert rag.active_index == index_name
+
+    assert rag.load_documents(str(docs))['processed'] == 2
+
+    assert rag.active_index.startswith(f"{index_name}_")
+    assert_dropped(redis_client, index_name)
+    assert rag.search("nginx pages", top_k=1)[0]['title'] == 'nginx'
@@ -0,0 +1,463 @@
+import asyncio
+import json
+import mmap
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from embedding_backends import describe_model
+
+VECTOR_STORES = ('redis', 'local')
+
+# Quantification du stockage local (None : float32 seul)
+QUANTIZATIONS = ('int8',)
+
+# Taille des blocs convertis en float32 lors d'un parcours quantifié :
+# un bloc qui tient dans le cache du processeur évite les allers-retours mémoire
+QUANTIZED_BLOCK_BYTES = 2 * 1024 * 1024
+
+# Lignes quantifiées à la fois lors de l'écriture d'un stockage
+QUANTIZE_WRITE_ROWS = 65536
+
+# Table des passages du stockage local, lue sans copie (memory-map)
+CHUNK_DTYPE = np.dtype([
+    ('document', '<i4'), ('chunk_index', '<i4'), ('category', '<i4'),
+    ('start_offset', '<i8'), ('end_offset', '<i8'),
+    ('content_start', '<i8'), ('content_end', '<i8')
+])
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Normalise des vecteurs en norme L2 (similarité cosinus = produit scalaire)"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize_int8(vectors) -> tuple:
+    """Quantification scalaire symétrique int8, une échelle par vecteur
+
+    Returns:
+        Tuple (matrice int8, échelles float32) ; ``q * scale`` approche le
+        vecteur d'origine
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices des ``k`` meilleurs scores, du meilleur au moins bon (argpartition)"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+class VectorStore(ABC):
+    """Interface des stockages de vecteurs interrogés par ``LocalRAG``
+
+    Une implémentation retrouve les ``top_k`` passages les plus proches
+    d'un vecteur de requête, avec éventuellement un filtre de catégorie, et
+    charge à la demande les vecteurs et le contenu des passages retournés.
+    Les résultats ont la forme de ``parse_search_results`` (``content``
+    vaut None tant qu'il n'a pas été chargé).
+
+    Les variantes asynchrones (``asearch``...) exécutent par défaut la
+    méthode synchrone dans un thread ; un stockage doté d'un client
+    asynchrone les remplace.
+    """
+
+    # Nom du stockage (voir VECTOR_STORES), préfixe de ses métriques
+    name = ''
+    dim: Optional[int] = None
+
+    @property
+    def label(self) -> str:
+        """Désignation du stockage dans les messages"""
+        return f"le stockage {self.name}"
+
+    @abstractmethod
+    def search(self, query_vector, top_k: int, category: Optional[str] = None,
+               ef_runtime: Optional[int] = None) -> List[Dict]:
+        """Top-k par similarité cosinus (``ef_runtime`` : index HNSW uniquement)"""
+
+    def hybrid_search(self, query_vector, terms: str, top_k: int, category: Optional[str] = None,
+                      ef_runtime: Optional[int] = None) -> List[Dict]:
+        """Recherche plein texte et vectorielle fusionnées
+
+        Un stockage sans index plein texte s'en tient à la recherche vectorielle.
+
+        Args:
+            terms: Expression plein texte (voir ``build_text_query_terms``)
+        """
+        return self.search(query_vector, top_k, category, ef_runtime)
+
+    @abstractmethod
+    def fetch_vectors(self, results: List[Dict]) -> List[Optional[np.ndarray]]:
+        """Vecteurs stockés des passages (None s'ils sont introuvables)"""
+
+    @abstractmethod
+    def fetch_contents(self, results: List[Dict]) -> List[Dict]:
+        """Charge le contenu des passages qui ne l'ont pas encore"""
+
+    @abstractmethod
+    def report(self, limit: int = 10) -> None:
+        """Affiche un rapport du stockage (``limit`` documents listés, 0 pour tous)"""
+
+    async def asearch(self, query_vector, top_k: int, category: Optional[str] = None,
+                      ef_runtime: Optional[int] = None) -> List[Dict]:
+        return await asyncio.to_thread(self.search, query_vector, top_k, category, ef_runtime)
+
+    async def ahybrid_search(self, query_vector, terms: str, top_k: int,
+                             category: Optional[str] = None,
+                             ef_runtime: Optional[int] = None) -> List[Dict]:
+        return await asyncio.to_thread(self.hybrid_search, query_vector, terms, top_k,
+                                       category, ef_runtime)
+
+    async def afetch_vectors(self, results: List[Dict]) -> List[Optional[np.ndarray]]:
+        return await asyncio.to_thread(self.fetch_vectors, results)
+
+    async def afetch_contents(self, results: List[Dict]) -> List[Dict]:
+        return await asyncio.to_thread(self.fetch_contents, results)
+
+    def close(self) -> None:
+        """Libère les ressources du stockage"""
+
+
+class LocalVectorStore(VectorStore):
+    """Stockage local en fichiers, sans Redis, avec recherche exacte
+
+    Un dossier contient :
+
+    - ``vectors.npy`` : matrice float32 des vecteurs normalisés, ouverte en
+      memory-map (démarrage sans copie, pages chargées à la demande)
+    - ``chunks.npy`` : table compacte des passages (document, rang,
+      catégorie, positions dans le fichier source et dans ``content.bin``)
+    - ``content.bin`` : contenu UTF-8 des passages, bout à bout
+    - ``metadata.json`` : modèle, dimension, catégories, documents et titres
+      de section
+    - avec la quantification ``int8`` : ``vectors_int8.npy`` et
+      ``scales.npy``, quatre fois plus petits que les vecteurs float32
+
+    La recherche est un produit matrice-vecteur NumPy suivi d'un
+    ``argpartition`` : résultats exacts, référence pour mesurer le rappel
+    d'un index HNSW. Sur un stockage quantifié, seule la matrice int8 est
+    parcourue ; les ``rescore_candidates`` meilleurs candidats sont ensuite
+    reclassés en float32, seules leurs lignes de ``vectors.npy`` étant lues.
+
+    Args:
+        rescore_candidates: Candidats reclassés en pleine précision (0 pour
+            s'en tenir aux scores quantifiés)
+    """
+
+    name = 'local'
+
+    def __init__(self, path, rescore_candidates: int = 100):
+        self.path = Path(path)
+        self.rescore_candidates = rescore_candidates
+        metadata = json.loads((self.path / 'metadata.json').read_text(encoding='utf-8'))
+        self.dim = metadata['dim']
+        self.model_id = metadata['model_id']
+        self.served_model = metadata.get('served_model')
+        self.categories: List[str] = metadata['categories']
+        self.documents: List[Dict] = metadata['documents']
+        self.headings: List[str] = metadata['headings']
+        self.files = {document['full_path']: document for document in self.documents}
+        self._category_codes = {category: i for i, category in enumerate(self.categories)}
+
+        self.vectors = np.load(self.path / 'vectors.npy', mmap_mode='r')
+        self.quantization = metadata.get('quantization')
+        self.quantized = self.scales = None
+        if self.quantization == 'int8':
+            self.quantized = np.load(self.path / 'vectors_int8.npy', mmap_mode='r')
+            self.scales = np.load(self.path / 'scales.npy', mmap_mode='r')
+        self.chunks = np.load(self.path / 'chunks.npy', mmap_mode='r')
+        self._content_file = open(self.path / 'content.bin', 'rb')
+        size = (self.path / 'content.bin').stat().st_size
+        self._content = mmap.mmap(self._content_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @staticmethod
+    def exists(path) -> bool:
+        return (Path(path) / 'metadata.json').exists()
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @property
+    def label(self) -> str:
+        return f"le stockage local {self.path}"
+
+    @property
+    def search_nbytes(self) -> int:
+        """Taille de la matrice parcourue à chaque recherche"""
+        if self.quantized is not None:
+            return self.quantized.nbytes + self.scales.nbytes
+        return self.vectors.nbytes
+
+    def close(self) -> None:
+        if isinstance(self._content, mmap.mmap):
+            self._content.close()
+        self._content_file.close()
+
+    def search(self, query_vector, top_k: int, category: Optional[str] = None,
+               ef_runtime: Optional[int] = None) -> List[Dict]:
+        """Top-k par similarité cosinus, avec préfiltrage par catégorie (recherche exacte)"""
+        if not len(self) or top_k <= 0:
+            return []
+        query = normalize_rows(query_vector)[0]
+
+        rows = None
+        if category:
+            code = self._category_codes.get(category)
+            if code is None:
+                return []
+            rows = np.flatnonzero(self.chunks['category'] == code)
+
+        if self.quantized is None:
+            scores = (self.vectors if rows is None else self.vectors[rows]) @ query
+        else:
+            scores = self._quantized_scores(query, rows)
+            if self.rescore_candidates:
+                # Reclassement en pleine précision des meilleurs candidats
+                candidates = top_indices(scores, max(self.rescore_candidates, top_k))
+                candidates = np.sort(rows[candidates] if rows is not None else candidates)
+                exact = self.vectors[candidates] @ query
+                return [self._result(int(candidates[i]), float(exact[i]))
+                        for i in top_indices(exact, top_k)]
+
+        return [self._result(int(rows[i]) if rows is not None else int(i), float(scores[i]))
+                for i in top_indices(scores, top_k)]
+
+    def _quantized_scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Similarités approchées sur la matrice int8, par blocs de lignes"""
+        matrix = self.quantized if rows is None else self.quantized[rows]
+        scales = self.scales if rows is None else self.scales[rows]
+        scores = np.empty(len(matrix), dtype=np.float32)
+        block_rows = max(QUANTIZED_BLOCK_BYTES // (4 * self.dim), 1)
+        for start in range(0, len(matrix), block_rows):
+            block = matrix[start:start + block_rows]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query
+        return scores * scales
+
+    def _result(self, row: int, similarity: float) -> Dict:
+        chunk = self.chunks[row]
+        document = self.documents[chunk['document']]
+        return {
+            "key": f"local:{document['doc_id']}:{chunk['chunk_index']}",
+            "row": row,
+            "content": None,
+            "title": document['title'],
+            "source": document['source'],
+            "category": document['category'],
+            "full_path": document['full_path'],
+            "doc_id": document['doc_id'],
+            "chunk_index": int(chunk['chunk_index']),
+            "start_offset": int(chunk['start_offset']),
+            "end_offset": int(chunk['end_offset']),
+            "heading": self.headings[row],
+            "similarity": similarity
+        }
+
+    def fetch_vectors(self, results: List[Dict]) -> List[Optional[np.ndarray]]:
+        return [np.array(self.vectors[r['row']]) if 'row' in r else None for r in results]
+
+    def content(self, row: int) -> str:
+        chunk = self.chunks[row]
+        return bytes(self._content[chunk['content_start']:chunk['content_end']]).decode('utf-8')
+
+    def fetch_contents(self, results: List[Dict]) -> List[Dict]:
+        for r in results:
+            if r.get('content') is None and 'row' in r:
+                r['content'] = self.content(r['row'])
+        return results
+
+    def document_rows(self, document: Dict) -> tuple:
+        """Lignes brutes d'un document, pour les recopier dans un nouveau stockage
+
+        Returns:
+            Tuple (lignes de ``chunks.npy``, contenu UTF-8 des passages bout à
+            bout, matrice des vecteurs normalisés, titres de section)
+        """
+        first, count = document['row'], document['chunks']
+        rows = self.chunks[first:first + count]
+        content = b""
+        if count:
+            content = bytes(self._content[rows[0]['content_start']:rows[-1]['content_end']])
+        return rows, content, self.vectors[first:first + count], self.headings[first:first + count]
+
+    def report(self, limit: int = 10) -> None:
+        print("\n" + "="*50)
+        print("📊 RAPPORT DU STOCKAGE LOCAL")
+        print("="*50)
+        size_mb = sum(f.stat().st_size for f in self.path.iterdir()) / (1024 * 1024)
+        print("\n📈 STATISTIQUES GÉNÉRALES:")
+        print(f"- Stockage: {self.path} ({size_mb:.2f} Mo sur disque)")
+        print(f"- Modèle d'embedding: {describe_model(self.model_id, self.served_model)} "
+              f"(dimension {self.dim})")
+        print(f"- Documents: {len(self.documents)}, passages: {len(self)}")
+        print(f"- Vecteurs: {self.vectors.nbytes / (1024 * 1024):.2f} Mo (float32, memory-map)")
+        if self.quantization:
+            print(f"- Quantification {self.quantization}: {self.search_nbytes / (1024 * 1024):.2f} Mo "
+                  f"parcourus par recherche ({1 - self.search_nbytes / max(self.vectors.nbytes, 1):.0%} "
+                  f"de moins), {self.rescore_candidates} candidats reclassés en float32")
+
+        print("\n🏷️ PASSAGES PAR CATÉGORIE:")
+        counts = np.bincount(self.chunks['category'], minlength=len(self.categories))
+        for code in np.argsort(-counts, kind='stable'):
+            print(f"- {self.categories[code] or '(aucune)'}: {counts[code]}")
+
+        print("\n📚 DOCUMENTS STOCKÉS:")
+        for i, doc in enumerate(self.documents[:limit or None], 1):
+            print(f"\nDocument {i}:")
+            print(f"  📄 Titre: {doc['title']}")
+            print(f"  🏷️ Catégorie: {doc['category']}")
+            print(f"  📂 Source: {doc['source']}")
+            print(f"   Chemin: {doc['full_path']}")
+
+        print("\n" + "="*50)
+
+
+class LocalStoreWriter:
+    """Construit un stockage local en flux, puis le substitue à l'ancien
+
+    Les vecteurs et le contenu sont écrits au fil de l'eau dans un dossier
+    temporaire ; ``commit`` écrit les tables et remplace le dossier cible.
+    Les lecteurs ouverts sur l'ancien stockage gardent leurs memory-maps.
+    """
+
+    def __init__(self, path, dim: int, model_id: str, quantization: Optional[str] = None,
+                 served_model: Optional[str] = None):
+        if quantization is not None and quantization not in QUANTIZATIONS:
+            raise ValueError(f"Quantification inconnue: {quantization} (disponibles: {', '.join(QUANTIZATIONS)})")
+        self.path = Path(path)
+        self.dim = dim
+        self.model_id = model_id
+        self.served_model = served_model
+        self.quantization = quantization
+        self.tmp_path = self.path.with_name(self.path.name + '.tmp')
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        self.tmp_path.mkdir(parents=True)
+
+        self._vectors = open(self.tmp_path / 'vectors.raw', 'wb')
+        self._content = open(self.tmp_path / 'content.bin', 'wb')
+        self._offset = 0
+        self._lock = threading.Lock()
+        self.rows: List[tuple] = []
+        self.documents: List[Dict] = []
+        self.headings: List[str] = []
+        self.categories: Dict[str, int] = {}
+
+    def add_document(self, document: Dict, chunks: List[Dict], vectors) -> None:
+        """Ajoute un document et ses passages
+
+        Args:
+            document: Métadonnées du document (``full_path``, ``title``,
+                ``source``, ``category``, ``doc_id``, date, taille, empreinte)
+            chunks: Passages (``content``, ``start``, ``end``, ``heading``)
+            vectors: Vecteurs des passages, alignés sur ``chunks``
+        """
+        vectors = normalize_rows(vectors)
+        if vectors.shape != (len(chunks), self.dim):
+            raise ValueError(f"Vecteurs de forme {vectors.shape}, attendu ({len(chunks)}, {self.dim})")
+
+        with self._lock:
+            index = len(self.documents)
+            self.documents.append({**document, 'row': len(self.rows), 'chunks': len(chunks)})
+            code = self.categories.setdefault(document['category'], len(self.categories))
+            for n, chunk in enumerate(chunks):
+                data = chunk['content'].encode('utf-8')
+                self._content.write(data)
+                self.rows.append((index, n, code, chunk['start'], chunk['end'],
+                                  self._offset, self._offset + len(data)))
+                self._offset += len(data)
+                self.headings.append(chunk.get('heading', ''))
+            self._vectors.write(vectors.tobytes())
+
+    def copy_document(self, store: LocalVectorStore, document: Dict, **updates) -> None:
+        """Recopie un document d'un stockage existant sans le ré-encoder
+
+        Vecteurs et contenu sont recopiés tels quels, sans décodage ni
+        nouvelle normalisation ; seules les positions dans ``content.bin``
+        sont décalées.
+        """
+        rows, content, vectors, headings = store.document_rows(document)
+        entry = {key: value for key, value in document.items() if key not in ('row', 'chunks')}
+        entry.update(updates)
+        if vectors.shape[1:] != (self.dim,):
+            raise ValueError(f"Vecteurs de dimension {vectors.shape[1]}, attendu {self.dim}")
+
+        with self._lock:
+            index = len(self.documents)
+            self.documents.append({**entry, 'row': len(self.rows), 'chunks': len(rows)})
+            code = self.categories.setdefault(entry['category'], len(self.categories))
+            shift = self._offset - (int(rows[0]['content_start']) if len(rows) else 0)
+            for row in rows:
+                self.rows.append((index, int(row['chunk_index']), code,
+                                  int(row['start_offset']), int(row['end_offset']),
+                                  int(row['content_start']) + shift, int(row['content_end']) + shift))
+            self._content.write(content)
+            self._offset += len(content)
+            self.headings.extend(headings)
+            self._vectors.write(np.ascontiguousarray(vectors, dtype='<f4').tobytes())
+
+    def commit(self) -> None:
+        """Termine l'écriture et remplace le stockage cible"""
+        self._vectors.close()
+        self._content.close()
+
+        # En-tête .npy puis copie des vecteurs bruts, en mémoire constante
+        raw = self.tmp_path / 'vectors.raw'
+        with open(self.tmp_path / 'vectors.npy', 'wb') as out, open(raw, 'rb') as source:
+            np.lib.format.write_array_header_1_0(out, {
+                'descr': np.lib.format.dtype_to_descr(np.dtype('<f4')),
+                'fortran_order': False,
+                'shape': (len(self.rows), self.dim)
+            })
+            shutil.copyfileobj(source, out, 16 * 1024 * 1024)
+        raw.unlink()
+        if self.quantization == 'int8':
+            self._write_int8()
+
+        np.save(self.tmp_path / 'chunks.npy', np.array(self.rows, dtype=CHUNK_DTYPE))
+        (self.tmp_path / 'metadata.json').write_text(json.dumps({
+            'dim': self.dim,
+            'model_id': self.model_id,
+            'served_model': self.served_model,
+            'quantization': self.quantization,
+            'categories': sorted(self.categories, key=self.categories.get),
+            'documents': self.documents,
+            'headings': self.headings
+        }), encoding='utf-8')
+
+        old = self.path.with_name(self.path.name + '.old')
+        shutil.rmtree(old, ignore_errors=True)
+        if self.path.exists():
+            self.path.rename(old)
+        self.tmp_path.rename(self.path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def _write_int8(self) -> None:
+        """Écrit la version int8 des vecteurs, par blocs, en mémoire constante"""
+        vectors = np.load(self.tmp_path / 'vectors.npy', mmap_mode='r')
+        quantized = np.lib.format.open_memmap(self.tmp_path / 'vectors_int8.npy', mode='w+',
+                                              dtype=np.int8, shape=vectors.shape)
+        scales = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), QUANTIZE_WRITE_ROWS):
+            end = start + QUANTIZE_WRITE_ROWS
+            quantized[start:end], scales[start:end] = quantize_int8(vectors[start:end])
+        quantized.flush()
+        del quantized, vectors
+        np.save(self.tmp_path / 'scales.npy', scales)
+
+    def abort(self) -> None:
+        """Abandonne la construction (le stockage cible est inchangé)"""
+        self._vectors.close()
+        self._content.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
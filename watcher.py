@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+
+class ChangeBuffer:
+    """Chemins modifiés en attente, regroupés par rafale
+
+    Les événements du système de fichiers arrivent souvent en rafale (un
+    ``git pull``, un éditeur qui écrit un fichier temporaire puis le
+    renomme) : ``wait`` ne rend la main qu'après ``debounce`` secondes sans
+    nouvel événement, pour traiter toute la rafale en un seul lot.
+    """
+
+    def __init__(self):
+        self._paths: Set[str] = set()
+        self._last_event = 0.0
+        self._condition = threading.Condition()
+
+    def add(self, *paths: str) -> None:
+        with self._condition:
+            self._paths.update(paths)
+            self._last_event = time.monotonic()
+            self._condition.notify_all()
+
+    def wait(self, debounce: float, timeout: Optional[float] = None) -> Set[str]:
+        """Attend une rafale de changements terminée
+
+        Returns:
+            Chemins modifiés, créés ou supprimés (vide si ``timeout`` expire)
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if self._paths:
+                    quiet = now - self._last_event
+                    if quiet >= debounce:
+                        paths, self._paths = self._paths, set()
+                        return paths
+                    self._condition.wait(debounce - quiet)
+                    continue
+                if deadline is not None and now >= deadline:
+                    return set()
+                self._condition.wait(deadline - now if deadline is not None else None)
+
+
+def start_watchdog(root: Path, buffer: ChangeBuffer, accept: Callable[[str], bool]):
+    """Surveille ``root`` par les notifications du système (inotify, FSEvents...)
+
+    Returns:
+        L'observateur watchdog démarré, ou None si watchdog n'est pas installé
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.event_type not in ('created', 'modified', 'deleted', 'moved'):
+                return
+            # Un dossier « modifié » signale seulement un changement de son
+            # contenu, déjà notifié fichier par fichier
+            if event.is_directory and event.event_type == 'modified':
+                return
+            paths = [event.src_path, getattr(event, 'dest_path', None)]
+            # Les dossiers sont transmis pour les créations, suppressions et déplacements
+            buffer.add(*[os.fsdecode(p) for p in paths
+                         if p and (event.is_directory or accept(os.fsdecode(p)))])
+
+    # Un fichier unique est surveillé par son dossier parent
+    observer = Observer()
+    observer.schedule(Handler(), str(root if root.is_dir() else root.parent),
+                      recursive=root.is_dir())
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+class PollingWatcher(threading.Thread):
+    """Surveillance de repli par comparaison périodique des dates et tailles
+
+    Seules les métadonnées (``stat``) sont lues, jamais le contenu : un tour
+    coûte un parcours de l'arborescence, sans lecture ni embedding des
+    fichiers inchangés.
+    """
+
+    def __init__(self, root: Path, buffer: ChangeBuffer, accept: Callable[[str], bool],
+                 interval: float = 10.0):
+        super().__init__(daemon=True)
+        self.root = root
+        self.buffer = buffer
+        self.accept = accept
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._snapshot = self.scan()
+
+    def scan(self) -> Dict[str, tuple]:
+        """Date de modification et taille de chaque fichier surveillé"""
+        if self.root.is_file():
+            candidates = [str(self.root)]
+        else:
+            candidates = (os.path.join(directory, name)
+                          for directory, _, names in os.walk(self.root) for name in names)
+        snapshot = {}
+        for path in candidates:
+            if not self.accept(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            snapshot = self.scan()
+            changed = [path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)]
+            self._snapshot = snapshot
+            if changed:
+                self.buffer.add(*changed)
+
+    def stop(self) -> None:
+        self._stopped.set()
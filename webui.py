@@ -1,5 +1,6 @@
+import os
 import streamlit as st
-from script import LocalRAG
+from script import LocalRAG, describe_relevance
 import time
 
 # Configuration de la page
@@ -33,10 +34,19 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_rag() -> LocalRAG:
+    """Moteur RAG partagé par toutes les sessions, créé une seule fois par processus
+
+    Le cache sémantique des réponses est désactivé sauf si la variable
+    d'environnement RAG_ANSWER_CACHE vaut 1.
+    """
+    return LocalRAG(answer_cache=os.environ.get("RAG_ANSWER_CACHE", "0") == "1")
+
+
 # Initialisation de la session
-if 'rag' not in st.session_state:
-    st.session_state.rag = LocalRAG()
-    
+rag = get_rag()
+
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 
@@ -75,70 +85,35 @@ with st.container():
                 "content": question
             })
             
-            # Affichage d'un spinner pendant la recherche
-            with st.spinner("Recherche en cours..."):
-                try:
-                    # Recherche des documents pertinents
-                    results = st.session_state.rag.vector_search(question, top_k=3)
-                    
-                    if not results:
-                        response = "❌ Aucun document pertinent trouvé."
-                        sources = "Aucune source disponible"
-                    else:
-                        # Construction du contexte
-                        context = "\n\n".join([
-                            f"Document '{r['title']}' ({r['category']}):\n{r['content'][:500]}..."
-                            for r in results
-                        ])
-                        
-                        # Construction du prompt
-                        prompt = f"""Tu es un assistant expert en infrastructure qui aide à comprendre la documentation de Lempire.
-                        Utilise uniquement les informations du contexte ci-dessous pour répondre à la question.
-                        Si tu ne peux pas répondre avec le contexte donné, dis-le clairement.
-                        
-                        Contexte:
-                        {context}
-                        
-                        Question: {question}
-                        
-                        Réponse:"""
-                        
-                        # Appel à l'API de LM Studio
-                        import requests
-                        response = requests.post(
-                            f"{st.session_state.rag.llm_url}/chat/completions",
-                            json={
-                                "messages": [
-                                    {"role": "user", "content": prompt}
-                                ],
-                                "temperature": 0.7,
-                                "max_tokens": 1000
-                            }
-                        )
-                        
-                        if response.status_code == 200:
-                            response = response.json()['choices'][0]['message']['content']
-                            sources = "\n".join([
-                                f"- {r['title']} ({r['category']}) - Similarité: {r['similarity']:.2%}"
-                                for r in results
-                            ])
-                        else:
-                            response = f"❌ Erreur lors de l'appel à LM Studio: {response.status_code}"
-                            sources = "Erreur lors de la récupération des sources"
-                    
-                    # Ajout de la réponse à l'historique
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": question,
-                        "response": response,
-                        "sources": sources
-                    })
-                    
-                    # Recharge la page pour afficher la nouvelle réponse
-                    st.rerun()
-                    
-                except Exception as e:
-                    st.error(f"❌ Erreur: {str(e)}")
+            try:
+                # Affichage d'un spinner pendant la recherche
+                with st.spinner("Recherche en cours..."):
+                    result = rag.answer(question, stream=True)
+                
+                if result['answer'] is None:
+                    response = "❌ Aucun document pertinent trouvé."
+                    sources = "Aucune source disponible"
+                else:
+                    # Réponse affichée au fil de l'eau
+                    response = st.write_stream(result['answer'])
+                    sources = "\n".join([
+                        f"- {r['title']} ({r['category']}) - {describe_relevance(r)}"
+                        for r in result['sources']
+                    ])
+                
+                # Ajout de la réponse à l'historique
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": question,
+                    "response": response,
+                    "sources": sources
+                })
+                
+                # Recharge la page pour afficher la nouvelle réponse
+                st.rerun()
+                
+            except Exception as e:
+                st.error(f"❌ Erreur: {str(e)}")
 
 # Bouton pour effacer l'historique
 if st.button("Effacer l'historique"):